@@ -0,0 +1,93 @@
+"""Cost of the guided upsampling against the inference time it saves.
+
+Stylizes a frame at several scale factors on the CPU and upsamples the result to the output size with a plain
+resize and with the GuidedUpsampler. The difference columns compare both with the output at the reference scale
+factor, the guided one should be closer. Without --image a synthetic frame with hard edges is used.
+python3 benchmarks/guided_upsampling.py --model data/style_transfer_models/style1.pth --image face.jpg
+"""
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+import cv2
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from geometry import FrameGeometry  # noqa: E402
+from style_transfer.transformer_net import InferenceTransformerNet, TransformerNet  # noqa: E402
+from style_transfer.utils import load_style_state_dict, output_to_frame  # noqa: E402
+from upsampling import GuidedUpsampler  # noqa: E402
+
+
+def parse_args():
+    parser = ArgumentParser(description="Benchmark the guided upsampling against lower scale factors")
+    parser.add_argument("-m", "--model", default=None,
+                        help="style checkpoint to use, random weights if not given")
+    parser.add_argument("-i", "--image", default=None, help="frame to use, resized to the output size")
+    parser.add_argument("-W", "--width", default=1280, type=int, help="output width")
+    parser.add_argument("-H", "--height", default=720, type=int, help="output height")
+    parser.add_argument("-s", "--scale-factors", default=[0.4, 0.5, 0.6], type=float, nargs="+",
+                        help="scale factors to upsample from")
+    parser.add_argument("-S", "--reference-scale-factor", default=0.8, type=float,
+                        help="scale factor the upsampled outputs are compared with")
+    parser.add_argument("-r", "--repeats", default=5, type=int, help="timed runs")
+    return parser.parse_args()
+
+
+def get_frame(args):
+    if args.image:
+        return cv2.resize(cv2.imread(args.image), (args.width, args.height), interpolation=cv2.INTER_AREA)
+    frame = np.full((args.height, args.width, 3), 60, dtype=np.uint8)
+    cv2.circle(frame, (args.width // 2, args.height // 2), args.height // 3, (90, 160, 220), -1)
+    cv2.rectangle(frame, (args.width // 10, args.height // 10), (args.width // 4, args.height // 2),
+                  (230, 230, 230), -1)
+    cv2.putText(frame, "stylecam", (args.width // 3, args.height // 5), cv2.FONT_HERSHEY_SIMPLEX, 3,
+                (20, 20, 20), 8)
+    return frame
+
+
+def timed(function, repeats):
+    result = function()  # warm up
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - t0) / repeats, result
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    state_dict = load_style_state_dict(args.model) if args.model else TransformerNet().state_dict()
+    model = InferenceTransformerNet.from_state_dict(state_dict, subpixel=True).to(memory_format=torch.channels_last)
+    frame = get_frame(args)
+    output_size = (args.width, args.height)
+    upsampler = GuidedUpsampler()
+
+    def stylize(scale_factor):
+        model_input = FrameGeometry(output_size, scale_factor).to_model_input(frame)
+        with torch.no_grad():
+            x = torch.from_numpy(model_input).permute(2, 0, 1).unsqueeze(0).float()
+            return output_to_frame(model(x.contiguous(memory_format=torch.channels_last))[0].numpy())
+
+    reference_time, reference = timed(lambda: stylize(args.reference_scale_factor), args.repeats)
+    reference = cv2.resize(reference, output_size).astype(np.float32)
+    print("output {}x{}, reference scale factor {}: {:.1f} ms inference".format(
+        args.width, args.height, args.reference_scale_factor, reference_time * 1000))
+    print("{:>6} {:>13} {:>10} {:>10} {:>11} {:>12} {:>12}".format(
+        "scale", "inference ms", "resize ms", "guided ms", "saved ms", "resize diff", "guided diff"))
+    for scale_factor in args.scale_factors:
+        inference_time, styled = timed(lambda: stylize(scale_factor), args.repeats)
+        resize_time, resized = timed(lambda: cv2.resize(styled, output_size), args.repeats)
+        guided_time, guided = timed(lambda: upsampler.upsample(styled, frame), args.repeats)
+        # the writer resizes anyway, the guided upsampling costs only the difference
+        saved = reference_time - inference_time - (guided_time - resize_time)
+        print("{:>6.2f} {:>13.1f} {:>10.1f} {:>10.1f} {:>11.1f} {:>12.2f} {:>12.2f}".format(
+            scale_factor, inference_time * 1000, resize_time * 1000, guided_time * 1000, saved * 1000,
+            np.abs(resized - reference).mean(), np.abs(guided - reference).mean()))
+
+
+if __name__ == "__main__":
+    main()
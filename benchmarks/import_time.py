@@ -0,0 +1,69 @@
+"""Reports what importing the webcam modules costs, based on python -X importtime.
+
+python3 benchmarks/import_time.py [-o benchmarks/import_time.txt]
+Passthrough mode only needs the modules imported by fakecam, every backend adds its own runtime.
+"""
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+TARGETS = [
+    ("passthrough", "import main, fakecam"),
+    ("backend tensorrt", "import style_transfer.neural_style"),
+    ("backend torch", "import style_transfer.torch_style"),
+    ("backend onnx", "import style_transfer.onnx_style"),
+]
+
+
+def parse_args():
+    parser = ArgumentParser(description="Summarizes python -X importtime for the webcam modules")
+    parser.add_argument("-n", "--top", default=10, type=int, help="number of most expensive packages to list")
+    parser.add_argument("-o", "--output", default=None, help="also write the report to this file")
+    return parser.parse_args()
+
+
+def import_times(statement):
+    """total microseconds and cumulative microseconds per package imported by the statement's modules,
+    None and the error if the import failed"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=SRC_DIR,
+                            stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, universal_newlines=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    total = 0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # names are indented by two spaces per nesting level after the separating space
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 0:
+            total += int(cumulative)
+        elif level == 1:
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative)
+    return (total, packages), None
+
+
+def main():
+    args = parse_args()
+    report = []
+    for name, statement in TARGETS:
+        times, error = import_times(statement)
+        if times is None:
+            report.append("{}: not available ({})".format(name, error))
+            continue
+        total, packages = times
+        report.append("{}: {:.0f} ms".format(name, total / 1000))
+        for package, microseconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            report.append("    {:<30} {:>8.1f} ms".format(package, microseconds / 1000))
+    print("\n".join(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("\n".join(report) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Peak memory and time of tiled against untiled inference of a style model on the CPU.
+
+Every configuration runs in its own process, so its peak RSS is not hidden by the previous ones.
+The difference column compares the tiled output with the untiled one of the same frame.
+python3 benchmarks/tiled_inference.py --model data/style_transfer_models/style1.pth -W 3840 -H 2160
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from style_transfer.tiling import TiledInference  # noqa: E402
+from style_transfer.transformer_net import InferenceTransformerNet, TransformerNet  # noqa: E402
+from style_transfer.utils import load_style_state_dict, output_to_frame  # noqa: E402
+
+
+def parse_args():
+    parser = ArgumentParser(description="Benchmark tiled inference of a style model on the CPU")
+    parser.add_argument("-m", "--model", default=None,
+                        help="style checkpoint to use, random weights if not given")
+    parser.add_argument("-W", "--width", default=3840, type=int, help="input width")
+    parser.add_argument("-H", "--height", default=2160, type=int, help="input height")
+    parser.add_argument("-t", "--tile-sizes", default=[256, 512, 1024], type=int, nargs="+",
+                        help="tile sizes to compare with untiled inference")
+    parser.add_argument("--no-untiled", action="store_true",
+                        help="skip untiled inference, e.g. if it does not fit into memory")
+    return parser.parse_args()
+
+
+def load_model(model_path):
+    torch.manual_seed(0)
+    if model_path:
+        state_dict = load_style_state_dict(model_path)
+    else:
+        state_dict = TransformerNet().state_dict()
+    model = InferenceTransformerNet.from_state_dict(state_dict, subpixel=True)
+    return model.to(memory_format=torch.channels_last)
+
+
+def get_frame(width, height):
+    # a smooth image, random noise would make every tile look like a seam
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    frame = np.dstack([127 + 127 * np.sin(x / 97), 127 + 127 * np.cos(y / 61), 127 + 127 * np.sin((x + y) / 151)])
+    return frame.astype(np.uint8)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(args, tile_size, results):
+    model = load_model(args.model)
+    frame = get_frame(args.width, args.height)
+    base_rss = peak_rss_mb()
+    t0 = time.perf_counter()
+    if tile_size is None:
+        with torch.no_grad():
+            x = torch.from_numpy(frame).permute(2, 0, 1).unsqueeze(0).float()
+            output = output_to_frame(model(x.contiguous(memory_format=torch.channels_last))[0].numpy())
+    else:
+        output = TiledInference(model, torch.device("cpu"), tile_size).stylize(frame)
+    seconds = time.perf_counter() - t0
+    results.put((seconds, base_rss, peak_rss_mb(), output))
+
+
+def main():
+    args = parse_args()
+    context = multiprocessing.get_context("fork")
+    configurations = ([] if args.no_untiled else [None]) + args.tile_sizes
+    print("input {}x{}, {} threads".format(args.width, args.height, torch.get_num_threads()))
+    print("{:<10} {:>10} {:>16} {:>16} {:>14}".format("tile size", "seconds", "peak RSS in MB", "above base in MB",
+                                                      "mean abs diff"))
+    reference = None
+    for tile_size in configurations:
+        results = context.Queue()
+        process = context.Process(target=run, args=(args, tile_size, results))
+        process.start()
+        seconds, base_rss, rss, output = results.get()
+        process.join()
+        if tile_size is None:
+            reference = output
+        difference = "-" if reference is None or tile_size is None else \
+            "{:.2f}".format(np.abs(output.astype(np.float32) - reference).mean())
+        print("{:<10} {:>10.2f} {:>16.0f} {:>16.0f} {:>14}".format(tile_size or "untiled", seconds, rss,
+                                                                  rss - base_rss, difference))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compares InferenceTransformerNet with TransformerNet on the CPU.
+
+Checks that all variants compute the same images and prints their inference times.
+python3 benchmarks/transformer_net_cpu.py --model data/style_transfer_models/style1.pth
+"""
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from style_transfer.transformer_net import InferenceTransformerNet, TransformerNet  # noqa: E402
+from style_transfer.utils import load_style_state_dict  # noqa: E402
+
+
+def parse_args():
+    parser = ArgumentParser(description="Benchmark the inference variant of TransformerNet on the CPU")
+    parser.add_argument("-m", "--model", default=None,
+                        help="style checkpoint to use, random weights if not given")
+    parser.add_argument("-W", "--width", default=896, type=int, help="input width")
+    parser.add_argument("-H", "--height", default=504, type=int, help="input height")
+    parser.add_argument("-r", "--repeats", default=10, type=int, help="timed runs per variant")
+    parser.add_argument("-t", "--threads", default=None, type=int, help="torch intra-op threads")
+    return parser.parse_args()
+
+
+def time_model(model, x, repeats):
+    with torch.no_grad():
+        model(x)  # warm up
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            output = model(x)
+        return (time.perf_counter() - t0) / repeats, output.contiguous()
+
+
+def main():
+    args = parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    reference = TransformerNet()
+    if args.model:
+        reference.load_state_dict(load_style_state_dict(args.model))
+    reference.eval()
+    state_dict = reference.state_dict()
+    x = torch.rand(1, 3, args.height, args.width) * 255
+
+    variants = [
+        ("TransformerNet", reference, x),
+        ("InferenceTransformerNet", InferenceTransformerNet.from_state_dict(state_dict), x),
+        ("+ channels_last",
+         InferenceTransformerNet.from_state_dict(state_dict).to(memory_format=torch.channels_last),
+         x.contiguous(memory_format=torch.channels_last)),
+        ("+ channels_last + sub-pixel",
+         InferenceTransformerNet.from_state_dict(state_dict, subpixel=True).to(memory_format=torch.channels_last),
+         x.contiguous(memory_format=torch.channels_last)),
+    ]
+    print("input {}x{}, {} threads".format(args.width, args.height, torch.get_num_threads()))
+    print("{:<30} {:>10} {:>9} {:>14}".format("variant", "ms/frame", "speedup", "max rel. diff"))
+    reference_time, reference_output = None, None
+    for name, model, model_input in variants:
+        seconds, output = time_model(model, model_input, args.repeats)
+        if reference_output is None:
+            reference_time, reference_output = seconds, output
+        difference = ((output - reference_output).abs().max() / reference_output.abs().max()).item()
+        print("{:<30} {:>10.1f} {:>8.2f}x {:>14.2e}".format(name, seconds * 1000, reference_time / seconds,
+                                                             difference))
+        if difference > 1e-4:
+            print("ERROR: {} does not match TransformerNet".format(name))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
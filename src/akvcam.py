@@ -1,69 +1,200 @@
 import os
 import threading
+import time
 from fcntl import ioctl
-from queue import Queue
+from queue import Full, Queue
 
 import cv2
+import numpy as np
 
 import v4l2
+from metrics import metrics
+from placement import placement
+from recovery import reopen_with_backoff
+from tracing import tracer
+from upsampling import GuidedUpsampler
 
 
 class AkvCameraWriter:
+    # seconds a single write may take before the device counts as stalled and is reopened
+    WRITE_TIMEOUT = 2.0
+
     def __init__(self, webcam, width, height):
         self.webcam = webcam
         self.width = width
         self.height = height
         self.d = self.open_camera()
         self.queue = Queue(maxsize=1)
+        self.output_buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.upsampler = GuidedUpsampler()
         self.is_stop_lock = threading.Lock()
         self.is_stop = False
-        self.thread = threading.Thread(target=self.writer_thread)
+        # seconds after their capture frames are dropped instead of written, None writes all
+        self.latency_budget = None
+        self.is_last_dropped = False
+        # frames are dropped while the device is reopened, the processing loop does not wait for it
+        self.is_reopening = False
+        # monotonic time the running write started at, None between writes
+        self.write_started_at = None
+        # a writer thread hanging in a write is replaced, it exits once it sees a newer generation
+        self.generation = 0
+        self.thread = None
+        self._start_writer()
+        self.watchdog = threading.Thread(target=self.watchdog_thread, name="writer_watchdog", daemon=True)
+        self.watchdog.start()
+
+    def _start_writer(self, stalled_since=None):
+        self.generation += 1
+        # daemon, a thread hanging in a write must not keep the process alive
+        self.thread = threading.Thread(target=self.writer_thread, args=(self.generation, stalled_since),
+                                       name="writer", daemon=True)
         self.thread.start()
 
     def open_camera(self):
         d = os.open(self.webcam, os.O_RDWR)
-        cap = v4l2.v4l2_capability()
-        ioctl(d, v4l2.VIDIOC_QUERYCAP, cap)
-        vid_format = v4l2.v4l2_format()
-        vid_format.type = v4l2.V4L2_BUF_TYPE_VIDEO_OUTPUT
-        vid_format.fmt.pix.width = self.width
-        vid_format.fmt.pix.height = self.height
-        vid_format.fmt.pix.pixelformat = v4l2.V4L2_PIX_FMT_RGB24
-        vid_format.fmt.pix.field = v4l2.V4L2_FIELD_NONE
-        vid_format.fmt.pix.colorspace = v4l2.V4L2_COLORSPACE_SRGB
-        ioctl(d, v4l2.VIDIOC_S_FMT, vid_format)
+        try:
+            cap = v4l2.v4l2_capability()
+            ioctl(d, v4l2.VIDIOC_QUERYCAP, cap)
+            vid_format = v4l2.v4l2_format()
+            vid_format.type = v4l2.V4L2_BUF_TYPE_VIDEO_OUTPUT
+            vid_format.fmt.pix.width = self.width
+            vid_format.fmt.pix.height = self.height
+            vid_format.fmt.pix.pixelformat = v4l2.V4L2_PIX_FMT_RGB24
+            vid_format.fmt.pix.field = v4l2.V4L2_FIELD_NONE
+            vid_format.fmt.pix.colorspace = v4l2.V4L2_COLORSPACE_SRGB
+            ioctl(d, v4l2.VIDIOC_S_FMT, vid_format)
+        except Exception:
+            # the reopen retries would leak a descriptor per attempt
+            os.close(d)
+            raise
         return d
 
-    def writer_thread(self):
-        while not self.is_stop:
+    def _reopen(self):
+        self.d = self.open_camera()
+
+    def writer_thread(self, generation, stalled_since=None):
+        placement.apply("writer")
+        if stalled_since is not None:
+            # replaces a thread that hangs in a write
+            self._recover(stalled_since)
+        while not self.is_stop and generation == self.generation:
+            wait_start = time.perf_counter_ns()
             try:
-                elem = self.queue.get(timeout=1)
+                elem, guide, timestamp = self.queue.get(timeout=1)
             except:
                 # print("akvcam waited longer as 1 second for a frame. Continuing.")
                 continue
-            if elem is None:
-                error = "input queue for akvcam was empty"
-                raise Exception(error)
-            image_data = cv2.resize(elem, (self.width, self.height)).tobytes()
             try:
-                os.write(self.d, image_data)
-            except Exception:
-                error = "could not write image to akvcam output device"
-                raise IOError(error)
+                self._write_frame(elem, guide, timestamp, wait_start, generation)
+            except OSError as e:
+                if generation != self.generation:
+                    break
+                print("could not write image to akvcam output device, reopening it:", e)
+                self._recover(time.monotonic())
+            except Exception as e:
+                # a broken frame must not end the thread, the next one is written
+                print("could not write frame to akvcam output device:", e)
+
+    def watchdog_thread(self):
+        """reopens the device when a write hangs, os.write does not time out by itself"""
+        while not self.is_stop:
+            time.sleep(0.5)
+            started_at = self.write_started_at
+            if started_at is None or time.monotonic() - started_at < self.WRITE_TIMEOUT:
+                continue
+            print("writing to the akvcam output device hangs, reopening it")
+            metrics.increment("output_stalls")
+            self.is_reopening = True
+            self.write_started_at = None
+            # the hanging thread owns the old descriptor and closes it once its write returns
+            self.d = None
+            self._start_writer(started_at)
+
+    def _recover(self, failed_at):
+        metrics.increment("output_reopens")
+        self.is_reopening = True
+        self._close()
+        if reopen_with_backoff("akvcam output device", self._reopen, lambda: self.is_stop):
+            metrics.set("output_recovery_s", round(time.monotonic() - failed_at, 2))
+        self.is_reopening = False
+
+    def _write_frame(self, elem, guide, timestamp, wait_start, generation):
+        tracer.add("writer.queue_wait", wait_start, time.perf_counter_ns())
+        if elem is None:
+            error = "input queue for akvcam was empty"
+            raise Exception(error)
+        if self._is_late(timestamp):
+            return
+        if elem.shape[:2] != (self.height, self.width):
+            if guide is not None and guide.shape[:2] == (self.height, self.width):
+                with tracer.span("writer.upsample"):
+                    elem = self.upsampler.upsample(elem, guide)
+            else:
+                with tracer.span("writer.resize"):
+                    elem = cv2.resize(elem, (self.width, self.height), dst=self.output_buffer)
+        # frames in output size, e.g. unstyled ones, are written as they are without a copy
+        d = self.d
+        self.write_started_at = time.monotonic()
+        try:
+            with tracer.span("writer.write"):
+                os.write(d, np.ascontiguousarray(elem))
+        finally:
+            if generation == self.generation:
+                self.write_started_at = None
+            else:
+                # the watchdog replaced this thread while the write hung, the old descriptor is only used here
+                try:
+                    os.close(d)
+                except OSError:
+                    pass
+        if generation != self.generation:
+            return
+        if timestamp is not None:
+            metrics.set("latency_ms", round((time.monotonic() - timestamp) * 1000, 1))
+
+    def _is_late(self, timestamp):
+        """frames past the latency budget are dropped, but never two in a row,
+        so a pipeline that is slower than the budget as a whole still shows every second frame"""
+        is_late = self.latency_budget is not None and timestamp is not None and not self.is_last_dropped and \
+            time.monotonic() - timestamp > self.latency_budget
+        self.is_last_dropped = is_late
+        if is_late:
+            metrics.increment("dropped_frames")
+            metrics.increment("dropped_frames_writer")
+        return is_late
 
     def stop(self):
         with self.is_stop_lock:
             self.is_stop = True
         if self.thread.is_alive():
             self.thread.join()
-        os.close(self.d)
+        self._close()
         print("stopped fake cam writer")
 
-    def schedule_frame(self, image_):
-        self.queue.put(image_)
+    def _close(self):
+        if self.d is not None:
+            try:
+                os.close(self.d)
+            except OSError:
+                pass
+            self.d = None
+
+    def schedule_frame(self, image_, guide=None, timestamp=None):
+        """guide is the BGR camera frame in output size for the guided upsampling of a smaller image_,
+        timestamp the time.monotonic() the frame was captured at"""
+        if self.is_reopening:
+            metrics.increment("dropped_frames")
+            metrics.increment("dropped_frames_writer")
+            return
+        try:
+            self.queue.put((image_, guide, timestamp), timeout=1)
+        except Full:
+            # the writer is stuck, the processing loop keeps going
+            metrics.increment("dropped_frames")
+            metrics.increment("dropped_frames_writer")
 
     def __del__(self):
-        os.close(self.d)
+        self._close()
 
 
 if __name__ == "__main__":
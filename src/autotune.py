@@ -0,0 +1,283 @@
+import glob
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from importlib import metadata
+from importlib.util import find_spec
+
+import numpy as np
+
+from geometry import FrameGeometry
+from style_transfer.backends import PRECISIONS, create_style_transfer
+from style_transfer.style_pack import is_pack_entry, split_pack_entry
+
+PROFILE_VERSION = 1
+SCALE_BUCKETS = (0.4, 0.55, 0.7, 0.85)
+# the thread counts are compared at this scale factor
+THREAD_SCALE_FACTOR = 0.55
+RUNTIMES = ("torch", "onnxruntime", "onnxruntime-gpu", "tensorrt")
+# the nice value of the background tuning, the webcam keeps the CPUs it needs
+BACKGROUND_NICENESS = 10
+
+
+def get_available_backends():
+    """the backends whose runtime is installed, tensorrt only with a nvidia gpu"""
+    backends = []
+    if find_spec("tensorrt") is not None and len(_get_gpu_names()) > 0:
+        backends.append("tensorrt")
+    if find_spec("torch") is not None:
+        backends.append("torch")
+    if find_spec("onnxruntime") is not None:
+        backends.append("onnx")
+    return backends
+
+
+def get_fingerprint(model_paths, precision, width, height):
+    """everything the tuning result depends on, the profile is tuned again once any of it changes"""
+    return {
+        "version": PROFILE_VERSION,
+        "cpu": _get_cpu_name(),
+        "cpu_count": os.cpu_count(),
+        "usable_cpus": len(os.sched_getaffinity(0)),
+        "gpus": _get_gpu_names(),
+        "runtimes": _get_runtime_versions(),
+        "models": _hash_models(model_paths),
+        "precision": precision,
+        "size": [width, height],
+    }
+
+
+def _get_cpu_name():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def _get_gpu_names():
+    names = []
+    for path in sorted(glob.glob("/proc/driver/nvidia/gpus/*/information")):
+        with open(path) as f:
+            for line in f:
+                if line.startswith("Model:"):
+                    names.append(line.split(":", 1)[1].strip())
+    return names
+
+
+def _get_runtime_versions():
+    versions = {}
+    for name in RUNTIMES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            pass
+    return versions
+
+
+def _hash_models(model_paths):
+    digest = hashlib.sha1()
+    for model_path in model_paths:
+        file_path = split_pack_entry(model_path)[0] if is_pack_entry(model_path) else model_path
+        stat = os.stat(file_path)
+        digest.update("{} {} {}\n".format(model_path, stat.st_size, stat.st_mtime).encode())
+    return digest.hexdigest()
+
+
+def get_thread_counts():
+    cpus = len(os.sched_getaffinity(0))
+    return sorted({1, max(1, cpus // 2), cpus})
+
+
+def measure(styler, frame, repeats):
+    """median milliseconds per frame"""
+    for _ in range(2):
+        styler.stylize(frame.copy())  # warm up, the first frame also loads the model
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        styler.stylize(frame.copy())
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)) * 1000
+
+
+def get_synthetic_frame(width, height, scale_factor):
+    """the inference time does not depend on the content, noise is as good as a webcam frame"""
+    geometry = FrameGeometry((width, height), scale_factor)
+    return np.random.RandomState(0).randint(0, 256, (geometry.model_size[1], geometry.model_size[0], 3),
+                                            dtype=np.uint8)
+
+
+def tune(model_path, backends, precision, width, height, repeats=5):
+    """milliseconds per frame of every backend at its best thread count, for each scale bucket"""
+    results = {}
+    thread_frame = get_synthetic_frame(width, height, THREAD_SCALE_FACTOR)
+    for backend in backends:
+        if backend == "tensorrt":
+            print("building the tensorrt engine for the autotuning, this might take several minutes")
+        thread_counts = [None] if backend == "tensorrt" else get_thread_counts()
+        thread_ms = {}
+        for num_threads in thread_counts:
+            try:
+                styler = create_style_transfer(backend, model_path, precision=precision, num_threads=num_threads)
+                thread_ms[num_threads] = measure(styler, thread_frame, repeats)
+            except Exception as e:
+                print("autotune: {} does not work:".format(backend), e)
+                break
+            print("autotune: {} with {} threads {:.1f} ms".format(backend, num_threads or "default",
+                                                                  thread_ms[num_threads]))
+        if len(thread_ms) == 0:
+            continue
+        num_threads = min(thread_ms, key=thread_ms.get)
+        # torch keeps the thread count of the last styler, the styler is created again with the best one
+        styler = create_style_transfer(backend, model_path, precision=precision, num_threads=num_threads)
+        scale_ms = {}
+        for scale_factor in SCALE_BUCKETS:
+            scale_ms[str(scale_factor)] = measure(styler, get_synthetic_frame(width, height, scale_factor), repeats)
+            print("autotune: {} at scale factor {} {:.1f} ms".format(backend, scale_factor,
+                                                                     scale_ms[str(scale_factor)]))
+        results[backend] = {"num_threads": num_threads, "scale_ms": scale_ms,
+                            "thread_ms": {str(count): ms for count, ms in thread_ms.items()}}
+    return results
+
+
+def choose_settings(profile, fps, backend=None):
+    """backend, thread count and the largest scale factor that keeps up with fps.
+    Without a backend the one allowing the largest scale factor is chosen"""
+    # the inference gets 80 % of the frame time, decoding, noise suppression and writing need the rest
+    budget = 800 / fps
+    candidates = []
+    for name, result in profile["backends"].items():
+        if backend is not None and name != backend:
+            continue
+        scale_ms = {float(scale_factor): ms for scale_factor, ms in result["scale_ms"].items()}
+        fitting = [scale_factor for scale_factor, ms in scale_ms.items() if ms <= budget]
+        # the smallest bucket if none keeps up
+        scale_factor = max(fitting) if fitting else min(scale_ms)
+        candidates.append((scale_factor, -scale_ms[scale_factor], name, result["num_threads"]))
+    if len(candidates) == 0:
+        return None
+    scale_factor, _, name, num_threads = max(candidates)
+    return name, num_threads, scale_factor
+
+
+def load_profile(path, fingerprint=None):
+    """the profile at path, None if there is none or it was tuned for something else. Without a fingerprint
+    a profile tuned for anything is returned"""
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if fingerprint is not None and profile.get("fingerprint") != fingerprint:
+        return None
+    return profile
+
+
+def _get_tunable_models(model_paths):
+    # filter styles and tensorflow checkpoints are no candidates for the measurement
+    return [model_path for model_path in model_paths if is_pack_entry(model_path)
+            or model_path.endswith((".pth", ".model"))]
+
+
+def get_cached_profile(path, model_paths, precision, width, height):
+    """the profile without tuning, which takes minutes, and whether it is current. An outdated profile is better
+    than none, None if there is no profile at all"""
+    model_paths = _get_tunable_models(model_paths)
+    if len(model_paths) == 0:
+        return None, True
+    profile = load_profile(path)
+    if profile is None:
+        print("no autotune profile in {}, using the default settings".format(path))
+        return None, False
+    if profile.get("fingerprint") != get_fingerprint(model_paths, precision, width, height):
+        print("the autotune profile in {} was tuned for other hardware, runtimes, models or settings, using it "
+              "until it is tuned again".format(path))
+        # a runtime that was removed since cannot be used anymore
+        available = get_available_backends()
+        profile["backends"] = {name: result for name, result in profile["backends"].items() if name in available}
+        return profile, False
+    return profile, True
+
+
+def start_background_tuning(path, style_model_dir, precision, width, height):
+    """tunes the profile in a low priority autotune.py process, the running webcam keeps its settings and the next
+    start uses the new profile. Returns the process"""
+    log_path = os.path.splitext(path)[0] + ".log"
+    print("tuning the autotune profile in the background, the next start uses it. Its output goes to", log_path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    command = [sys.executable, os.path.abspath(__file__), "-s", style_model_dir, "--profile", path,
+               "-W", str(width), "-H", str(height), "-p", precision]
+    with open(log_path, "w") as log:
+        return subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                preexec_fn=_lower_priority)
+
+
+def _lower_priority():
+    # the process inherits the nice value of the inference thread, which may be below the default.
+    # Lowering a nice value needs CAP_SYS_NICE, so a higher one is kept
+    os.setpriority(os.PRIO_PROCESS, 0, max(os.nice(0), BACKGROUND_NICENESS))
+
+
+def get_profile(path, model_paths, precision, width, height, is_retune=False):
+    """the cached profile, tuned first if it is missing, outdated or is_retune is set"""
+    model_paths = _get_tunable_models(model_paths)
+    if len(model_paths) == 0:
+        return None
+    fingerprint = get_fingerprint(model_paths, precision, width, height)
+    profile = None if is_retune else load_profile(path, fingerprint)
+    if profile is None:
+        print("autotuning the backend, thread count and scale factor for this machine, this is done once")
+        backends = get_available_backends()
+        profile = {"fingerprint": fingerprint,
+                   "backends": tune(model_paths[0], backends, precision, width, height)}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # a starting main.py must not read a half written profile of a background tuning
+        with open(path + ".tmp", "w") as f:
+            json.dump(profile, f, indent=2)
+        os.replace(path + ".tmp", path)
+        print("autotune profile written to", path)
+    return profile
+
+
+def parse_args():
+    parser = ArgumentParser(description="Tunes the backend, the number of inference threads and the scale factor \
+                            for this machine and writes the profile main.py starts with. main.py runs it in the \
+                            background when the profile is missing or outdated and uses the result from its next \
+                            start on.")
+    parser.add_argument("-s", "--style-model-dir", default="./data/style_transfer_models_bu",
+                        help="Folder which (subfolders) contains saved style transfer networks, or a style pack")
+    parser.add_argument("--profile", default="./data/autotune_profile.json", help="Path of the profile")
+    parser.add_argument("-W", "--width", default=1280, type=int, help="webcam width")
+    parser.add_argument("-H", "--height", default=720, type=int, help="webcam height")
+    parser.add_argument("-F", "--fps", default=30, type=int, help="webcam FPS the scale factor is chosen for")
+    parser.add_argument("-p", "--precision", default="fp32", choices=PRECISIONS, help="precision of the models")
+    return parser.parse_args()
+
+
+def main():
+    from fakecam import FakeCam
+
+    args = parse_args()
+    model_paths = FakeCam._get_list_of_all_models(args.style_model_dir)
+    profile = get_profile(args.profile, model_paths, args.precision, args.width, args.height, is_retune=True)
+    if profile is None:
+        print("no style models to tune with in", args.style_model_dir)
+        return
+    settings = choose_settings(profile, args.fps)
+    if settings is None:
+        print("no backend works on this machine")
+        return
+    print("backend {}, {} threads, scale factor {}".format(*settings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+
+from placement import placement
+from tracing import tracer
+
+
+class ControlServer:
+    """Accepts commands for a FakeCam on a unix socket and on stdin.
+
+    Each line is one JSON command, e.g. {"cmd": "set_style", "name": "mosaic"}, answered by one JSON reply.
+    Connected socket clients additionally receive every status event of the cam.
+    The single digit commands of the old terminal interface are still understood on stdin.
+    """
+    LEGACY_COMMANDS = {
+        "1": {"cmd": "toggle"},
+        "2": {"cmd": "previous_style"},
+        "3": {"cmd": "next_style"},
+        "4": {"cmd": "scale", "delta": -0.1},
+        "5": {"cmd": "scale", "delta": 0.1},
+        "6": {"cmd": "noise", "delta": -5},
+        "7": {"cmd": "noise", "delta": 5},
+        "8": {"cmd": "roi"},
+        "c": {"cmd": "stop"},
+    }
+    # slow clients are disconnected instead of buffering events for them forever
+    MAX_CLIENT_BUFFER = 1 << 20
+
+    def __init__(self, cam, socket_path=None, use_stdin=True):
+        self.cam = cam
+        self.socket_path = socket_path
+        self.use_stdin = use_stdin
+        self.loop = None
+        self.clients = set()
+        self.thread = threading.Thread(target=self._run_loop, name="control", daemon=True)
+        self.cam.add_status_listener(self._on_status)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _run_loop(self):
+        placement.apply("control")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        tasks = []
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+            print("control socket listening on", self.socket_path)
+            tasks.append(server.serve_forever())
+        if self.use_stdin:
+            tasks.append(self._read_stdin())
+        await asyncio.gather(*tasks)
+
+    async def _read_stdin(self):
+        while True:
+            # a blocking readline in the default executor keeps this working for ttys, pipes and files alike
+            line = await self.loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                # stdin is closed, e.g. when started without a terminal; the socket keeps working
+                return
+            line = line.strip()
+            if not line:
+                continue
+            if line in self.LEGACY_COMMANDS:
+                self.execute(self.LEGACY_COMMANDS[line])
+            elif line.startswith("{"):
+                print(json.dumps(self.handle_line(line)))
+            else:
+                print("input {} was not recognized".format(line))
+
+    async def _handle_client(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            writer.write(self._encode({"event": "status", **self.cam.get_status()}))
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # a line that is no utf-8 ends up as invalid json and gets an error reply
+                writer.write(self._encode(self.handle_line(line.decode(errors="replace"))))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def _on_status(self, event):
+        # called from the camera threads
+        if self.loop is not None and self.clients:
+            self.loop.call_soon_threadsafe(self._broadcast, event)
+
+    def _broadcast(self, event):
+        data = self._encode(event)
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > self.MAX_CLIENT_BUFFER:
+                self.clients.discard(writer)
+                writer.close()
+                continue
+            writer.write(data)
+
+    @staticmethod
+    def _encode(message):
+        return (json.dumps(message) + "\n").encode()
+
+    def handle_line(self, line):
+        try:
+            command = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": "invalid json: {}".format(e)}
+        if not isinstance(command, dict):
+            return {"ok": False, "error": "a command has to be a json object"}
+        return self.execute(command)
+
+    def _get_style_number(self, style):
+        number = style if isinstance(style, int) else self.cam.get_style_number(str(style))
+        if number is None:
+            raise ValueError("style {} does not exist".format(style))
+        return number
+
+    def _mix(self, command):
+        if "style" in command:
+            return self.cam.set_style_fade(self._get_style_number(command["style"]), float(command["value"]))
+        numbers = [self._get_style_number(style) for style in command.get("styles", [])]
+        weights = [float(weight) for weight in command.get("weights", [1] * len(numbers))]
+        return self.cam.set_style_mix(numbers, weights)
+
+    def execute(self, command):
+        cmd = command.get("cmd")
+        try:
+            if cmd == "toggle":
+                if "value" in command:
+                    ok = self.cam.set_is_styling(bool(command["value"]))
+                else:
+                    ok = self.cam.switch_is_styling()
+            elif cmd == "roi":
+                if "value" in command:
+                    ok = self.cam.set_is_roi_styling(bool(command["value"]))
+                else:
+                    ok = self.cam.switch_is_roi_styling()
+            elif cmd == "tile_cache":
+                ok = self.cam.set_is_tile_caching(bool(command.get("value", True)))
+            elif cmd == "guided_upsampling":
+                ok = self.cam.set_is_guided_upsampling(bool(command.get("value", True)))
+            elif cmd == "keyframes":
+                ok = self.cam.set_keyframe_interval(int(command["value"]))
+            elif cmd == "set_style":
+                if "name" in command:
+                    ok = self.cam.set_style_by_name(str(command["name"]))
+                else:
+                    ok = self.cam.set_style_number(int(command["index"]))
+            elif cmd == "mix":
+                ok = self._mix(command)
+            elif cmd == "next_style":
+                ok = self.cam.set_next_style()
+            elif cmd == "previous_style":
+                ok = self.cam.set_previous_style()
+            elif cmd == "scale":
+                if "value" in command:
+                    ok = self.cam.set_scale_factor(float(command["value"]))
+                else:
+                    ok = self.cam.add_to_scale_factor(float(command.get("delta", 0.1)))
+            elif cmd == "noise":
+                if "value" in command:
+                    ok = self.cam.set_noise_factor(float(command["value"]))
+                else:
+                    ok = self.cam.add_to_noise_factor(float(command.get("delta", 5)))
+            elif cmd == "list_styles":
+                return {"ok": True, "styles": self.cam.get_style_names()}
+            elif cmd == "trace":
+                if not tracer.is_enabled:
+                    return {"ok": False, "error": "tracing is disabled, start with --trace"}
+                return {"ok": True, "path": tracer.dump(command.get("path"))}
+            elif cmd == "status":
+                ok = True
+            elif cmd == "stop":
+                ok = self.cam.stop()
+            else:
+                return {"ok": False, "error": "unknown command {}".format(cmd)}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": "invalid arguments for {}: {}".format(cmd, e)}
+        return {"ok": ok, "status": self.cam.get_status()}
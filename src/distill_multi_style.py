@@ -0,0 +1,122 @@
+import os
+import time
+from argparse import ArgumentParser
+
+import cv2
+import numpy as np
+import torch
+
+from fakecam import FakeCam
+from style_transfer.multi_style import MultiStyleTransformerNet
+from style_transfer.style_pack import write_style_pack
+from style_transfer.transformer_net import InferenceTransformerNet
+from style_transfer.utils import load_style_state_dict, normalize_batch
+
+
+def parse_args():
+    parser = ArgumentParser(description="Distills the style models of a folder into one multi style model whose \
+                            styles share all convolutions and only differ in their instance norm parameters. \
+                            The result is a style pack for main.py -s, switching its styles is almost free with the \
+                            torch backend.")
+    parser.add_argument("-s", "--style-model-dir", default="./data/style_transfer_models_bu",
+                        help="Folder which (subfolders) contains the saved style transfer networks to distill")
+    parser.add_argument("-i", "--images", default="./data/calibration_frames",
+                        help="Folder with content images, e.g. the calibration frames of quantize_models.py")
+    parser.add_argument("-o", "--output", default="./data/multi_style.stylepack",
+                        help="Path of the style pack to write")
+    parser.add_argument("--steps", default=4000, type=int, help="training steps")
+    parser.add_argument("--batch-size", default=4, type=int, help="crops per step")
+    parser.add_argument("--image-size", default=256, type=int, help="size of the square crops")
+    parser.add_argument("--lr", default=1e-4, type=float, help="learning rate")
+    parser.add_argument("--perceptual-weight", default=0.0, type=float,
+                        help="weight of a Vgg16 feature loss in addition to the pixel loss, needs the Vgg16 weights")
+    parser.add_argument("--fp16", action="store_true", help="store the weights in half precision")
+    parser.add_argument("-d", "--device", default=None, help="torch device, defaults to cuda if available")
+    return parser.parse_args()
+
+
+def load_images(image_dir):
+    images = []
+    for file_name in sorted(os.listdir(image_dir)):
+        image = cv2.imread(os.path.join(image_dir, file_name))
+        if image is not None:
+            images.append(image)
+    if len(images) == 0:
+        raise Exception("no content images found in " + image_dir)
+    return images
+
+
+def get_batch(images, batch_size, image_size, device):
+    crops = []
+    for _ in range(batch_size):
+        image = images[np.random.randint(len(images))]
+        # random scale between the whole image and full resolution crops
+        short_side = min(image.shape[:2])
+        scale = image_size / short_side * np.random.uniform(1.0, max(1.0, short_side / image_size))
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        y = np.random.randint(image.shape[0] - image_size + 1)
+        x = np.random.randint(image.shape[1] - image_size + 1)
+        crops.append(image[y:y + image_size, x:x + image_size])
+    batch = torch.from_numpy(np.stack(crops)).permute(0, 3, 1, 2).float()
+    return batch.to(device)
+
+
+def main():
+    args = parse_args()
+    device = torch.device(args.device or ("cuda" if torch.cuda.is_available() else "cpu"))
+    model_paths = FakeCam._get_list_of_all_models(args.style_model_dir, [".pth", ".model"])
+    names = [os.path.splitext(os.path.relpath(path, args.style_model_dir))[0].replace(os.sep, "/")
+             for path in model_paths]
+    state_dicts = [load_style_state_dict(path) for path in model_paths]
+    teachers = [InferenceTransformerNet.from_state_dict(state_dict).to(device) for state_dict in state_dicts]
+    student = MultiStyleTransformerNet.from_state_dicts(state_dicts).to(device).train()
+    images = load_images(args.images)
+    optimizer = torch.optim.Adam(student.parameters(), args.lr)
+    vgg = None
+    if args.perceptual_weight > 0:
+        from style_transfer.vgg import Vgg16
+
+        vgg = Vgg16(requires_grad=False, last_layer="relu2_2").to(device).eval()
+    print("distilling {} styles on {} content images".format(len(names), len(images)))
+
+    t0 = time.monotonic()
+    running_loss = 0
+    for step in range(1, args.steps + 1):
+        style = np.random.randint(len(teachers))
+        x = get_batch(images, args.batch_size, args.image_size, device)
+        with torch.no_grad():
+            target = teachers[style](x)
+        student.set_style(style)
+        output = student(x)
+        # the outputs are in the 0-255 range
+        loss = torch.nn.functional.mse_loss(output / 255, target / 255)
+        if vgg is not None:
+            features = vgg(normalize_batch(output.clamp(0, 255)))
+            with torch.no_grad():
+                target_features = vgg(normalize_batch(target.clamp(0, 255)))
+            loss = loss + args.perceptual_weight * torch.nn.functional.mse_loss(features.relu2_2,
+                                                                                target_features.relu2_2)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        running_loss += loss.item()
+        if step % 100 == 0:
+            print("step {}/{} loss {:.5f} ({:.1f} steps/s)".format(step, args.steps, running_loss / 100,
+                                                                   step / (time.monotonic() - t0)))
+            running_loss = 0
+
+    student.eval()
+    print("{:<40} {:>8}".format("style", "psnr"))
+    with torch.no_grad():
+        x = get_batch(images, args.batch_size, args.image_size, device)
+        for style, (name, teacher) in enumerate(zip(names, teachers)):
+            student.set_style(style)
+            mse = ((student(x).clamp(0, 255) - teacher(x).clamp(0, 255)) ** 2).mean().item()
+            print("{:<40} {:>8.2f}".format(name, 10 * np.log10(255 ** 2 / max(mse, 1e-10))))
+    style_state_dicts = {name: student.get_style_state_dict(style) for style, name in enumerate(names)}
+    write_style_pack(args.output, style_state_dicts, fp16=args.fp16, shared_state_dict=student.get_shared_state_dict())
+    print("wrote", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import os
+import time
+from argparse import ArgumentParser
+from collections import namedtuple
+
+import cv2
+import numpy as np
+import torch
+
+from fakecam import FakeCam
+from geometry import FrameGeometry
+from style_transfer.backends import create_style_transfer
+from style_transfer.utils import model_cache_path, perceptual_distance, style_distance
+from style_transfer.vgg import Vgg16
+
+# one way to run a style, written backend:precision:scale_factor:noise_threshold on the command line
+Config = namedtuple("Config", ["backend", "precision", "scale_factor", "noise_epsilon"])
+# the backends fall back to fp32 without a quantized model, which must not be reported as int8
+INT8_ENDINGS = {"torch": ".int8.pt", "onnx": ".int8.onnx"}
+Result = namedtuple("Result", ["config", "latency_p50", "latency_p95", "fps", "perceptual", "style", "ssim",
+                               "flicker"])
+
+
+def parse_config(text):
+    backend, precision, scale_factor, noise_epsilon = text.split(":")
+    return Config(backend, precision, float(scale_factor), float(noise_epsilon))
+
+
+def parse_args():
+    parser = ArgumentParser(description="Runs a fixed frame sequence through several configurations of every style, \
+                            measures their latency and throughput and scores their output against a reference \
+                            configuration. Prints a table per style, the configurations marked with * are pareto \
+                            optimal: no other one is both faster and closer to the reference.")
+    parser.add_argument("-s", "--style-model-dir", default="./data/style_transfer_models_bu",
+                        help="Folder which (subfolders) contains saved style transfer networks, or a style pack")
+    parser.add_argument("-f", "--frames", default="./data/calibration_frames",
+                        help="Folder with the frames or a video file. The flicker is only meaningful for a sequence "
+                             "of consecutive frames, e.g. a short recording of yourself")
+    parser.add_argument("--max-frames", default=60, type=int, help="Number of frames to use")
+    parser.add_argument("-c", "--configs", nargs="+", type=parse_config,
+                        default=[parse_config(text) for text in ("torch:fp32:0.4:25", "torch:fp32:0.55:25",
+                                                                 "torch:fp32:0.7:25", "torch:int8:0.7:25",
+                                                                 "onnx:fp32:0.7:25", "onnx:int8:0.7:25")],
+                        help="Configurations as backend:precision:scale_factor:noise_threshold")
+    parser.add_argument("-r", "--reference", default="torch:fp32:1.0:0", type=parse_config,
+                        help="Configuration the others are compared with")
+    parser.add_argument("--score-size", default=360, type=int,
+                        help="Short side the outputs are scored at, bounds the cost of the Vgg16 scores")
+    parser.add_argument("--vgg-weights", default=None,
+                        help="Local copy of the torchvision vgg16 weights, otherwise they are downloaded")
+    parser.add_argument("-t", "--threads", default=None, type=int, help="Number of torch threads")
+    return parser.parse_args()
+
+
+def load_frames(path, max_frames):
+    frames = []
+    if os.path.isdir(path):
+        for file_name in sorted(os.listdir(path)):
+            frame = cv2.imread(os.path.join(path, file_name))
+            if frame is not None:
+                frames.append(frame)
+            if len(frames) == max_frames:
+                break
+    else:
+        capture = cv2.VideoCapture(path)
+        while len(frames) < max_frames:
+            is_read, frame = capture.read()
+            if not is_read:
+                break
+            frames.append(frame)
+        capture.release()
+    if len(frames) < 2:
+        raise Exception("need at least two frames in " + path)
+    return frames
+
+
+def run_config(model_path, config, frames):
+    """the outputs at the size of the frames and the seconds every frame took, with the steps of the fakecam"""
+    if config.precision == "int8":
+        int8_path = model_cache_path(model_path, INT8_ENDINGS.get(config.backend, ".int8"))
+        if not os.path.isfile(int8_path):
+            raise Exception("no int8 model {}, create it with quantize_models.py".format(int8_path))
+    styler = create_style_transfer(config.backend, model_path, precision=config.precision)
+    geometry = FrameGeometry(frames[0].shape[1::-1], config.scale_factor)
+    last_frame = None
+    outputs, latencies = [], []
+    styler.stylize(geometry.to_model_input(frames[0]))  # warm up
+    for frame in frames:
+        t0 = time.perf_counter()
+        model_input = geometry.to_model_input(frame)
+        # the noise suppression of FakeCam._supress_noise
+        if last_frame is not None:
+            delta = cv2.absdiff(last_frame, model_input) <= config.noise_epsilon
+            model_input[delta] = last_frame[delta]
+        last_frame = model_input.copy()
+        output = cv2.resize(styler.stylize(model_input), frame.shape[1::-1])
+        latencies.append(time.perf_counter() - t0)
+        outputs.append(output)
+    return outputs, latencies
+
+
+def ssim(frame, reference):
+    """mean structural similarity of the gray values of two frames"""
+    x = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).astype(np.float64)
+    y = cv2.cvtColor(reference, cv2.COLOR_BGR2GRAY).astype(np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    def blur(image):
+        return cv2.GaussianBlur(image, (11, 11), 1.5)
+
+    mean_x, mean_y = blur(x), blur(y)
+    var_x = blur(x * x) - mean_x ** 2
+    var_y = blur(y * y) - mean_y ** 2
+    covariance = blur(x * y) - mean_x * mean_y
+    return (((2 * mean_x * mean_y + c1) * (2 * covariance + c2)) /
+            ((mean_x ** 2 + mean_y ** 2 + c1) * (var_x + var_y + c2))).mean()
+
+
+def flicker(outputs):
+    """mean absolute change between consecutive outputs"""
+    return np.mean([cv2.absdiff(current, previous).mean() for previous, current in zip(outputs, outputs[1:])])
+
+
+def to_tensor(frames, score_size):
+    scale = score_size / min(frames[0].shape[:2])
+    frames = [cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)[..., ::-1] for frame in frames]
+    return torch.from_numpy(np.stack(frames)).permute(0, 3, 1, 2).float()
+
+
+def score(vgg, config, outputs, latencies, reference_outputs, reference_flicker, score_size):
+    perceptual, style = [], []
+    with torch.no_grad():
+        # a few frames at a time bound the memory of the Vgg16 features
+        for start in range(0, len(outputs), 4):
+            output = to_tensor(outputs[start:start + 4], score_size)
+            reference = to_tensor(reference_outputs[start:start + 4], score_size)
+            perceptual.append(perceptual_distance(vgg, output, reference))
+            style.append(style_distance(vgg, output, reference))
+    return Result(config, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 95) * 1000,
+                  len(latencies) / sum(latencies), np.mean(perceptual), np.mean(style),
+                  np.mean([ssim(output, reference) for output, reference in zip(outputs, reference_outputs)]),
+                  # relative to the reference, below 1 is calmer than the reference
+                  flicker(outputs) / max(reference_flicker, 1e-6))
+
+
+def is_pareto_optimal(result, results):
+    for other in results:
+        if other.fps >= result.fps and other.perceptual <= result.perceptual and \
+                (other.fps > result.fps or other.perceptual < result.perceptual):
+            return False
+    return True
+
+
+def print_table(name, results):
+    print()
+    print(name)
+    print("  {:<24} {:>8} {:>8} {:>7} {:>10} {:>8} {:>6} {:>7}".format(
+        "config", "p50 ms", "p95 ms", "fps", "perceptual", "style", "ssim", "flicker"))
+    for result in sorted(results, key=lambda result: -result.fps):
+        print("{} {:<24} {:>8.1f} {:>8.1f} {:>7.1f} {:>10.4f} {:>8.4f} {:>6.3f} {:>7.2f}".format(
+            "*" if is_pareto_optimal(result, results) else " ", ":".join(str(value) for value in result.config),
+            result.latency_p50, result.latency_p95, result.fps, result.perceptual, result.style, result.ssim,
+            result.flicker))
+
+
+def main():
+    args = parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    frames = load_frames(args.frames, args.max_frames)
+    vgg = Vgg16(requires_grad=False, weights_path=args.vgg_weights).eval()
+    print("{} frames of {}x{}".format(len(frames), frames[0].shape[1], frames[0].shape[0]))
+
+    for model_path in FakeCam._get_list_of_all_models(args.style_model_dir, [".pth", ".model"]):
+        reference_outputs, _ = run_config(model_path, args.reference, frames)
+        reference_flicker = flicker(reference_outputs)
+        results = []
+        for config in args.configs:
+            try:
+                outputs, latencies = run_config(model_path, config, frames)
+            except Exception as e:
+                # e.g. a missing runtime or no int8 model yet
+                print("skipping", ":".join(str(value) for value in config), e)
+                continue
+            results.append(score(vgg, config, outputs, latencies, reference_outputs, reference_flicker,
+                                 args.score_size))
+        print_table(os.path.relpath(model_path, args.style_model_dir), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
 import os
 import threading
 import time
+from collections import deque, namedtuple
 
 import cv2
 import numpy as np
 
 from akvcam import AkvCameraWriter
+from geometry import FrameGeometry
+from metrics import metrics
+from placement import placement
+from propagation import FlowPropagator
 from realcam import RealCam
-from style_transfer.neural_style import StyleTransfer
+from roi import RoiStylizer
+from tile_cache import TileCache
+from tracing import tracer
+from style_transfer.backends import STYLE_IMAGE_ENDINGS, create_style_transfer
+from style_transfer.filters import FILTER_STYLE_ENDINGS, FilterStyleTransfer, is_filter_style
+from style_transfer.style_pack import ENTRY_SEPARATOR, PACK_ENDING, get_pack_entries, is_pack_entry, split_pack_entry
+
+# Everything a frame is processed with. Commands never modify it but swap in a new snapshot,
+# so the processing loop reads one consistent set of values per frame without any locking.
+FrameParams = namedtuple("FrameParams", ["is_styling", "scale_factor", "noise_epsilon", "style_number",
+                                         "style_requested_at", "is_roi_styling", "keyframe_interval",
+                                         "is_tile_caching", "is_guided_upsampling", "style_mix"])
 
 
 class FakeCam:
@@ -22,26 +38,84 @@ class FakeCam:
             akvcam_path: str,
             style_model_dir: str,
             noise_suppressing_factor: float,
+            style_debounce: float = 0.3,
+            backend: str = "tensorrt",
+            device: str = None,
+            precision: str = "fp32",
+            is_styling: bool = True,
+            is_roi_styling: bool = False,
+            keyframe_interval: int = 1,
+            is_tile_caching: bool = False,
+            tile_size: int = None,
+            is_guided_upsampling: bool = False,
+            adain_decoder: str = None,
+            vgg_weights: str = None,
+            num_threads: int = None,
+            latency_budget_ms: float = None,
     ) -> None:
         self.check_webcam_existing(webcam_path)
         self.check_webcam_existing(akvcam_path)
-        self.scale_factor = scale_factor
         self.real_cam = RealCam(webcam_path, width, height, fps, codec)
         # In case the real webcam does not support the requested mode.
         self.width = self.real_cam.get_frame_width()
         self.height = self.real_cam.get_frame_height()
         self.fake_cam_writer = AkvCameraWriter(akvcam_path, self.width, self.height)
-        self.style_number = 0
+        # every stage drops frames that are older than this instead of spending time on them
+        self.latency_budget = None if latency_budget_ms is None else latency_budget_ms / 1000
+        self.real_cam.latency_budget = self.latency_budget
+        self.fake_cam_writer.latency_budget = self.latency_budget
         self.model_dir = style_model_dir
-        self.styler_lock = threading.Lock()
+        if backend == "adain":
+            model_endings = STYLE_IMAGE_ENDINGS
+        else:
+            model_endings = [".index", ".pth", ".model"]
+        # luts and filters need no neural network, they are listed with the models of every backend
+        self.model_paths = self._get_list_of_all_models(self.model_dir, model_endings + FILTER_STYLE_ENDINGS)
+        if len(self.model_paths) == 0:
+            raise Exception("no style models found in " + self.model_dir)
+        self.params_lock = threading.RLock()
+        self.params = FrameParams(
+            is_styling=is_styling,
+            scale_factor=scale_factor,
+            noise_epsilon=noise_suppressing_factor,
+            style_number=0,
+            style_requested_at=0.0,
+            is_roi_styling=is_roi_styling,
+            keyframe_interval=keyframe_interval,
+            is_tile_caching=is_tile_caching,
+            is_guided_upsampling=is_guided_upsampling,
+            # ((style number, weight), ...) of the styles blended into one model, None for a single style
+            style_mix=None,
+        )
+        # a requested style is only loaded once the selection did not change for this many seconds
+        self.style_debounce = style_debounce
+        self.status_listeners = []
         self.is_stop = False
+        # number of the style that is loaded into the styler, only touched by the processing loop
+        self.style_number = 0
+        self.style_mix = None
+        self.backend = backend
+        self.device = device
+        self.precision = precision
+        self.adain_decoder = adain_decoder
+        self.vgg_weights = vgg_weights
+        self.num_threads = num_threads
+        # tiled inference bounds the memory, so the model input does not need to be limited to 720p then
+        self.tile_size = tile_size
+        # the styler and its runtime are only loaded once styling is activated,
+        # styler is the one of the current style, the neural one is only created once a neural style is used
         self.styler = None
-        self.set_style_number(self.style_number)
-        self.is_styling = True
-        self.optimize_models()
+        self.neural_styler = None
+        self.filter_styler = None
+        if is_styling:
+            self._create_styler()
         self.current_fps = 0
         self.last_frame = None
-        self.noise_epsilon = noise_suppressing_factor
+        self.geometry = None
+        # the face detector is only loaded once roi styling is activated
+        self.roi_stylizer = None
+        self.propagator = None
+        self.tile_cache = None
 
     @staticmethod
     def check_webcam_existing(path):
@@ -50,58 +124,254 @@ class FakeCam:
             print(error)
             raise Exception(error)
 
-    def put_frame(self, frame):
-        self.fake_cam_writer.schedule_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    def put_frame(self, frame, guide=None, timestamp=None):
+        # includes the wait for the writer to take the previous frame
+        with tracer.span("put_frame"):
+            self.fake_cam_writer.schedule_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), guide, timestamp)
+
+    def add_status_listener(self, callback):
+        """callback is called with a dict for every status event, possibly from any thread"""
+        self.status_listeners.append(callback)
+
+    def _emit_status(self, event, **data):
+        message = {"event": event, **data}
+        for callback in self.status_listeners:
+            callback(message)
+
+    def get_status(self):
+        params = self.params
+        return {
+            **params._asdict(),
+            "style_name": self.get_style_names()[params.style_number],
+            "loaded_style_number": self.style_number,
+            "fps": self.current_fps,
+            "metrics": metrics.snapshot(),
+        }
+
+    def get_style_names(self):
+        names = []
+        for path in self.model_paths:
+            if is_pack_entry(path):
+                pack_path, name = split_pack_entry(path)
+                if os.path.samefile(pack_path, self.model_dir):
+                    names.append(name)
+                else:
+                    names.append(os.path.relpath(pack_path, self.model_dir) + ENTRY_SEPARATOR + name)
+            else:
+                names.append(os.path.relpath(path, self.model_dir))
+        return names
+
+    def _swap_params(self, **changes):
+        with self.params_lock:
+            self.params = self.params._replace(**changes)
+            params = self.params
+        self._emit_status("params", **params._asdict())
+        return params
 
     def stop(self):
-        with self.styler_lock:
-            self.is_stop = True
+        self.is_stop = True
+        return True
 
     def run(self):
+        placement.apply("inference")
         self.real_cam.start()
         t0 = time.monotonic()
         print_fps_period = 5.0
         frame_count = 0
+        # seconds between consecutive output frames, their spread is the jitter
+        frame_times = deque(maxlen=1000)
+        last_frame_at = None
         while not self.is_stop:
-            current_frame = self.real_cam.read()
-            if current_frame is None:
+            wait_start = time.perf_counter_ns()
+            captured = self.real_cam.read_next()
+            if captured is None:
                 # print("frame none")
-                time.sleep(0.1)
                 continue
+            frame_start = time.perf_counter_ns()
+            tracer.add("wait_frame", wait_start, frame_start, {"frame": captured.index})
 
-            with self.styler_lock:
-                current_frame = cv2.resize(current_frame, (0, 0), fx=self.scale_factor, fy=self.scale_factor)
-                if self.is_styling:
-                    current_frame = self._supress_noise(current_frame)
-                    try:
-                        current_frame = self.styler.stylize(current_frame)
-                    except Exception as e:
-                        print("error during style transfer", e)
-                        pass
-            self.put_frame(current_frame)
+            # commands only take effect between frames
+            params = self.params
+            if params.style_number != self.style_number and \
+                    time.monotonic() - params.style_requested_at >= self.style_debounce:
+                with tracer.span("load_style"):
+                    self._load_style(params.style_number)
+            if params.style_mix != self.style_mix and self.styler is not None:
+                with tracer.span("load_style_mix"):
+                    self._load_style_mix(params.style_mix, params.style_number)
+            if self.latency_budget is not None and time.monotonic() - captured.timestamp > self.latency_budget:
+                metrics.increment("dropped_frames")
+                metrics.increment("dropped_frames_processing")
+                # a drop often follows a slow style load, the trace has to show both
+                tracer.end_frame(frame_start, captured.index, dropped=True)
+                continue
+
+            if params.is_styling:
+                self._put_styled_frame(captured, params)
+            else:
+                self._put_passthrough_frame(captured)
+            tracer.end_frame(frame_start, captured.index)
+            frame_at = time.perf_counter()
+            if last_frame_at is not None:
+                frame_times.append(frame_at - last_frame_at)
+            last_frame_at = frame_at
             frame_count += 1
             td = time.monotonic() - t0
             #print(td)
             if td > print_fps_period:
                 self.current_fps = frame_count / td
+                if len(frame_times) > 0:
+                    p50, p99 = np.percentile(frame_times, [50, 99]) * 1000
+                    metrics.set("frame_time_p50_ms", round(p50, 2))
+                    metrics.set("frame_time_p99_ms", round(p99, 2))
+                    metrics.set("frame_jitter_ms", round(p99 - p50, 2))
                 print("\r (FPS: {:6.2f}) Waiting for input: ".format(self.current_fps), end=" ")
+                self._emit_status("fps", fps=self.current_fps, metrics=metrics.snapshot())
                 frame_count = 0
                 t0 = time.monotonic()
         print("stopped fake cam")
+        self._emit_status("stopped")
         self.real_cam.stop()
         self.fake_cam_writer.stop()
 
-    def _supress_noise(self, current_frame):
+    def _put_styled_frame(self, captured, params):
+        if self.geometry is None or self.geometry.scale_factor != params.scale_factor:
+            self.geometry = FrameGeometry((self.width, self.height), params.scale_factor,
+                                          max_short_side=None if self.tile_size else 720)
+        if params.is_guided_upsampling:
+            # the full resolution frame guides the upsampling of the stylized frame
+            self.real_cam.set_target_size(None)
+        else:
+            # the next frames are decoded close to the model input size already
+            self.real_cam.set_target_size(self.geometry.model_size)
+        self.real_cam.set_rgb(False)
+        current_frame = captured.image
+        if captured.is_rgb:
+            # captured before styling was activated
+            current_frame = cv2.cvtColor(current_frame, cv2.COLOR_RGB2BGR)
+        guide = current_frame if params.is_guided_upsampling else None
+        with tracer.span("to_model_input"):
+            current_frame = self.geometry.to_model_input(current_frame)
+        if self.styler is None:
+            self._create_styler()
+        with tracer.span("noise_suppression"):
+            current_frame = self._supress_noise(current_frame, params.noise_epsilon)
+        t0 = time.perf_counter()
+        try:
+            with tracer.span("stylize", keyframe_interval=params.keyframe_interval):
+                if params.keyframe_interval > 1:
+                    if self.propagator is None:
+                        self.propagator = FlowPropagator()
+                    # the frames between keyframes are warped, a new style or mode needs a new keyframe
+                    context = (self.style_number, self.style_mix, params.is_roi_styling, params.is_tile_caching)
+                    current_frame = self.propagator.stylize(lambda frame: self._stylize(frame, params),
+                                                            current_frame, params.keyframe_interval, context)
+                else:
+                    current_frame = self._stylize(current_frame, params)
+        except Exception as e:
+            print("error during style transfer", e)
+            pass
+        metrics.set("stylize_ms", round((time.perf_counter() - t0) * 1000, 2))
+        self.put_frame(current_frame, guide, captured.timestamp)
+
+    def _stylize(self, frame, params):
+        with tracer.span("inference"):
+            return self._stylize_frame(frame, params)
+
+    def _stylize_frame(self, frame, params):
+        if params.is_roi_styling:
+            if self.roi_stylizer is None:
+                self.roi_stylizer = RoiStylizer()
+            return self.roi_stylizer.stylize(self.styler, frame)
+        if params.is_tile_caching:
+            if self.tile_cache is None:
+                self.tile_cache = TileCache()
+            return self.tile_cache.stylize(self.styler, frame, (self.style_number, self.style_mix))
+        return self.styler.stylize(frame)
+
+    def _put_passthrough_frame(self, captured):
+        # full resolution frames are decoded right into the RGB order of the output device
+        # and written as they are, the only processing is the unavoidable decoding
+        self.real_cam.set_target_size(None)
+        self.real_cam.set_rgb(True)
+        current_frame = captured.image
+        if not captured.is_rgb:
+            current_frame = cv2.cvtColor(current_frame, cv2.COLOR_BGR2RGB)
+        with tracer.span("put_frame"):
+            self.fake_cam_writer.schedule_frame(current_frame, timestamp=captured.timestamp)
+
+    def _create_styler(self):
+        self.styler = self._get_styler(self.model_paths[self.style_number])
+        print("model changed to:", self.model_paths[self.style_number])
+
+    def _get_styler(self, model_path, is_cancelled=None):
+        """the styler with model_path loaded, filter styles do not need the neural network runtime"""
+        if is_filter_style(model_path):
+            if self.filter_styler is None:
+                self.filter_styler = FilterStyleTransfer()
+            self.filter_styler.load_model(model_path)
+            return self.filter_styler
+        if self.neural_styler is None:
+            self.neural_styler = create_style_transfer(self.backend, model_path, device=self.device,
+                                                       precision=self.precision, tile_size=self.tile_size,
+                                                       adain_decoder=self.adain_decoder,
+                                                       vgg_weights=self.vgg_weights, num_threads=self.num_threads)
+            self.optimize_models()
+        else:
+            self.neural_styler.load_model(model_path, is_cancelled=is_cancelled)
+        return self.neural_styler
+
+    def _load_style(self, number):
+        model_path = self.model_paths[number]
+        if self.styler is not None:
+            # building an engine for a not yet optimized model is given up as soon as another style is selected
+            self.styler = self._get_styler(model_path, is_cancelled=lambda: self.params.style_number != number)
+        self.style_number = number
+        print("model changed to:", model_path)
+        self._emit_status("style", style_number=number, style_name=self.get_style_names()[number])
+
+    def _load_style_mix(self, style_mix, style_number):
+        if style_mix is None:
+            # back to the single style, unless another style is going to be loaded anyway
+            if style_number == self.style_number:
+                self.styler = self._get_styler(self.model_paths[self.style_number])
+        else:
+            numbers, weights = zip(*style_mix)
+            if self.styler is self.filter_styler:
+                # mixes consist of neural styles only, the current style is a filter though
+                self.styler = self._get_styler(self.model_paths[numbers[0]])
+            if not hasattr(self.styler, "set_style_mix"):
+                print("styles can only be mixed with the torch backend")
+            else:
+                try:
+                    self.styler.set_style_mix([self.model_paths[number] for number in numbers], weights)
+                except ValueError as e:
+                    print(e)
+        self.style_mix = style_mix
+        self._emit_status("style_mix", style_mix=style_mix)
+
+    def _supress_noise(self, current_frame, noise_epsilon):
         if self.last_frame is not None and self.last_frame.shape == current_frame.shape:
-            delta = np.abs(self.last_frame - current_frame) <= self.noise_epsilon
+            # absdiff, the difference of uint8 frames would wrap around
+            delta = cv2.absdiff(self.last_frame, current_frame) <= noise_epsilon
             current_frame[delta] = self.last_frame[delta]
-        self.last_frame = current_frame
+            np.copyto(self.last_frame, current_frame)
+        else:
+            # current_frame is the reused input buffer of the geometry
+            self.last_frame = current_frame.copy()
         return current_frame
 
-    def _get_list_of_all_models(self, model_dir, file_endings=[".index", ".pth", ".model"]):
+    @staticmethod
+    def _get_list_of_all_models(model_dir, file_endings=[".index", ".pth", ".model"]):
+        """model_dir is a directory or a style pack, the styles of packs are listed as <pack path>::<style name>"""
+        if os.path.isfile(model_dir):
+            return get_pack_entries(model_dir)
         list_of_paths = []
         for dir_path, dir_name, file_names in os.walk(model_dir):
             for file_name in file_names:
+                if file_name.endswith(PACK_ENDING):
+                    list_of_paths.extend(get_pack_entries(os.path.join(dir_path, file_name)))
+                    continue
                 for file_ending in file_endings:
                     if file_name.endswith(file_ending):
                         list_of_paths.append(os.path.join(dir_path, file_name))
@@ -111,82 +381,152 @@ class FakeCam:
         list_of_paths.sort()
         return list_of_paths
 
-    def add_to_scale_factor(self, addend=0.1):
-        proposed_scale_factor = round(self.scale_factor + addend, 1)
-        if proposed_scale_factor <= 0:
+    def set_scale_factor(self, scale_factor):
+        scale_factor = round(scale_factor, 2)
+        if scale_factor <= 0:
             print("scale factor cannot be smaller than 0")
-        # elif self.scale_factor+addend > 2.0:
+            return False
+        # elif scale_factor > 2.0:
         #     print("a scale factor larger than 2.0")
-        else:
-            with self.styler_lock:
-                self.scale_factor = proposed_scale_factor
-                print("new scale factor is: ", self.scale_factor)
+        self._swap_params(scale_factor=scale_factor)
+        print("new scale factor is: ", scale_factor)
+        return True
 
-    def add_to_noise_factor(self, addend=5):
-        proposed_noise_factor = round(self.noise_epsilon + addend, 1)
-        if proposed_noise_factor <= 0:
+    def add_to_scale_factor(self, addend=0.1):
+        with self.params_lock:
+            return self.set_scale_factor(round(self.params.scale_factor + addend, 1))
+
+    def set_noise_factor(self, noise_factor):
+        noise_factor = round(noise_factor, 1)
+        if noise_factor <= 0:
             print("noise factor cannot be smaller than 0")
-        else:
-            with self.styler_lock:
-                self.noise_epsilon = proposed_noise_factor
-                print("new noise factor is: ", self.noise_epsilon)
+            return False
+        self._swap_params(noise_epsilon=noise_factor)
+        print("new noise factor is: ", noise_factor)
+        return True
+
+    def add_to_noise_factor(self, addend=5):
+        with self.params_lock:
+            return self.set_noise_factor(self.params.noise_epsilon + addend)
 
     def set_next_style(self):
-        model_paths = self._get_list_of_all_models(self.model_dir)
-        number = self.style_number
-        if self.style_number + 1 > len(model_paths) - 1:
-            number = 0
-        else:
-            number += 1
-        self.set_style_number(number, model_paths)
+        with self.params_lock:
+            return self.set_style_number((self.params.style_number + 1) % len(self.model_paths))
 
     def set_previous_style(self):
-        model_paths = self._get_list_of_all_models(self.model_dir)
-        number = self.style_number
-        if self.style_number - 1 == -1:
-            number = len(model_paths) - 1
-        else:
-            number -= 1
-        self.set_style_number(number, model_paths)
+        with self.params_lock:
+            return self.set_style_number((self.params.style_number - 1) % len(self.model_paths))
+
+    def get_style_number(self, name):
+        """name is either the path relative to the model dir or the file name with or without ending,
+        for styles in a pack also the style name. Returns None if there is no such style"""
+        for number, style_name in enumerate(self.get_style_names()):
+            file_name = os.path.basename(style_name.split(ENTRY_SEPARATOR)[-1])
+            if name in (style_name, file_name, os.path.splitext(file_name)[0]):
+                return number
+        return None
+
+    def set_style_by_name(self, name):
+        number = self.get_style_number(name)
+        if number is None:
+            print("model with name {} does not exist".format(name))
+            return False
+        return self.set_style_number(number)
+
+    def set_style_mix(self, numbers, weights):
+        """blends the weights of the styles into one model, with the torch backend only.
+        The weights are normalized to sum up to 1, no numbers end the mix"""
+        if len(numbers) == 0:
+            self._swap_params(style_mix=None)
+            return True
+        if len(numbers) != len(weights) or min(weights) < 0 or sum(weights) <= 0:
+            print("a style mix needs one non negative weight per style")
+            return False
+        for number in numbers:
+            if not -1 < number < len(self.model_paths):
+                print("model with number {} does not exist".format(number))
+                return False
+            if is_filter_style(self.model_paths[number]):
+                print("filter style {} can not be mixed".format(self.model_paths[number]))
+                return False
+        total = sum(weights)
+        self._swap_params(style_mix=tuple((number, weight / total) for number, weight in zip(numbers, weights)))
+        return True
+
+    def set_style_fade(self, number, value):
+        """mixes the current style with value parts of another one, e.g. for a slider"""
+        with self.params_lock:
+            return self.set_style_mix([self.params.style_number, number], [1 - value, value])
 
     def optimize_models(self):
-        print("-" * 50)
-        print("optimizing models for your graphics card. This might take several minutes for the first time.")
-        print("-" * 50)
-        model_paths = self._get_list_of_all_models(self.model_dir)
-        for model_path in model_paths:
-            self.styler.optimize_model(model_path)
-
-    def set_style_number(self, number, model_paths=None):
-        if model_paths is None:
-            model_paths = self._get_list_of_all_models(self.model_dir)
-        # if self.style_number == number:
-        #     print("style already set")
-        #     return
-        if number < len(model_paths) and number > -1:
-            model_path = self._get_list_of_all_models(self.model_dir)[number]
-            try:
-                with self.styler_lock:
-                    if self.styler is None:
-                        self.styler = StyleTransfer(model_path)
-                    else:
-                        self.styler.load_model(model_path)
-                self.style_number = number
-                print("model changed to:", model_path)
-            except Exception as e:
-                # print("style model could not be changed".format(number), e)
-                raise e
+        if self.backend == "tensorrt":
+            print("-" * 50)
+            print("optimizing models for your graphics card. This might take several minutes for the first time.")
+            print("-" * 50)
+        for model_path in self.model_paths:
+            if not is_filter_style(model_path):
+                self.neural_styler.optimize_model(model_path)
+
+    def set_style_number(self, number):
+        """the style is loaded by the processing loop once no other style was requested for style_debounce seconds"""
+        if number < len(self.model_paths) and number > -1:
+            self._swap_params(style_number=number, style_requested_at=time.monotonic(), style_mix=None)
+            return True
         else:
             print("model with number {} does not exist".format(number))
+            return False
+
+    def set_is_styling(self, is_styling):
+        self._swap_params(is_styling=is_styling)
+        if is_styling:
+            print("styling activated")
+        else:
+            print("styling deactivated")
+        return True
 
     def switch_is_styling(self):
-        with self.styler_lock:
-            if not self.is_styling:
-                self.is_styling = True
-                print("styling activated")
-            else:
-                self.is_styling = False
-                print("styling deactivated")
+        with self.params_lock:
+            return self.set_is_styling(not self.params.is_styling)
+
+    def set_is_roi_styling(self, is_roi_styling):
+        """stylizes the region around a detected face sharply and the rest of the frame at a lower resolution"""
+        self._swap_params(is_roi_styling=is_roi_styling)
+        if is_roi_styling:
+            print("roi styling activated")
+        else:
+            print("roi styling deactivated")
+        return True
+
+    def switch_is_roi_styling(self):
+        with self.params_lock:
+            return self.set_is_roi_styling(not self.params.is_roi_styling)
+
+    def set_is_tile_caching(self, is_tile_caching):
+        """reuses the stylized tiles of the static background, the tile cache hit rate is reported in the metrics"""
+        self._swap_params(is_tile_caching=is_tile_caching)
+        if is_tile_caching:
+            print("tile caching activated")
+        else:
+            print("tile caching deactivated")
+        return True
+
+    def set_is_guided_upsampling(self, is_guided_upsampling):
+        """upsamples the stylized frame with the camera frame as guide, which keeps edges sharp at low scale factors"""
+        self._swap_params(is_guided_upsampling=is_guided_upsampling)
+        if is_guided_upsampling:
+            print("guided upsampling activated")
+        else:
+            print("guided upsampling deactivated")
+        return True
+
+    def set_keyframe_interval(self, keyframe_interval):
+        """only every keyframe_interval-th frame is stylized, the frames in between are warped with optical flow"""
+        if keyframe_interval < 1:
+            print("keyframe interval cannot be smaller than 1")
+            return False
+        self._swap_params(keyframe_interval=keyframe_interval)
+        print("new keyframe interval is: ", keyframe_interval)
+        return True
 
     # speed test style transfer:
     # gpu pytorch  11.6
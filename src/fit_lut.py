@@ -0,0 +1,118 @@
+import os
+from argparse import ArgumentParser
+
+import cv2
+import numpy as np
+import torch
+
+from fakecam import FakeCam
+from geometry import FrameGeometry
+from style_transfer.filters import LutStyle, write_cube
+from style_transfer.style_pack import is_pack_entry, split_pack_entry
+from style_transfer.transformer_net import InferenceTransformerNet
+from style_transfer.utils import frame_to_input, load_style_state_dict, output_to_frame
+
+
+def parse_args():
+    parser = ArgumentParser(description="Fits a 3D lut to the colors of every style model, a cheap .cube style \
+                            for weak machines that keeps the palette of the style but none of its textures. \
+                            The luts are written next to the models as <style>.lut.cube.")
+    parser.add_argument("-s", "--style-model-dir", default="./data/style_transfer_models_bu",
+                        help="Folder which (subfolders) contains saved style transfer networks, or a style pack")
+    parser.add_argument("-f", "--frames", default="./data/calibration_frames",
+                        help="Folder with the frames the styles are applied to, see quantize_models.py -r")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="Folder for the luts, defaults to the folder of each model")
+    parser.add_argument("-S", "--scale-factor", default=0.5, type=float,
+                        help="Scale factor of the frames sent to the neural network")
+    parser.add_argument("--size", default=33, type=int, help="Number of lut entries per channel")
+    return parser.parse_args()
+
+
+def load_frames(frame_dir, scale_factor):
+    frames = []
+    for file_name in sorted(os.listdir(frame_dir)):
+        frame = cv2.imread(os.path.join(frame_dir, file_name))
+        if frame is None:
+            continue
+        # to_model_input reuses its buffer
+        frames.append(FrameGeometry(frame.shape[1::-1], scale_factor).to_model_input(frame).copy())
+    if len(frames) == 0:
+        raise Exception("no frames found in " + frame_dir)
+    return frames
+
+
+def neighbour_sum(array):
+    """sum of the 6 direct neighbours of every lut entry, entries outside the lut count as 0"""
+    padded = np.pad(array, [(1, 1)] * 3 + [(0, 0)] * (array.ndim - 3))
+    total = np.zeros_like(array)
+    for axis in range(3):
+        for start in (0, 2):
+            index = [slice(1, -1)] * 3
+            index[axis] = slice(start, start + array.shape[axis])
+            total += padded[tuple(index)]
+    return total
+
+
+def fit_lut(model, frames, size):
+    """mean styled color per lut entry, colors that do not occur in the frames are filled from their neighbours"""
+    sums = np.zeros((size ** 3, 3))
+    counts = np.zeros(size ** 3)
+    styled_frames = []
+    for frame in frames:
+        with torch.no_grad():
+            styled = output_to_frame(model(torch.from_numpy(frame_to_input(frame)))[0].numpy())
+        if styled.shape != frame.shape:
+            styled = cv2.resize(styled, frame.shape[1::-1])
+        styled_frames.append(styled)
+        bins = np.rint(frame.reshape(-1, 3) / 255 * (size - 1)).astype(np.int64)
+        # the first lut index is blue, its values are RGB
+        index = (bins[:, 0] * size + bins[:, 1]) * size + bins[:, 2]
+        counts += np.bincount(index, minlength=size ** 3)
+        for channel in range(3):
+            sums[:, channel] += np.bincount(index, styled.reshape(-1, 3)[:, 2 - channel], minlength=size ** 3)
+    filled = (counts > 0).reshape(size, size, size)
+    table = (sums / np.maximum(counts, 1)[:, np.newaxis] / 255).reshape(size, size, size, 3)
+    # every pass fills the entries next to filled ones, after 3 * size passes the whole lut is reached
+    for _ in range(3 * size):
+        if filled.all():
+            break
+        neighbour_count = neighbour_sum(filled.astype(np.float64))
+        neighbour_mean = neighbour_sum(table * filled[..., np.newaxis]) / np.maximum(neighbour_count, 1)[
+            ..., np.newaxis]
+        new = ~filled & (neighbour_count > 0)
+        table[new] = neighbour_mean[new]
+        filled |= new
+    return table, (counts > 0).mean(), styled_frames
+
+
+def get_lut_path(model_path, output_dir):
+    if is_pack_entry(model_path):
+        pack_path, name = split_pack_entry(model_path)
+        directory, name = os.path.dirname(pack_path), name.replace("/", "_")
+    else:
+        directory, name = os.path.split(os.path.splitext(model_path)[0])
+    return os.path.join(output_dir or directory, name + ".lut.cube")
+
+
+def main():
+    args = parse_args()
+    frames = load_frames(args.frames, args.scale_factor)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    print("{:<40} {:>8} {:>10}".format("style", "covered", "difference"))
+    for model_path in FakeCam._get_list_of_all_models(args.style_model_dir, [".pth", ".model"]):
+        model = InferenceTransformerNet.from_state_dict(load_style_state_dict(model_path)).eval()
+        table, coverage, styled_frames = fit_lut(model, frames, args.size)
+        lut_path = get_lut_path(model_path, args.output_dir)
+        write_cube(lut_path, table, title=os.path.basename(lut_path))
+        # mean absolute difference to the neural style, the part of the style a lut can not reproduce
+        lut = LutStyle(lut_path)
+        difference = np.mean([np.abs(lut.apply(frame).astype(np.float32) - styled).mean()
+                              for frame, styled in zip(frames, styled_frames)])
+        print("{:<40} {:>7.1f}% {:>10.2f}".format(os.path.basename(lut_path), coverage * 100, difference))
+
+
+if __name__ == "__main__":
+    main()
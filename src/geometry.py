@@ -0,0 +1,61 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from style_transfer.utils import STRIDE
+
+
+class FrameGeometry:
+    """Maps captured frames to the model input size in a single resize.
+
+    The model input is the frame scaled by scale_factor, limited to max_short_side if given and with both sides
+    rounded to a multiple of the network stride. Rounding scales width and height very slightly differently
+    instead of cropping, so the resize of the stylized image to output_size done by the AkvCameraWriter is the
+    exact inverse transform and the output does not drift against the captured frame.
+    """
+
+    def __init__(self, output_size, scale_factor, max_short_side=720):
+        self.output_size = output_size
+        self.scale_factor = scale_factor
+        width, height = output_size
+        scale = scale_factor
+        if max_short_side is not None and min(width, height) * scale > max_short_side:
+            scale = max_short_side / min(width, height)
+        self.model_size = (self.align(width * scale), self.align(height * scale))
+        # frames are resized into this buffer, it is overwritten by the next frame
+        self.input_buffer = np.empty((self.model_size[1], self.model_size[0], 3), dtype=np.uint8)
+
+    @staticmethod
+    def align(length):
+        """length rounded to a multiple of the stride, at least the stride"""
+        return max(STRIDE, int(round(length / STRIDE)) * STRIDE)
+
+    def to_model_input(self, frame):
+        if frame.shape[1::-1] == self.model_size:
+            np.copyto(self.input_buffer, frame)
+            return self.input_buffer
+        return cv2.resize(frame, self.model_size, dst=self.input_buffer, interpolation=cv2.INTER_AREA)
+
+
+@lru_cache(maxsize=64)
+def blend_mask(width, height, feather, borders=(False, False, False, False)):
+    """weights for blending a region over a frame, ramping up from 0 within feather pixels of its edges.
+    Edges on the frame border are not ramped, borders tells which of left, top, right and bottom are."""
+    left, top, right, bottom = borders
+    ramp_x = _ramp(width, feather, left, right)
+    ramp_y = _ramp(height, feather, top, bottom)
+    mask = np.minimum(ramp_y[:, np.newaxis], ramp_x[np.newaxis, :])[..., np.newaxis]
+    # shared between all callers
+    mask.setflags(write=False)
+    return mask
+
+
+def _ramp(length, feather, is_start_at_border, is_end_at_border):
+    ramp = np.ones(length, dtype=np.float32)
+    edge = np.linspace(0, 1, min(feather, length // 2), dtype=np.float32)
+    if not is_start_at_border:
+        ramp[:len(edge)] = edge
+    if not is_end_at_border:
+        ramp[length - len(edge):] = np.minimum(ramp[length - len(edge):], edge[::-1])
+    return ramp
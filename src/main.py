@@ -1,10 +1,13 @@
 import os
-import time
 os.environ["CUDA_VISIBLE_DEVICES"] = "0"
 import sys
 from argparse import ArgumentParser
-import threading
+from control import ControlServer
+from autotune import choose_settings, get_cached_profile, get_profile, start_background_tuning
 from fakecam import FakeCam
+from placement import THREAD_ROLES, get_auto_affinity, parse_cpu_list, parse_placement, placement
+from tracing import tracer
+from style_transfer.backends import BACKENDS, PRECISIONS
 
 
 def parse_args():
@@ -19,21 +22,128 @@ def parse_args():
                         help="Set real webcam FPS")
     parser.add_argument("-C", "--codec", default='MJPG', type=str,
                         help="Set real webcam codec")
-    parser.add_argument("-S", "--scale-factor", default=0.7, type=float,
-                        help="Scale factor of the image sent the neural network")
+    parser.add_argument("-S", "--scale-factor", default=None, type=float,
+                        help="Scale factor of the image sent the neural network. With 0.5 and below MJPG and YUYV \
+                        frames are already decoded at a reduced size, which saves CPU time. Defaults to the \
+                        autotuned one or 0.7")
     parser.add_argument("-w", "--webcam-path", default="/dev/video0",
                         help="Set real webcam path")
     parser.add_argument("-v", "--akvcam-path", default="/dev/video13",
                         help="virtual akvcam output device path")
     parser.add_argument("-s", "--style-model-dir", default="./data/style_transfer_models_bu",
-                        help="Folder which (subfolders) contains saved style transfer networks. Have to end with '.model' or '.pth'. Own styles created with https://github.com/pytorch/examples/tree/master/fast_neural_style can be used.")
+                        help="Folder which (subfolders) contains saved style transfer networks, or a style pack created with pack_styles.py. Have to end with '.model', '.pth' or '.stylepack', or be '.cube' luts or '.filter' files that need no neural network. Own styles created with https://github.com/pytorch/examples/tree/master/fast_neural_style can be used.")
     parser.add_argument("-n", "--noise-suppressing", default=25.0, type=float,
                         help="higher values reduce noise introduced by the style transfer but might lead to skewed human faces")
+    parser.add_argument("-b", "--backend", default=None, choices=BACKENDS,
+                        help="Inference backend. tensorrt needs a nvidia gpu, torch and onnx also run on the cpu. \
+                        adain applies the style images in the style model dir with a single network. Defaults to \
+                        the autotuned one or tensorrt")
+    parser.add_argument("--threads", default=None, type=int,
+                        help="Number of inference threads of the torch and onnx backends, defaults to the autotuned \
+                        number")
+    parser.add_argument("--profile", default="./data/autotune_profile.json",
+                        help="Autotune profile with the backend, thread count and scale factor for this machine, \
+                        created by autotune.py. A missing or outdated one is tuned in the background for the next \
+                        start, meanwhile the outdated one or the defaults are used. Explicitly given options take \
+                        precedence. Empty to disable")
+    parser.add_argument("--retune", action="store_true",
+                        help="tune the profile before starting, which takes minutes. Ignored with --no-styling")
+    parser.add_argument("--affinity", default=[], nargs="+",
+                        help="CPUs of the pipeline threads as role=cpus, e.g. capture=0 writer=0 inference=1-7, with \
+                        the roles {}. The inference CPUs are also used by the thread pools of the torch and onnx \
+                        backends. auto puts capture, writer and control on the last CPU and the inference on all \
+                        others".format(", ".join(THREAD_ROLES)))
+    parser.add_argument("--priority", default=[], nargs="+",
+                        help="nice values of the pipeline threads as role=nice, e.g. capture=-5 writer=-5. Values \
+                        below 0 need CAP_SYS_NICE")
+    parser.add_argument("--latency-budget-ms", default=None, type=float,
+                        help="drop frames that are older than this many milliseconds since their capture at any \
+                        stage instead of processing them, which bounds the delay when the computer is overloaded. \
+                        Has to be larger than the time a frame needs through the whole pipeline")
+    parser.add_argument("--trace", action="store_true",
+                        help="record the stages of the latest frames for the trace command of the control socket, \
+                        which writes them in the Chrome trace format")
+    parser.add_argument("--trace-deadline-ms", default=None, type=float,
+                        help="with --trace, write the trace automatically when a frame takes longer")
+    parser.add_argument("--trace-capacity", default=20000, type=int,
+                        help="number of stages kept for the trace, about 10 per frame")
+    parser.add_argument("--trace-dir", default="./traces", help="folder the traces are written to")
+    parser.add_argument("-d", "--device", default=None,
+                        help="torch device of the torch backend, e.g. cpu or cuda. Defaults to cuda if available")
+    parser.add_argument("-p", "--precision", default="fp32", choices=PRECISIONS,
+                        help="int8 uses the models quantized by quantize_models.py with the torch and onnx backends")
+    parser.add_argument("-t", "--tile-size", default=None, type=int,
+                        help="torch backend only: process the model input in overlapping tiles of this size, e.g. 512, \
+                        which bounds the memory and lifts the 720p limit of the model input")
+    parser.add_argument("--adain-decoder", default="./data/adain/decoder.pth",
+                        help="weights of the decoder of the adain backend, trained with train_style.py --adain")
+    parser.add_argument("--vgg-weights", default=None,
+                        help="local copy of the torchvision vgg16 weights, they are downloaded if not given")
+    parser.add_argument("--no-styling", action="store_true",
+                        help="start with styling deactivated, the style models are only loaded once it is activated")
+    parser.add_argument("--roi", action="store_true",
+                        help="stylize the region around your face at the full scale factor and the background at half \
+                        of it, which needs about half of the inference time")
+    parser.add_argument("-k", "--keyframe-interval", default=1, type=int,
+                        help="stylize only every k-th frame and warp the last stylized frame with optical flow to the \
+                        frames in between. Frames with large changes are always stylized. Useful without a gpu")
+    parser.add_argument("--tile-cache", action="store_true",
+                        help="only restylize the parts of the image that changed, reusing the static background. \
+                        Has no effect together with --roi")
+    parser.add_argument("-g", "--guided-upsampling", action="store_true",
+                        help="upsample the stylized image guided by the webcam image, which keeps edges sharp with \
+                        scale factors of 0.4 to 0.5")
+    parser.add_argument("--style-debounce", default=0.3, type=float,
+                        help="seconds a style selection has to stay unchanged before the style is loaded")
+    parser.add_argument("-c", "--control-socket", default="/tmp/stylecam.sock",
+                        help="unix socket accepting JSON commands and streaming status events. Empty to disable")
     return parser.parse_args()
 
 
+def apply_profile(args):
+    """fills the options that were not given with the settings of the autotune profile"""
+    if args.profile and args.backend != "adain":
+        model_paths = FakeCam._get_list_of_all_models(args.style_model_dir)
+        # tuning takes minutes, it only delays the start when explicitly asked for
+        if args.retune and not args.no_styling:
+            profile = get_profile(args.profile, model_paths, args.precision, args.width, args.height, is_retune=True)
+        else:
+            profile, is_current = get_cached_profile(args.profile, model_paths, args.precision, args.width,
+                                                     args.height)
+            if not is_current:
+                start_background_tuning(args.profile, args.style_model_dir, args.precision, args.width, args.height)
+        settings = choose_settings(profile, args.fps, args.backend) if profile is not None else None
+        if settings is not None:
+            backend, num_threads, scale_factor = settings
+            print("autotuned: backend {}, {} threads, scale factor {}".format(backend, num_threads, scale_factor))
+            args.backend = args.backend or backend
+            if args.threads is None:
+                args.threads = num_threads
+            if args.scale_factor is None:
+                args.scale_factor = scale_factor
+    if args.backend is None:
+        args.backend = "tensorrt"
+    if args.scale_factor is None:
+        args.scale_factor = 0.7
+
+
+def apply_placement(args):
+    if args.affinity == ["auto"]:
+        affinity = get_auto_affinity()
+    else:
+        affinity = parse_placement(args.affinity, parse_cpu_list)
+    placement.configure(affinity, parse_placement(args.priority, int))
+    # the main thread runs the inference, the runtimes start their thread pools from it
+    # and the autotuning measures the thread counts on its CPUs
+    placement.apply("inference")
+
+
 def main():
     args = parse_args()
+    apply_placement(args)
+    if args.trace:
+        tracer.enable(args.trace_capacity, args.trace_deadline_ms, args.trace_dir)
+    apply_profile(args)
     cam = FakeCam(
         fps=args.fps,
         width=args.width,
@@ -44,6 +154,20 @@ def main():
         akvcam_path=args.akvcam_path,
         style_model_dir=args.style_model_dir,
         noise_suppressing_factor=args.noise_suppressing,
+        style_debounce=args.style_debounce,
+        backend=args.backend,
+        device=args.device,
+        precision=args.precision,
+        is_styling=not args.no_styling,
+        is_roi_styling=args.roi,
+        keyframe_interval=args.keyframe_interval,
+        is_tile_caching=args.tile_cache,
+        tile_size=args.tile_size,
+        is_guided_upsampling=args.guided_upsampling,
+        adain_decoder=args.adain_decoder,
+        vgg_weights=args.vgg_weights,
+        num_threads=args.threads,
+        latency_budget_ms=args.latency_budget_ms,
     )
 
     print("Running...")
@@ -54,36 +178,15 @@ def main():
     print("Enter 5+BACKSPACE to increase the scale factor of the model input")
     print("Enter 6+BACKSPACE to decrease the noise suppression factor")
     print("Enter 7+BACKSPACE to increase the noise suppression factor")
+    print("Enter 8+BACKSPACE to deactivate and activate the sharper styling of your face (roi styling)")
     print("Press c+BACKSPACE to exit")
+    if args.control_socket:
+        print("Or send JSON commands such as {\"cmd\": \"next_style\"} to", args.control_socket)
 
-    def listen_for_input():
-        # t = threading.currentThread()
-        while True:
-            input_ = input()
-            if input_ == "1":
-                cam.switch_is_styling()
-            elif input_ == "2":
-                cam.set_previous_style()
-            elif input_ == "3":
-                cam.set_next_style()
-            elif input_ == "4":
-                cam.add_to_scale_factor(-0.1)
-            elif input_ == "5":
-                cam.add_to_scale_factor(0.1)
-            elif input_ == "6":
-                cam.add_to_noise_factor(-5)
-            elif input_ == "7":
-                cam.add_to_noise_factor(5)
-            elif input_ == "c":
-                cam.stop()
-            else:
-                print("input {} was not recognized".format(input_))
-            time.sleep(1)
-
-    listen_thread = threading.Thread(target=listen_for_input, daemon=True)
-    listen_thread.start()
+    control = ControlServer(cam, socket_path=args.control_socket).start()
 
     cam.run()  # loops
+    control.stop()
     print("exit 0")
     sys.exit(0)
 
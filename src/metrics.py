@@ -0,0 +1,31 @@
+import threading
+
+
+class Metrics:
+    """Counters and current values of the running cam, written by all pipeline threads.
+
+    FakeCam reports a snapshot with its status, so they show up on the control socket.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def set(self, name, value):
+        with self.lock:
+            self.values[name] = value
+
+    def get(self, name, default=None):
+        with self.lock:
+            return self.values.get(name, default)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+metrics = Metrics()
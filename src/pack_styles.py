@@ -0,0 +1,69 @@
+import os
+from argparse import ArgumentParser
+
+import torch
+
+from fakecam import FakeCam
+from style_transfer.style_pack import PACK_ENDING, open_style_pack, write_style_pack
+from style_transfer.utils import load_style_state_dict
+
+
+def parse_args():
+    parser = ArgumentParser(description="Packs style models into a single memory mapped style pack and back. \
+                            The pack can be given to main.py with -s instead of a style model folder.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack = subparsers.add_parser("pack", help="pack all style models of a folder")
+    pack.add_argument("style_model_dir", help="Folder which (subfolders) contains saved style transfer networks")
+    pack.add_argument("pack", help="path of the style pack to write, should end with " + PACK_ENDING)
+    pack.add_argument("--fp16", action="store_true",
+                      help="store the weights in half precision, which halves the size of the pack")
+    unpack = subparsers.add_parser("unpack", help="write the styles of a pack as .pth files")
+    unpack.add_argument("pack", help="path of the style pack")
+    unpack.add_argument("style_model_dir", help="folder to write the style models to")
+    listing = subparsers.add_parser("list", help="list the styles of a pack")
+    listing.add_argument("pack", help="path of the style pack")
+    return parser.parse_args()
+
+
+def pack(args):
+    state_dicts = {}
+    for model_path in FakeCam._get_list_of_all_models(args.style_model_dir):
+        # the name is the path relative to the folder without ending, e.g. subfolder/mosaic
+        name = os.path.splitext(os.path.relpath(model_path, args.style_model_dir))[0].replace(os.sep, "/")
+        state_dicts[name] = load_style_state_dict(model_path)
+        print("packing", name)
+    write_style_pack(args.pack, state_dicts, fp16=args.fp16)
+    print("wrote {} styles to {} ({:.1f} MB)".format(len(state_dicts), args.pack,
+                                                     os.path.getsize(args.pack) / 1024 ** 2))
+
+
+def unpack(args):
+    style_pack = open_style_pack(args.pack)
+    for name in style_pack.get_style_names():
+        model_path = os.path.join(args.style_model_dir, *name.split("/")) + ".pth"
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        torch.save(style_pack.get_state_dict(name), model_path)
+        print("wrote", model_path)
+
+
+def list_styles(args):
+    style_pack = open_style_pack(args.pack)
+    for name in style_pack.get_style_names():
+        arrays = style_pack.get_arrays(name)
+        size = sum(array.nbytes for array in arrays.values())
+        dtypes = sorted({array.dtype.name for array in arrays.values()})
+        print("{:<40} {:>8.2f} MB {}".format(name, size / 1024 ** 2, ",".join(dtypes)))
+
+
+def main():
+    args = parse_args()
+    if args.command == "pack":
+        pack(args)
+    elif args.command == "unpack":
+        unpack(args)
+    else:
+        list_styles(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import threading
+
+# capture: RealCam.update, writer: AkvCameraWriter.writer_thread, control: the command socket and keyboard input,
+# inference: the processing loop of FakeCam.run and the thread pools of the inference runtimes
+THREAD_ROLES = ("capture", "writer", "control", "inference")
+
+
+class ThreadPlacement:
+    """CPU affinity and nice value per role of the pipeline threads.
+
+    Every pipeline thread applies the placement of its role when it starts. Threads inherit the placement of the
+    thread that creates them, so the worker pools the inference runtimes start from the processing loop run on
+    the CPUs of the inference. Roles without a placement keep the one they inherited.
+    """
+
+    def __init__(self):
+        self.affinity = {}
+        self.priority = {}
+
+    def configure(self, affinity=None, priority=None):
+        """affinity maps roles to sets of CPUs, priority maps roles to nice values"""
+        self.affinity = dict(affinity or {})
+        self.priority = dict(priority or {})
+
+    def apply(self, role):
+        """places the calling thread"""
+        cpus = self.affinity.get(role)
+        if cpus:
+            try:
+                # pid 0 is the calling thread
+                os.sched_setaffinity(0, cpus)
+            except OSError as e:
+                print("could not pin the {} thread to the CPUs {}:".format(role, sorted(cpus)), e)
+        nice = self.priority.get(role)
+        if nice is not None:
+            try:
+                # on linux the priority of a thread id only affects this thread
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+            except OSError as e:
+                print("could not set the nice value of the {} thread to {}, values below 0 need CAP_SYS_NICE:".format(
+                    role, nice), e)
+
+
+def parse_cpu_list(text):
+    """CPU list like 0-3,6 as set"""
+    cpus = set()
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def parse_placement(values, parse_value):
+    """role=value pairs of the command line as dict"""
+    placement_values = {}
+    for value in values:
+        role, _, text = value.partition("=")
+        if role not in THREAD_ROLES:
+            raise ValueError("unknown thread role {}, available are {}".format(role, ", ".join(THREAD_ROLES)))
+        placement_values[role] = parse_value(text)
+    return placement_values
+
+
+def get_auto_affinity():
+    """the capture, writer and control threads share the last CPU, the inference gets all others"""
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        return {}
+    io_cpus = {cpus[-1]}
+    return {"capture": io_cpus, "writer": io_cpus, "control": io_cpus, "inference": set(cpus[:-1])}
+
+
+placement = ThreadPlacement()
@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+
+
+class FlowPropagator:
+    """Stylizes only keyframes and warps the last stylized keyframe to the frames in between.
+
+    The dense optical flow from each frame back to the keyframe is computed with DIS on small grayscale copies.
+    Pixels the flow cannot explain, e.g. when something appears from behind the head, are taken from the
+    previous output. Once too many pixels are occluded the frame becomes a keyframe, as does every
+    keyframe_interval-th frame.
+    """
+
+    def __init__(self, flow_width=320, occlusion_threshold=24, max_occlusion_share=0.08):
+        self.flow = cv2.DISOpticalFlow_create(cv2.DISOPTICAL_FLOW_PRESET_ULTRAFAST)
+        self.flow_width = flow_width
+        # gray value difference after warping above which a pixel counts as occluded
+        self.occlusion_threshold = occlusion_threshold
+        self.max_occlusion_share = max_occlusion_share
+        self.key_gray = None
+        self.key_styled = None
+        self.key_context = None
+        self.last_output = None
+        self.frames_since_key = 0
+        self.grids = {}
+
+    def stylize(self, stylize, frame, keyframe_interval, context=None):
+        """stylize is called with frame for keyframes. A change of context, e.g. another style, forces a keyframe"""
+        gray = self._to_gray(frame)
+        self.frames_since_key += 1
+        if self.key_styled is None or self.key_styled.shape != frame.shape or context != self.key_context or \
+                self.frames_since_key >= keyframe_interval:
+            return self._set_keyframe(stylize(frame), gray, context)
+
+        flow = self.flow.calc(gray, self.key_gray, None)
+        # pixels whose warped keyframe does not look like them are occluded or changed too much
+        small_height, small_width = gray.shape
+        warped_gray = cv2.remap(self.key_gray, self._get_grid(small_width, small_height) + flow, None,
+                                cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        occluded = cv2.absdiff(warped_gray, gray) > self.occlusion_threshold
+        if np.count_nonzero(occluded) > self.max_occlusion_share * occluded.size:
+            return self._set_keyframe(stylize(frame), gray, context)
+
+        height, width = frame.shape[:2]
+        flow = cv2.resize(flow, (width, height), interpolation=cv2.INTER_LINEAR)
+        flow *= (width / small_width, height / small_height)
+        flow += self._get_grid(width, height)
+        output = cv2.remap(self.key_styled, flow, None, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        occluded = cv2.resize(occluded.view(np.uint8), (width, height), interpolation=cv2.INTER_NEAREST)
+        np.copyto(output, self.last_output, where=occluded[..., np.newaxis].astype(bool))
+        self.last_output = output
+        return output
+
+    def _set_keyframe(self, styled, gray, context):
+        self.key_styled = styled
+        self.key_gray = gray
+        self.key_context = context
+        self.last_output = styled
+        self.frames_since_key = 0
+        return styled
+
+    def _to_gray(self, frame):
+        scale = min(1.0, self.flow_width / frame.shape[1])
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _get_grid(self, width, height):
+        """pixel coordinates, the flow is added to them to get the remap maps"""
+        if (width, height) not in self.grids:
+            x, y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+            self.grids[(width, height)] = np.dstack((x, y))
+        return self.grids[(width, height)]
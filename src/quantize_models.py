@@ -0,0 +1,171 @@
+import os
+import time
+from argparse import ArgumentParser
+
+import cv2
+import numpy as np
+import torch
+
+from fakecam import FakeCam
+from geometry import FrameGeometry
+from style_transfer.quantization import quantize_model, quantize_onnx_model
+from style_transfer.torch_style import create_fp32_model, to_channels_last
+from style_transfer.transformer_net import TransformerNet
+from style_transfer.utils import frame_to_input, load_style_state_dict, model_cache_path, perceptual_distance, \
+    save_model_to_onnx
+from style_transfer.vgg import Vgg16
+
+
+def parse_args():
+    parser = ArgumentParser(description="Creates INT8 versions of the style models for the torch and onnx backends, \
+                            calibrated on frames of your webcam, and reports their speedup and quality.")
+    parser.add_argument("-s", "--style-model-dir", default="./data/style_transfer_models_bu",
+                        help="Folder which (subfolders) contains saved style transfer networks")
+    parser.add_argument("-f", "--frames", default="./data/calibration_frames",
+                        help="Folder with the calibration frames")
+    parser.add_argument("-r", "--record", default=None,
+                        help="Webcam path to record new calibration frames from before quantizing, e.g. /dev/video0")
+    parser.add_argument("--count", default=64, type=int,
+                        help="Number of frames to record")
+    parser.add_argument("--interval", default=0.5, type=float,
+                        help="Seconds between two recorded frames, move a bit to get varied frames")
+    parser.add_argument("-W", "--width", default=1280, type=int,
+                        help="Set real webcam width for recording")
+    parser.add_argument("-H", "--height", default=720, type=int,
+                        help="Set real webcam height for recording")
+    parser.add_argument("-C", "--codec", default='MJPG', type=str,
+                        help="Set real webcam codec for recording")
+    parser.add_argument("-S", "--scale-factor", default=0.7, type=float,
+                        help="Scale factor of the image sent the neural network")
+    parser.add_argument("-b", "--backends", default="torch,onnx",
+                        help="Comma separated backends to quantize for")
+    parser.add_argument("-e", "--eval-frames", default=8, type=int,
+                        help="Number of frames kept out of the calibration to measure speed and quality")
+    parser.add_argument("-t", "--threads", default=None, type=int,
+                        help="Number of threads used for the speed measurement")
+    parser.add_argument("--max-perceptual", default=0.05, type=float,
+                        help="Perceptual difference up to which an int8 model is marked as safe to use")
+    return parser.parse_args()
+
+
+def record_frames(args):
+    from realcam import RealCam
+
+    os.makedirs(args.frames, exist_ok=True)
+    cam = RealCam(args.record, args.width, args.height, 30, args.codec).start()
+    count = 0
+    while count < args.count:
+        time.sleep(args.interval)
+        frame = cam.read()
+        if frame is None:
+            continue
+        cv2.imwrite(os.path.join(args.frames, "frame_{:04d}.png".format(count)), frame)
+        count += 1
+        print("\rrecorded {}/{} frames".format(count, args.count), end=" ")
+    print()
+    cam.stop()
+
+
+def load_frames(frame_dir, scale_factor):
+    """the frames as model inputs with the size the webcam frames would be styled with"""
+    inputs = []
+    for file_name in sorted(os.listdir(frame_dir)):
+        frame = cv2.imread(os.path.join(frame_dir, file_name))
+        if frame is None:
+            continue
+        geometry = FrameGeometry(frame.shape[1::-1], scale_factor)
+        inputs.append(frame_to_input(geometry.to_model_input(frame)))
+    return inputs
+
+
+def measure(run, inputs):
+    """seconds per frame and outputs of run for all inputs"""
+    run(inputs[0])  # warm up
+    outputs = []
+    t0 = time.perf_counter()
+    for model_input in inputs:
+        outputs.append(run(model_input))
+    return (time.perf_counter() - t0) / len(inputs), outputs
+
+
+def compare(vgg, outputs, reference_outputs):
+    """perceptual difference and psnr of outputs against the reference outputs"""
+    output = torch.from_numpy(np.clip(np.concatenate(outputs), 0, 255))
+    reference = torch.from_numpy(np.clip(np.concatenate(reference_outputs), 0, 255))
+    with torch.no_grad():
+        distance = perceptual_distance(vgg, output, reference)
+    mse = ((output - reference) ** 2).mean().item()
+    psnr = 10 * np.log10(255 ** 2 / max(mse, 1e-10))
+    return distance, psnr
+
+
+def quantize_torch(model_path, state_dict, calibration_inputs, eval_inputs):
+    # the speedup is measured against the model the torch backend runs, in its memory format
+    fp32_model = create_fp32_model(state_dict, "cpu")
+    int8_model = quantize_model(state_dict, [torch.from_numpy(x) for x in calibration_inputs])
+    torch.save(int8_model.state_dict(), model_cache_path(model_path, ".int8.pt"))
+    int8_model = int8_model.to(memory_format=torch.channels_last)
+    with torch.no_grad():
+        fp32 = measure(lambda x: fp32_model(to_channels_last(x)).numpy(), eval_inputs)
+        int8 = measure(lambda x: int8_model(to_channels_last(x)).numpy(), eval_inputs)
+    return fp32, int8
+
+
+def quantize_onnx(model_path, state_dict, calibration_inputs, eval_inputs, threads):
+    import onnxruntime
+
+    onnx_path = model_cache_path(model_path, ".onnx")
+    int8_onnx_path = model_cache_path(model_path, ".int8.onnx")
+    if not os.path.isfile(onnx_path):
+        style_model = TransformerNet()
+        style_model.load_state_dict(state_dict)
+        save_model_to_onnx(style_model, onnx_path)
+    quantize_onnx_model(onnx_path, int8_onnx_path, calibration_inputs)
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    results = []
+    for path in (onnx_path, int8_onnx_path):
+        session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        results.append(measure(lambda x: session.run(None, {"input": x})[0], eval_inputs))
+    return results
+
+
+def main():
+    args = parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    if args.record:
+        record_frames(args)
+    inputs = load_frames(args.frames, args.scale_factor)
+    if len(inputs) <= args.eval_frames:
+        raise Exception("need more than {} calibration frames in {}, record them with -r".format(
+            args.eval_frames, args.frames))
+    calibration_inputs, eval_inputs = inputs[:-args.eval_frames], inputs[-args.eval_frames:]
+    backends = args.backends.split(",")
+    vgg = Vgg16(requires_grad=False).eval()
+
+    rows = []
+    for model_path in FakeCam._get_list_of_all_models(args.style_model_dir, [".pth", ".model"]):
+        print("quantizing", model_path)
+        state_dict = load_style_state_dict(model_path)
+        for backend in backends:
+            if backend == "torch":
+                fp32, int8 = quantize_torch(model_path, state_dict, calibration_inputs, eval_inputs)
+            elif backend == "onnx":
+                fp32, int8 = quantize_onnx(model_path, state_dict, calibration_inputs, eval_inputs, args.threads)
+            else:
+                raise ValueError("quantization is only supported for the torch and onnx backends")
+            distance, psnr = compare(vgg, int8[1], fp32[1])
+            rows.append((os.path.relpath(model_path, args.style_model_dir), backend, fp32[0], int8[0], distance, psnr))
+
+    print("{:<40} {:<7} {:>9} {:>9} {:>8} {:>10} {:>8} {}".format(
+        "style", "backend", "fp32 ms", "int8 ms", "speedup", "perceptual", "psnr", "verdict"))
+    for name, backend, fp32_time, int8_time, distance, psnr in rows:
+        print("{:<40} {:<7} {:>9.1f} {:>9.1f} {:>7.2f}x {:>10.4f} {:>8.2f} {}".format(
+            name, backend, fp32_time * 1000, int8_time * 1000, fp32_time / int8_time, distance, psnr,
+            "ok" if distance <= args.max_perceptual else "check"))
+
+
+if __name__ == "__main__":
+    main()
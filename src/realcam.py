@@ -1,21 +1,134 @@
 import threading
+import time
+from collections import namedtuple
 
 import cv2
+import numpy as np
+
+from metrics import metrics
+from placement import placement
+from recovery import Backoff, reopen_with_backoff
+from tracing import tracer
+
+# image is in BGR order unless is_rgb, index counts the captured frames,
+# timestamp is the time.monotonic() seconds the frame was captured at
+CapturedFrame = namedtuple("CapturedFrame", ["image", "is_rgb", "index", "timestamp"])
+
+
+class FrameDecoder:
+    """Decodes raw MJPG or YUYV buffers directly at a reduced size.
+
+    JPEGs are decoded with libjpeg's DCT domain scaling (1/2, 1/4, 1/8) and YUYV frames are converted from a
+    subsampled view of the buffer. The decoded frame is never smaller than the requested target size,
+    so the consumer only has to do one final resize.
+    """
+    MJPG = cv2.VideoWriter_fourcc(*"MJPG")
+    YUYV = cv2.VideoWriter_fourcc(*"YUYV")
+    JPEG_FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
+
+    def __init__(self, fourcc, width, height):
+        self.fourcc = fourcc
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def supports(cls, fourcc):
+        return fourcc in (cls.MJPG, cls.YUYV)
+
+    def get_reduction(self, target_size):
+        if target_size is None:
+            return 1
+        target_width, target_height = target_size
+        for reduction in (8, 4, 2):
+            # a subsampled yuyv frame has to consist of whole macro pixels
+            if self.fourcc == self.YUYV and (self.width // reduction) % 2 != 0:
+                continue
+            if self.width // reduction >= target_width and self.height // reduction >= target_height:
+                return reduction
+        return 1
+
+    def decode(self, raw, target_size=None, rgb=False):
+        """returns a BGR (or RGB) frame or None if the buffer could not be decoded"""
+        if raw.ndim == 3 and raw.shape[2] == 3:
+            # the capture backend ignored the request for raw buffers
+            return cv2.cvtColor(raw, cv2.COLOR_BGR2RGB) if rgb else raw
+        reduction = self.get_reduction(target_size)
+        if self.fourcc == self.MJPG:
+            frame = cv2.imdecode(raw.reshape(-1), self.JPEG_FLAGS[reduction])
+            if rgb and frame is not None:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            return frame
+        return self._decode_yuyv(raw, reduction, cv2.COLOR_YUV2RGB_YUYV if rgb else cv2.COLOR_YUV2BGR_YUYV)
+
+    def _decode_yuyv(self, raw, reduction, conversion):
+        size = self.width * self.height * 2
+        raw = raw.reshape(-1)
+        if raw.size < size:
+            return None
+        # every macro pixel holds Y0 U Y1 V for two neighbouring pixels
+        macro_pixels = raw[:size].reshape(self.height, self.width // 2, 4)
+        if reduction == 1:
+            return cv2.cvtColor(macro_pixels.reshape(self.height, self.width, 2), conversion)
+        # keep the first pixel of every reduction-th macro pixel in every reduction-th row
+        # and pack two of them into a new macro pixel, so the same colour conversion can be used
+        pixels = macro_pixels[::reduction, ::reduction // 2]
+        height, width = pixels.shape[:2]
+        reduced = np.empty((height, width // 2, 4), dtype=np.uint8)
+        reduced[..., 0] = pixels[:, 0::2, 0]
+        reduced[..., 1] = pixels[:, 0::2, 1]
+        reduced[..., 2] = pixels[:, 1::2, 0]
+        reduced[..., 3] = pixels[:, 0::2, 3]
+        return cv2.cvtColor(reduced.reshape(height, width, 2), conversion)
 
 
 class RealCam:
+    # seconds without frames after which the camera is reopened, e.g. after it was unplugged
+    STALL_TIMEOUT = 2.0
+
     def __init__(self, src, frame_width, frame_height, frame_rate, codec):
-        self.cam = cv2.VideoCapture(src, cv2.CAP_V4L2)
+        self.src = src
+        self.requested_mode = (frame_width, frame_height, frame_rate, codec)
         self.stopped = False
         self.frame = None
         self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self.last_read_index = -1
+        self.current_frame = None
+        self.frame_count = 0
+        self.target_size = None
+        self.is_rgb = False
+        # seconds after their capture frames are dropped instead of processed, None keeps all
+        self.latency_budget = None
+        self._open()
+
+    def _open(self):
+        """opens the camera and negotiates the mode, the mode can differ after reopening it"""
+        frame_width, frame_height, frame_rate, codec = self.requested_mode
+        self.cam = cv2.VideoCapture(self.src, cv2.CAP_V4L2)
+        if hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):
+            # a camera that hangs makes read fail instead of blocking for a long time
+            self.cam.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, self.STALL_TIMEOUT * 1000)
         self.get_camera_values("original")
         c1, c2, c3, c4 = self.get_codec_args_from_string(codec)
         self._set_codec(cv2.VideoWriter_fourcc(c1, c2, c3, c4))
         self._set_frame_dimensions(frame_width, frame_height)
         self._set_frame_rate(frame_rate)
         self.get_camera_values("new")
-        self.current_frame = None
+        self.decoder = None
+        if FrameDecoder.supports(self.get_codec()) and self.cam.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+            # decode ourselves to be able to decode at a reduced size
+            self.decoder = FrameDecoder(self.get_codec(), self.get_frame_width(), self.get_frame_height())
+
+    def _reopen(self):
+        self.cam.release()
+        self._open()
+        if not self.cam.isOpened():
+            raise IOError("could not open {}".format(self.src))
 
     def get_camera_values(self, status):
         print(
@@ -62,23 +175,101 @@ class RealCam:
         return int(self.cam.get(cv2.CAP_PROP_FPS))
 
     def start(self):
-        self.thread = threading.Thread(target=self.update)
+        self.thread = threading.Thread(target=self.update, name="capture")
         self.thread.start()
         return self
 
+    def set_target_size(self, target_size):
+        """(width, height) the frames are going to be resized to, None for the full resolution.
+        Frames are decoded at the smallest supported size not smaller than this."""
+        self.target_size = target_size
+
+    def set_rgb(self, is_rgb):
+        """deliver the next frames in RGB instead of BGR order, e.g. to pass them to the output unchanged"""
+        self.is_rgb = is_rgb
+
     def update(self):
+        placement.apply("capture")
+        # monotonic time of the first failed read since the last frame, None while frames arrive
+        failed_since = None
+        # failed_since or the time of the last reopen, the camera gets STALL_TIMEOUT after each
+        stalled_since = None
+        is_reopened = False
+        # one backoff for the whole outage, a camera that opens but delivers nothing is retried ever slower
+        backoff = Backoff()
         while not self.stopped:
+            read_start = time.perf_counter_ns()
             grabbed, frame = self.cam.read()
-            if grabbed:
-                with self.lock:
-                    self.current_frame = frame.copy()
+            if not grabbed:
+                if failed_since is None:
+                    failed_since = stalled_since = time.monotonic()
+                if time.monotonic() - stalled_since > self.STALL_TIMEOUT:
+                    print("the camera delivers no frames anymore, reopening it")
+                    metrics.increment("capture_reopens")
+                    if is_reopened:
+                        backoff.wait(lambda: self.stopped)
+                    is_reopened = reopen_with_backoff("camera", self._reopen, lambda: self.stopped, backoff)
+                    stalled_since = time.monotonic()
+                else:
+                    # do not spin while the camera is gone
+                    time.sleep(0.01)
+                continue
+            if failed_since is not None:
+                if is_reopened:
+                    metrics.set("capture_recovery_s", round(time.monotonic() - failed_since, 2))
+                failed_since = stalled_since = None
+                is_reopened = False
+                backoff.reset()
+            # includes the wait for the camera
+            tracer.add("capture.read", read_start, time.perf_counter_ns(), {"frame": self.frame_count})
+            timestamp = self._get_capture_time(time.monotonic())
+            if self.latency_budget is not None and time.monotonic() - timestamp > self.latency_budget:
+                # waited too long in the queue of the driver, decoding it would only delay the next frames
+                metrics.increment("dropped_frames")
+                metrics.increment("dropped_frames_capture")
+                continue
+            is_rgb = self.is_rgb
+            if self.decoder is not None:
+                with tracer.span("capture.decode"):
+                    frame = self.decoder.decode(frame, self.target_size, is_rgb)
+                if frame is None:
+                    continue
+            elif is_rgb:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # published frames are never modified, so readers do not need to copy them
+            with self.new_frame:
+                self.current_frame = CapturedFrame(frame, is_rgb, self.frame_count, timestamp)
+                self.frame_count += 1
+                self.new_frame.notify_all()
+
+    def _get_capture_time(self, read_at):
+        """the v4l2 buffer timestamp of the last read frame, it is taken from the same monotonic clock and also
+        covers the time the frame waited in the queue of the driver. The time it was read at if there is none"""
+        timestamp = self.cam.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if 0 <= read_at - timestamp < 10:
+            return timestamp
+        return read_at
 
     def read(self):
+        """copy of the latest frame in BGR order"""
         with self.lock:
-            if self.current_frame is not None:
-                return self.current_frame.copy()
-            else:
+            captured = self.current_frame
+        if captured is None:
+            return None
+        if captured.is_rgb:
+            return cv2.cvtColor(captured.image, cv2.COLOR_RGB2BGR)
+        return captured.image.copy()
+
+    def read_next(self, timeout=1.0):
+        """waits for a frame that was not returned by read_next before and returns it as CapturedFrame.
+        The image must not be modified. Returns None if no new frame arrived within timeout seconds."""
+        with self.new_frame:
+            if not self.new_frame.wait_for(
+                    lambda: self.current_frame is not None and self.current_frame.index > self.last_read_index,
+                    timeout):
                 return None
+            self.last_read_index = self.current_frame.index
+            return self.current_frame
 
     def stop(self):
         self.stopped = True
@@ -0,0 +1,37 @@
+import time
+
+
+class Backoff:
+    """Delays between attempts to reopen a device, doubling from initial_delay up to max_delay"""
+
+    def __init__(self, initial_delay=0.5, max_delay=10.0):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.delay = initial_delay
+
+    def wait(self, is_stopped):
+        """sleeps the current delay unless is_stopped() turns True, then doubles the delay"""
+        end = time.monotonic() + self.delay
+        while not is_stopped() and time.monotonic() < end:
+            time.sleep(min(0.1, self.delay))
+        self.delay = min(self.delay * 2, self.max_delay)
+
+    def reset(self):
+        self.delay = self.initial_delay
+
+
+def reopen_with_backoff(name, reopen, is_stopped, backoff=None):
+    """calls reopen until it does not raise, waiting longer after every failure.
+    Returns False if is_stopped() turned True before"""
+    backoff = backoff or Backoff()
+    attempt = 0
+    while not is_stopped():
+        attempt += 1
+        try:
+            reopen()
+            print("reopened the {} after {} attempt(s)".format(name, attempt))
+            return True
+        except Exception as e:
+            print("could not reopen the {}, retrying in {:.1f} s:".format(name, backoff.delay), e)
+        backoff.wait(is_stopped)
+    return False
@@ -0,0 +1,102 @@
+import os
+
+import cv2
+import numpy as np
+
+from geometry import FrameGeometry, blend_mask
+from style_transfer.utils import STRIDE
+
+
+class FaceDetector:
+    """Finds the largest face with the Haar cascade bundled with OpenCV.
+
+    The cascade runs on a small grayscale copy of the frame and only every detect_interval frames,
+    in between the last box is reused. The box is smoothed to keep the region from jittering.
+    """
+
+    def __init__(self, detect_width=320, detect_interval=5, max_misses=3, smoothing=0.5):
+        cascade_path = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise Exception("could not load face cascade " + cascade_path)
+        self.detect_width = detect_width
+        self.detect_interval = detect_interval
+        # number of detections without a face until the box is dropped
+        self.max_misses = max_misses
+        self.smoothing = smoothing
+        self.frame_count = 0
+        self.misses = 0
+        self.box = None
+
+    def detect(self, frame):
+        """returns the face box (x, y, w, h) in frame coordinates or None"""
+        self.frame_count += 1
+        if (self.frame_count - 1) % self.detect_interval != 0:
+            return self.box
+        scale = min(1.0, self.detect_width / frame.shape[1])
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=4, minSize=(24, 24))
+        if len(faces) == 0:
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.box = None
+            return self.box
+        self.misses = 0
+        box = np.array(max(faces, key=lambda face: face[2] * face[3]), dtype=np.float32) / scale
+        if self.box is not None:
+            box = self.smoothing * np.array(self.box) + (1 - self.smoothing) * box
+        self.box = tuple(int(value) for value in box)
+        return self.box
+
+
+class RoiStylizer:
+    """Stylizes the region around the subject at the full model resolution and the rest at background_scale.
+
+    The background is stylized at a reduced size, scaled up and the sharply stylized region is blended over it
+    with a feathered edge. With a face in the frame this needs about half of the inference pixels.
+    Frames without a face, or with a region that covers most of the frame, are stylized as a whole.
+    """
+
+    def __init__(self, detector=None, background_scale=0.5, padding=(1.0, 0.6, 1.0, 1.6), feather=16,
+                 min_region_size=128, max_region_share=0.6):
+        self.detector = detector if detector is not None else FaceDetector()
+        self.background_scale = background_scale
+        # left, top, right and bottom padding in face sizes, the bottom one includes the shoulders
+        self.padding = padding
+        self.feather = feather
+        # the tensorrt engines do not accept arbitrarily small inputs
+        self.min_region_size = min_region_size
+        self.max_region_share = max_region_share
+
+    def stylize(self, styler, frame):
+        box = self.detector.detect(frame)
+        if box is None:
+            return styler.stylize(frame)
+        height, width = frame.shape[:2]
+        x0, y0, x1, y1 = self._get_region(box, width, height)
+        if (x1 - x0) * (y1 - y0) > self.max_region_share * width * height:
+            return styler.stylize(frame)
+
+        background_size = (FrameGeometry.align(width * self.background_scale),
+                           FrameGeometry.align(height * self.background_scale))
+        background = styler.stylize(cv2.resize(frame, background_size, interpolation=cv2.INTER_AREA))
+        output = cv2.resize(background, (width, height), interpolation=cv2.INTER_LINEAR)
+        region = styler.stylize(frame[y0:y1, x0:x1])
+
+        mask = blend_mask(x1 - x0, y1 - y0, self.feather, (x0 == 0, y0 == 0, x1 == width, y1 == height))
+        blurred = output[y0:y1, x0:x1].astype(np.float32)
+        output[y0:y1, x0:x1] = blurred + (region.astype(np.float32) - blurred) * mask
+        return output
+
+    def _get_region(self, box, width, height):
+        """padded box aligned to the network stride, so the styler does not crop it"""
+        x, y, w, h = box
+        left, top, right, bottom = self.padding
+        region_width = min(width, max(self.min_region_size, FrameGeometry.align(w * (1 + left + right))))
+        region_height = min(height, max(self.min_region_size, FrameGeometry.align(h * (1 + top + bottom))))
+        center_x = x + w * (1 + right - left) / 2
+        center_y = y + h * (1 + bottom - top) / 2
+        x0 = int(np.clip(center_x - region_width / 2, 0, width - region_width)) // STRIDE * STRIDE
+        y0 = int(np.clip(center_y - region_height / 2, 0, height - region_height)) // STRIDE * STRIDE
+        return x0, y0, x0 + region_width, y0 + region_height
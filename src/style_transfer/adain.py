@@ -0,0 +1,72 @@
+import numpy as np
+import torch
+
+from style_transfer.utils import normalize_batch
+from style_transfer.vgg import Vgg16
+
+
+class AdaINDecoder(torch.nn.Module):
+    """Mirror of the Vgg16 slices up to relu4_3, turns the features back into an RGB image in the 0-1 range"""
+
+    def __init__(self):
+        super(AdaINDecoder, self).__init__()
+        self.layers = torch.nn.Sequential(
+            *self._conv(512, 256), torch.nn.Upsample(scale_factor=2, mode="nearest"),
+            *self._conv(256, 256), *self._conv(256, 256), *self._conv(256, 128),
+            torch.nn.Upsample(scale_factor=2, mode="nearest"),
+            *self._conv(128, 128), *self._conv(128, 64), torch.nn.Upsample(scale_factor=2, mode="nearest"),
+            *self._conv(64, 64), *self._conv(64, 3, relu=False),
+        )
+
+    @staticmethod
+    def _conv(in_channels, out_channels, relu=True):
+        layers = [torch.nn.ReflectionPad2d(1), torch.nn.Conv2d(in_channels, out_channels, 3)]
+        if relu:
+            layers.append(torch.nn.ReLU(inplace=True))
+        return layers
+
+    def forward(self, x):
+        return self.layers(x)
+
+
+def feature_statistics(features, eps=1e-5):
+    """per channel mean and standard deviation of Nx512xHxW features"""
+    var, mean = torch.var_mean(features, dim=(2, 3), keepdim=True, unbiased=False)
+    return mean, torch.sqrt(var + eps)
+
+
+def adaptive_instance_normalization(content_features, style_mean, style_std):
+    mean, std = feature_statistics(content_features)
+    return (content_features - mean) / std * style_std + style_mean
+
+
+class AdaINNet(torch.nn.Module):
+    """Arbitrary style transfer (Huang and Belongie, 2017) with the Vgg16 of the perceptual losses as encoder.
+
+    A style is only the channel statistics of the encoded style image, its embedding. The decoder has to be
+    trained for this encoder. Images are Nx3xHxW RGB batches in the 0-255 range, the output is in the same range.
+    """
+
+    def __init__(self, decoder_state_dict=None, vgg_weights_path=None):
+        super(AdaINNet, self).__init__()
+        self.encoder = Vgg16(requires_grad=False, weights_path=vgg_weights_path)
+        self.decoder = AdaINDecoder()
+        if decoder_state_dict is not None:
+            self.decoder.load_state_dict(decoder_state_dict)
+
+    def encode(self, images):
+        return self.encoder(normalize_batch(images.clone())).relu4_3
+
+    def get_style_embedding(self, style_images):
+        """mean and standard deviation of the style features as 2x512 array"""
+        mean, std = feature_statistics(self.encode(style_images))
+        return np.stack([mean.mean(dim=0).flatten().cpu().numpy(), std.mean(dim=0).flatten().cpu().numpy()])
+
+    def forward(self, images, embedding, alpha=1.0):
+        """embedding is a 2x512 tensor, alpha < 1 keeps more of the content"""
+        features = self.encode(images)
+        style_mean, style_std = embedding[0].view(1, -1, 1, 1), embedding[1].view(1, -1, 1, 1)
+        stylized = adaptive_instance_normalization(features, style_mean, style_std)
+        if alpha < 1:
+            stylized = alpha * stylized + (1 - alpha) * features
+        return self.decoder(stylized) * 255
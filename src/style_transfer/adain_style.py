@@ -0,0 +1,70 @@
+import os
+
+import cv2
+import numpy as np
+import torch
+
+from style_transfer.adain import AdaINNet
+from style_transfer.utils import crop_to_stride, model_cache_path, output_to_frame
+
+
+class AdaINStyleTransfer:
+    """Applies any style image with a single arbitrary style network.
+
+    The styles are images, their embeddings are computed once by optimize_model and cached next to them,
+    so adding a style needs neither training nor an engine build. Offers the same interface as the other backends.
+    """
+    def __init__(self, style_image_path, decoder_path, device=None, vgg_weights_path=None, alpha=1.0,
+                 style_size=512):
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = torch.device(device)
+        self.alpha = alpha
+        # short side the style images are scaled to before they are encoded
+        self.style_size = style_size
+        decoder_state_dict = torch.load(decoder_path, map_location="cpu")
+        self.model = AdaINNet(decoder_state_dict, vgg_weights_path).to(self.device).eval()
+        self.embedding = None
+        self.loaded_model_path = None
+        self.load_model(style_image_path)
+        self._load_model_internal()
+
+    def load_model(self, style_model_path, is_cancelled=None):
+        self.is_new_model = True
+        self.style_model_weights_path = style_model_path
+
+    def optimize_model(self, modelpath, is_cancelled=None):
+        """computes the embedding of a style image if not cached"""
+        embedding_path = model_cache_path(modelpath, ".adain.npy")
+        if not os.path.isfile(embedding_path):
+            np.save(embedding_path, self._compute_embedding(modelpath))
+        return True
+
+    def _compute_embedding(self, style_image_path):
+        image = cv2.imread(style_image_path)
+        if image is None:
+            raise Exception("could not read style image " + style_image_path)
+        scale = self.style_size / min(image.shape[:2])
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with torch.no_grad():
+            images = torch.from_numpy(image).permute(2, 0, 1).unsqueeze(0).float().to(self.device)
+            return self.model.get_style_embedding(images)
+
+    def _load_model_internal(self):
+        self.is_new_model = False
+        self.optimize_model(self.style_model_weights_path)
+        embedding = np.load(model_cache_path(self.style_model_weights_path, ".adain.npy"))
+        self.embedding = torch.from_numpy(embedding).float().to(self.device)
+        self.loaded_model_path = self.style_model_weights_path
+
+    def stylize(self, frame):
+        if self.is_new_model:
+            self._load_model_internal()
+
+        with torch.no_grad():
+            # the encoder expects RGB, the output is reversed back to BGR by output_to_frame
+            content_image = np.ascontiguousarray(crop_to_stride(frame)[..., ::-1])
+            content_image = torch.from_numpy(content_image).to(self.device).permute(2, 0, 1).unsqueeze(0).float()
+            output = self.model(content_image, self.embedding, self.alpha)
+        return output_to_frame(output[0].cpu().numpy())
@@ -0,0 +1,26 @@
+BACKENDS = ("tensorrt", "torch", "onnx", "adain")
+PRECISIONS = ("fp32", "int8")
+# the styles of the adain backend are images instead of trained models
+STYLE_IMAGE_ENDINGS = [".jpg", ".jpeg", ".png"]
+
+
+def create_style_transfer(backend, style_model_path, device=None, precision="fp32", tile_size=None,
+                          adain_decoder=None, vgg_weights=None, num_threads=None):
+    """creates the styler of a backend, every backend imports its runtime only when it is used.
+    num_threads is the number of inference threads on the CPU, by default the runtime decides"""
+    if tile_size and backend != "torch":
+        raise ValueError("tiled inference is only supported by the torch backend")
+    if backend == "tensorrt":
+        from style_transfer.neural_style import StyleTransfer
+        return StyleTransfer(style_model_path)
+    if backend == "torch":
+        from style_transfer.torch_style import TorchStyleTransfer
+        return TorchStyleTransfer(style_model_path, device=device, precision=precision, tile_size=tile_size,
+                                  num_threads=num_threads)
+    if backend == "onnx":
+        from style_transfer.onnx_style import OnnxStyleTransfer
+        return OnnxStyleTransfer(style_model_path, precision=precision, num_threads=num_threads)
+    if backend == "adain":
+        from style_transfer.adain_style import AdaINStyleTransfer
+        return AdaINStyleTransfer(style_model_path, adain_decoder, device=device, vgg_weights_path=vgg_weights)
+    raise ValueError("unknown backend {}, available are {}".format(backend, ", ".join(BACKENDS)))
@@ -0,0 +1,48 @@
+import json
+import os
+
+import numpy as np
+
+
+class FeatureStore:
+    """Memory mapped on disk cache of one fixed size array per item, e.g. the Vgg16 features of the content images.
+
+    An item is computed on its first use and read from the page cache afterwards, also by later runs. The key
+    describes how the items were computed, e.g. the image list and the preprocessing, a store with another key
+    is discarded.
+    """
+
+    def __init__(self, path, count, shape, dtype, key):
+        self.path = path
+        info = {"count": count, "shape": list(shape), "dtype": np.dtype(dtype).str, "key": key}
+        info_path = path + ".json"
+        mode = "r+"
+        if not os.path.exists(path) or not os.path.exists(info_path) or _read_json(info_path) != info:
+            mode = "w+"
+        self.data = np.memmap(path, dtype=dtype, mode=mode, shape=(count,) + tuple(shape))
+        self.is_filled = np.memmap(path + ".filled", dtype=np.bool_, mode=mode, shape=(count,))
+        if mode == "w+":
+            with open(info_path, "w") as f:
+                json.dump(info, f)
+
+    def __len__(self):
+        return len(self.is_filled)
+
+    def get_filled_count(self):
+        return int(np.count_nonzero(self.is_filled))
+
+    def put(self, index, value):
+        self.data[index] = value
+        self.is_filled[index] = True
+
+    def flush(self):
+        self.data.flush()
+        self.is_filled.flush()
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except ValueError:
+        return None
@@ -0,0 +1,162 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+# styles that need no neural network and run at full frame rate on one core
+LUT_ENDING = ".cube"
+FILTER_ENDING = ".filter"
+FILTER_STYLE_ENDINGS = [LUT_ENDING, FILTER_ENDING]
+
+
+def is_filter_style(style_path):
+    return os.path.splitext(style_path)[1] in FILTER_STYLE_ENDINGS
+
+
+def read_cube(path):
+    """3D lookup table of an Adobe .cube file as NxNxNx3 float array indexed by [blue, green, red], range 0-1"""
+    size = None
+    domain_min, domain_max = np.zeros(3), np.ones(3)
+    values = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or line.startswith("TITLE"):
+                continue
+            if line.startswith("LUT_3D_SIZE"):
+                size = int(line.split()[1])
+            elif line.startswith("DOMAIN_MIN"):
+                domain_min = np.array(line.split()[1:], dtype=np.float64)
+            elif line.startswith("DOMAIN_MAX"):
+                domain_max = np.array(line.split()[1:], dtype=np.float64)
+            elif line[0].isdigit() or line[0] in "-.":
+                values.append([float(value) for value in line.split()])
+    if size is None or len(values) != size ** 3:
+        raise ValueError("{} is no valid 3D lut".format(path))
+    # red changes fastest in the file, so the first index is blue
+    table = np.array(values, dtype=np.float32).reshape(size, size, size, 3)
+    return np.clip((table - domain_min) / (domain_max - domain_min), 0, 1)
+
+
+def write_cube(path, table, title="stylecam"):
+    """inverse of read_cube"""
+    size = table.shape[0]
+    with open(path, "w") as f:
+        f.write('TITLE "{}"\nLUT_3D_SIZE {}\n'.format(title, size))
+        for red, green, blue in table.reshape(-1, 3):
+            f.write("{:.6f} {:.6f} {:.6f}\n".format(red, green, blue))
+
+
+class LutStyle:
+    """Applies a 3D lut to BGR frames with a single table lookup per pixel.
+
+    The lut is resampled once to 7 bits per channel, larger than any .cube file and without visible banding.
+    """
+    BITS = 7
+
+    def __init__(self, path):
+        table = read_cube(path)
+        steps = 1 << self.BITS
+        bin_size = 1 << (8 - self.BITS)
+        # trilinear interpolation of the lut at the centers of the 7 bit bins
+        centers = np.arange(steps, dtype=np.float32) * bin_size + (bin_size - 1) / 2
+        positions = centers / 255 * (table.shape[0] - 1)
+        lower = np.minimum(positions.astype(np.int32), table.shape[0] - 2)
+        fraction = (positions - lower)[:, np.newaxis]
+        # interpolate along blue, green and red one after the other
+        table = table[lower] * (1 - fraction[..., np.newaxis, np.newaxis]) + \
+            table[lower + 1] * fraction[..., np.newaxis, np.newaxis]
+        table = table[:, lower] * (1 - fraction[np.newaxis, ..., np.newaxis]) + \
+            table[:, lower + 1] * fraction[np.newaxis, ..., np.newaxis]
+        table = table[:, :, lower] * (1 - fraction[np.newaxis, np.newaxis]) + \
+            table[:, :, lower + 1] * fraction[np.newaxis, np.newaxis]
+        # the table holds RGB values, the frames are BGR
+        self.table = np.ascontiguousarray(np.round(table[..., ::-1] * 255).astype(np.uint8).reshape(-1, 3))
+
+    def apply(self, frame):
+        shift = 8 - self.BITS
+        index = (frame[..., 0] >> shift).astype(np.int32) << (2 * self.BITS)
+        index |= (frame[..., 1] >> shift).astype(np.int32) << self.BITS
+        index |= frame[..., 2] >> shift
+        return self.table[index]
+
+
+class FilterStyle:
+    """An OpenCV filter described by a .filter JSON file, e.g. {"type": "cartoon", "colors": 8}.
+
+    Types: cartoon (edge preserving smoothing, quantized colors and dark edges) and edge_preserving.
+    Both run on a copy reduced by the factor "reduction" and are scaled back up, to stay cheap.
+    A "lut" entry names a .cube file next to the filter file that is applied afterwards.
+    """
+
+    def __init__(self, path):
+        with open(path) as f:
+            self.options = json.load(f)
+        self.type = self.options.get("type", "cartoon")
+        if self.type not in ("cartoon", "edge_preserving"):
+            raise ValueError("unknown filter type {} in {}".format(self.type, path))
+        self.reduction = self.options.get("reduction", 2)
+        self.lut = None
+        if "lut" in self.options:
+            self.lut = LutStyle(os.path.join(os.path.dirname(path), self.options["lut"]))
+
+    def apply(self, frame):
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (width // self.reduction, height // self.reduction), interpolation=cv2.INTER_AREA)
+        if self.type == "cartoon":
+            output = self._cartoon(small)
+        else:
+            output = cv2.edgePreservingFilter(small, flags=cv2.RECURS_FILTER,
+                                              sigma_s=self.options.get("sigma_s", 30),
+                                              sigma_r=self.options.get("sigma_r", 0.3))
+        output = cv2.resize(output, (width, height), interpolation=cv2.INTER_LINEAR)
+        if self.type == "cartoon":
+            output = self._draw_edges(frame, output)
+        if self.lut is not None:
+            output = self.lut.apply(output)
+        return output
+
+    def _cartoon(self, frame):
+        smooth = cv2.bilateralFilter(frame, 7, self.options.get("sigma_color", 60), self.options.get("sigma_space", 7))
+        # fewer colors give the flat look of drawings
+        step = 256 // self.options.get("colors", 8)
+        # in int16, the center of the last step is above 255 unless colors divides 256
+        levels = smooth.astype(np.int16) // step * step + step // 2
+        return np.minimum(levels, 255).astype(np.uint8)
+
+    def _draw_edges(self, frame, output):
+        gray = cv2.medianBlur(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), 5)
+        edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                      self.options.get("edge_block_size", 9), self.options.get("edge_threshold", 4))
+        return cv2.bitwise_and(output, output, mask=edges)
+
+
+class FilterStyleTransfer:
+    """Styler for the .cube and .filter styles with the interface of the neural backends"""
+
+    def __init__(self):
+        self.style = None
+        self.loaded_model_path = None
+        self.style_model_weights_path = None
+        self.is_new_model = False
+
+    def load_model(self, style_model_path, is_cancelled=None):
+        self.is_new_model = True
+        self.style_model_weights_path = style_model_path
+
+    def optimize_model(self, modelpath, is_cancelled=None):
+        return True
+
+    def _load_model_internal(self):
+        self.is_new_model = False
+        if self.style_model_weights_path.endswith(LUT_ENDING):
+            self.style = LutStyle(self.style_model_weights_path)
+        else:
+            self.style = FilterStyle(self.style_model_weights_path)
+        self.loaded_model_path = self.style_model_weights_path
+
+    def stylize(self, frame):
+        if self.is_new_model:
+            self._load_model_internal()
+        return self.style.apply(frame)
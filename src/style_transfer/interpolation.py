@@ -0,0 +1,39 @@
+import torch
+
+
+class StyleMixer:
+    """Blends the weights of styles with the same architecture into a loaded model, in place.
+
+    The model computes a linear interpolation of the styles, e.g. to fade from one style into another with a
+    single inference per frame. Tensors that are equal in all styles are never touched and a change of the mix
+    only adds the weighted difference of the styles whose share changed to the parameters.
+    """
+
+    def __init__(self, model, state_dicts, key=None):
+        """state_dicts of the styles in the layout of model, e.g. of models converted the same way"""
+        self.model = model
+        # identifies the styles, e.g. their paths
+        self.key = key
+        parameters = dict(model.named_parameters())
+        self.tensors = {}
+        for name, parameter in parameters.items():
+            values = [state_dict[name].to(parameter.device, torch.float32) for state_dict in state_dicts]
+            if any(not torch.equal(values[0], value) for value in values[1:]):
+                self.tensors[name] = (parameter, torch.stack(values))
+        self.weights = None
+
+    def set_weights(self, weights):
+        """weights of the styles, usually summing up to 1"""
+        weights = torch.tensor(weights, dtype=torch.float32)
+        with torch.no_grad():
+            if self.weights is None:
+                for parameter, values in self.tensors.values():
+                    parameter.copy_(torch.tensordot(weights.to(values.device), values, dims=1))
+            else:
+                delta = weights - self.weights
+                changed = torch.nonzero(delta).flatten().tolist()
+                for parameter, values in self.tensors.values():
+                    for style in changed:
+                        parameter.add_(values[style], alpha=delta[style].item())
+        self.weights = weights
+        return len(self.tensors)
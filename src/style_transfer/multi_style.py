@@ -0,0 +1,121 @@
+import torch
+
+from style_transfer.style_pack import get_style_vector, open_style_pack, split_pack_entry
+from style_transfer.transformer_net import InferenceTransformerNet
+from style_transfer.utils import save_model_to_onnx
+
+
+class ConditionalInstanceNorm2d(torch.nn.Module):
+    """InstanceNorm2d with one set of affine parameters per style, the style attribute selects the set"""
+
+    def __init__(self, num_features, num_styles, eps=1e-5):
+        super(ConditionalInstanceNorm2d, self).__init__()
+        self.norm = torch.nn.InstanceNorm2d(num_features, eps=eps, affine=False)
+        self.weight = torch.nn.Parameter(torch.ones(num_styles, num_features))
+        self.bias = torch.nn.Parameter(torch.zeros(num_styles, num_features))
+        self.style = 0
+        # a 1 x num_styles tensor that replaces style while StyleInputNet runs
+        self.style_weights = None
+
+    def forward(self, x):
+        if self.style_weights is not None:
+            weight = torch.matmul(self.style_weights, self.weight).view(1, -1, 1, 1)
+            bias = torch.matmul(self.style_weights, self.bias).view(1, -1, 1, 1)
+            return self.norm(x) * weight + bias
+        weight = self.weight[self.style].view(1, -1, 1, 1)
+        bias = self.bias[self.style].view(1, -1, 1, 1)
+        return self.norm(x) * weight + bias
+
+
+class MultiStyleTransformerNet(InferenceTransformerNet):
+    """InferenceTransformerNet whose convolutions are shared by all styles, a style is its instance norm parameters.
+
+    Every style corresponds to an InferenceTransformerNet with the shared convolutions and the instance norm
+    parameters of the style, see get_style_state_dict.
+    """
+
+    def __init__(self, num_styles):
+        super(MultiStyleTransformerNet, self).__init__()
+        self.num_styles = num_styles
+        # nn.Module.get_submodule needs torch 1.9
+        modules = dict(self.named_modules())
+        for name, module in modules.items():
+            if isinstance(module, torch.nn.InstanceNorm2d):
+                parent_name, _, child_name = name.rpartition(".")
+                parent = modules[parent_name]
+                setattr(parent, child_name, ConditionalInstanceNorm2d(module.num_features, num_styles, module.eps))
+
+    @classmethod
+    def from_style_pack(cls, pack_path):
+        """all styles of a multi style pack in one model, in the order of the pack"""
+        style_pack = open_style_pack(pack_path)
+        names = style_pack.get_style_names()
+        style_state_dicts = [style_pack.get_state_dict(name, include_shared=False) for name in names]
+        state_dict = style_pack.get_state_dict(names[0])
+        for key in style_state_dicts[0]:
+            state_dict[key] = torch.stack([style_state_dict[key] for style_state_dict in style_state_dicts])
+        model = cls(len(names))
+        model.load_state_dict(state_dict)
+        return model.eval()
+
+    @classmethod
+    def from_state_dicts(cls, state_dicts):
+        """initializes the model with the instance norm parameters of the styles and the mean of their convolutions"""
+        model = cls(len(state_dicts))
+        model_state_dict = model.state_dict()
+        for key in model_state_dict:
+            values = torch.stack([state_dict[key] for state_dict in state_dicts])
+            if model.is_style_key(key):
+                model_state_dict[key] = values
+            else:
+                model_state_dict[key] = values.mean(dim=0)
+        model.load_state_dict(model_state_dict)
+        return model
+
+    def get_norms(self):
+        return [module for module in self.modules() if isinstance(module, ConditionalInstanceNorm2d)]
+
+    def set_style(self, style):
+        for norm in self.get_norms():
+            norm.style = style
+
+    def is_style_key(self, key):
+        module_name = key.rpartition(".")[0]
+        return isinstance(dict(self.named_modules())[module_name], ConditionalInstanceNorm2d)
+
+    def get_shared_state_dict(self):
+        return {key: value for key, value in self.state_dict().items() if not self.is_style_key(key)}
+
+    def get_style_state_dict(self, style, include_shared=False):
+        """state_dict of a style, with include_shared it can be loaded by TransformerNet and InferenceTransformerNet"""
+        state_dict = {key: value[style] for key, value in self.state_dict().items() if self.is_style_key(key)}
+        if include_shared:
+            state_dict.update(self.get_shared_state_dict())
+        return state_dict
+
+
+class StyleInputNet(torch.nn.Module):
+    """MultiStyleTransformerNet that takes the style as second input, a one hot 1 x num_styles vector.
+    Exported this way one onnx model or tensorrt engine serves all styles of a pack"""
+
+    def __init__(self, model):
+        super(StyleInputNet, self).__init__()
+        self.model = model
+
+    def forward(self, x, style):
+        norms = self.model.get_norms()
+        for norm in norms:
+            norm.style_weights = style
+        try:
+            return self.model(x)
+        finally:
+            for norm in norms:
+                norm.style_weights = None
+
+
+def save_multi_style_to_onnx(model_path, path, input_shape=(1, 3, 720, 1280)):
+    """exports all styles of the multi style pack of the entry model_path with the style as input"""
+    model = MultiStyleTransformerNet.from_style_pack(split_pack_entry(model_path)[0])
+    example_input = (torch.ones(*input_shape), torch.from_numpy(get_style_vector(model_path)))
+    with torch.no_grad():
+        save_model_to_onnx(StyleInputNet(model), path, input_shape, example_input, input_names=("input", "style"))
@@ -1,10 +1,7 @@
 import gc
 import os.path
-import re
 
-import cv2
 import numpy as np
-import onnx
 # noinspection PyUnresolvedReferences
 import pycuda.autoinit  # important for tensorrt to work
 
@@ -12,10 +9,11 @@ pycuda.autoinit.context.detach()
 import pycuda.driver as cuda
 import tensorrt as trt
 import torch
-import torch.onnx
-from torchvision import transforms
 
+from style_transfer.style_pack import get_multi_style_pack, get_style_vector
 from style_transfer.transformer_net import TransformerNet
+from style_transfer.utils import crop_to_stride, export_cache_path, frame_to_input, load_style_state_dict, \
+    output_to_frame, save_model_to_onnx
 
 TRT_LOGGER = trt.Logger(min_severity=trt.Logger.ERROR)
 EXPLICIT_BATCH = 1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH)
@@ -29,30 +27,43 @@ class StyleTransfer:
         self.device = device
         self.style_model_weights_path = style_model_path
         self.default_input_shape = [1, 3, *cam_resolution]
-        self.style_model = TransformerNet()
         self._create_tensorrt_network_and_config()
         self.trt_context = None
         self.trt_engine = None
         self.cuda_context = None
+        self.loaded_engine_path = None
+        # the style input of an engine built for all styles of a multi style pack, None for other engines
+        self.style_vector = None
+        self.loaded_model_path = None
         self.load_model(style_model_path)
         self._load_model_internal()
         self.is_new_model = False
 
 
-    def load_model(self, style_model_path):
+    def load_model(self, style_model_path, is_cancelled=None):
+        """the model is loaded before the next stylized frame.
+        is_cancelled is polled while an engine has to be built, returning True gives up the load"""
         self.is_new_model = True
         self.style_model_weights_path = style_model_path
+        self.is_cancelled = is_cancelled
 
-    def optimize_model(self, modelpath):
-        basepath = "".join(modelpath.split(".")[:-1])
-        onnx_path = "." + basepath + ".onnx"
-        trt_engine_path = "." + basepath + ".trtengine"
-        trt_network = self.trt_builder.create_network(EXPLICIT_BATCH)
+    def optimize_model(self, modelpath, is_cancelled=None):
+        """builds the onnx model and tensorrt engine if not cached, returns False if this was cancelled.
+        All styles of a multi style pack share one engine that gets the style as input"""
+        onnx_path = export_cache_path(modelpath, ".onnx")
+        trt_engine_path = export_cache_path(modelpath, ".trtengine")
         if not (os.path.isfile(onnx_path) and os.path.isfile(trt_engine_path)):
-            style_model = TransformerNet()
-            self._load_weights_into_model(modelpath, style_model)
-            self._optimize_model_internal(style_model, modelpath, onnx_path, trt_engine_path, trt_network)
+            trt_network = self.trt_builder.create_network(EXPLICIT_BATCH)
+            style_model = None
+            if get_multi_style_pack(modelpath) is None:
+                style_model = TransformerNet()
+                self._load_weights_into_model(modelpath, style_model)
+            engine = self._optimize_model_internal(style_model, modelpath, onnx_path, trt_engine_path, trt_network,
+                                                   is_cancelled)
+            del engine
             self._free_gpu_memory()
+            return os.path.isfile(trt_engine_path)
+        return True
 
     def _free_gpu_memory(self):
         gc.collect()
@@ -65,9 +76,15 @@ class StyleTransfer:
             self.cuda_context.detach()
         self.cuda_context = pycuda.tools.make_default_context()
 
-    def _optimize_model_internal(self, style_model, modelpath, onnx_path, trt_engine_path, trt_network):
+    def _optimize_model_internal(self, style_model, modelpath, onnx_path, trt_engine_path, trt_network,
+                                 is_cancelled=None):
         print("optimizing", modelpath)
-        self._save_model_to_onnx(style_model, path=onnx_path)
+        if style_model is None:
+            from style_transfer.multi_style import save_multi_style_to_onnx
+
+            save_multi_style_to_onnx(modelpath, onnx_path, self.default_input_shape)
+        else:
+            self._save_model_to_onnx(style_model, path=onnx_path)
         parser = trt.OnnxParser(trt_network, TRT_LOGGER)
         with open(onnx_path, 'rb') as model:
             if not parser.parse(model.read()):
@@ -75,58 +92,65 @@ class StyleTransfer:
                     print(parser.get_error(error))
                     if os.getuid() == 0:
                         os.chmod(onnx_path, 0o0777)
+        # building the engine takes minutes, do not spend them on a style that is not wanted anymore
+        if is_cancelled is not None and is_cancelled():
+            print("optimizing", modelpath, "cancelled")
+            return None
         engine = self.trt_builder.build_engine(trt_network, self.trt_config)
         if engine is None:
             raise Exception("engine is none")
 
-        context = engine.create_execution_context()
         print("saving tensorrt engine to ", trt_engine_path)
         with open(trt_engine_path, "wb") as f:
             f.write(engine.serialize())
             if os.getuid() == 0:
                 os.chmod(trt_engine_path, 0o0777)
-        return engine, context
+        return engine
 
     @staticmethod
     def _load_weights_into_model(style_model_weights_path, style_model):
-        state_dict = torch.load(style_model_weights_path)
-        for k in list(state_dict.keys()):
-            if re.search(r'in\d+\.running_(mean|var)$', k):
-                del state_dict[k]
-        style_model.load_state_dict(state_dict)
+        style_model.load_state_dict(load_style_state_dict(style_model_weights_path))
 
     def _load_model_internal(self):
         # this only works if called form the main thread!
+        self.is_new_model = False
+        # the current engine keeps running until the new one is built, so a cancelled build changes nothing
+        if not self.optimize_model(self.style_model_weights_path, self.is_cancelled):
+            print("loading", self.style_model_weights_path, "cancelled")
+            self.style_model_weights_path = self.loaded_model_path
+            return
+
+        onnx_path = export_cache_path(self.style_model_weights_path, ".onnx")
+        trt_engine_path = export_cache_path(self.style_model_weights_path, ".trtengine")
+        if trt_engine_path == self.loaded_engine_path:
+            # another style of the multi style pack of the loaded engine only changes its style input
+            self.style_vector = get_style_vector(self.style_model_weights_path)
+            self.loaded_model_path = self.style_model_weights_path
+            return
+
         del self.trt_context
         del self.trt_engine
 
         self._free_gpu_memory()
 
-        self._load_weights_into_model(self.style_model_weights_path, self.style_model)
-        # optimize
-        base_path = "".join(self.style_model_weights_path.split(".")[:-1])
-
-        onnx_path = "." + base_path + ".onnx"
-        trt_engine_path = "." + base_path + ".trtengine"
         trt_network = self.trt_builder.create_network(EXPLICIT_BATCH)
-        if not (os.path.isfile(onnx_path) and os.path.isfile(trt_engine_path)):
-            print("optimizing model for your graphics card. This might take some time.")
-            engine, context = self._optimize_model_internal(self.style_model, self.style_model_weights_path, onnx_path,
-                                                            trt_engine_path, trt_network)
-        else:
-            # this has to be done otherwise deserialize_cuda_engine does not work
-            parser = trt.OnnxParser(trt_network, TRT_LOGGER)
-            with open(onnx_path, 'rb') as model:
-                if not parser.parse(model.read()):
-                    for error in range(parser.num_errors):
-                        print(parser.get_error(error))
-            with open(trt_engine_path, "rb") as f, trt.Runtime(TRT_LOGGER) as runtime:
-                engine = runtime.deserialize_cuda_engine(f.read())
-            context = engine.create_execution_context()
+        # this has to be done otherwise deserialize_cuda_engine does not work
+        parser = trt.OnnxParser(trt_network, TRT_LOGGER)
+        with open(onnx_path, 'rb') as model:
+            if not parser.parse(model.read()):
+                for error in range(parser.num_errors):
+                    print(parser.get_error(error))
+        with open(trt_engine_path, "rb") as f, trt.Runtime(TRT_LOGGER) as runtime:
+            engine = runtime.deserialize_cuda_engine(f.read())
+        context = engine.create_execution_context()
 
         self.trt_engine = engine
         self.trt_context = context
-        self.is_new_model = False
+        self.style_vector = None
+        if engine.get_binding_index("style") != -1:
+            self.style_vector = get_style_vector(self.style_model_weights_path)
+        self.loaded_engine_path = trt_engine_path
+        self.loaded_model_path = self.style_model_weights_path
 
     def __del__(self):
         del self.trt_engine
@@ -137,42 +161,7 @@ class StyleTransfer:
         return tensor.detach().cpu().numpy() if tensor.requires_grad else tensor.cpu().numpy()
 
     def _save_model_to_onnx(self, model, example_input=None, path="./test.onnx"):
-
-        if example_input is None:
-            example_input = torch.ones(
-                *self.default_input_shape)
-        torch.onnx.export(
-            model,
-            example_input,
-            path,
-            export_params=True,
-            # do_constant_folding=True,
-            input_names=['input'],  # Pass names as per model input name
-            output_names=['output'],  ## Pass names as per model output name
-            opset_version=10,  # export the model to the  opset version of the onnx submodule.
-            dynamic_axes={  # this will makes export more generalize to take batch for prediction
-                'input': [2, 3],
-                # 'output': {0: 'batch'},
-            }
-
-        )
-        onnx_model = onnx.load(path)
-        onnx.checker.check_model(onnx_model)
-        print("saved model onnx to: ", path)
-
-    @staticmethod
-    def _resize_crop(image):
-        h, w, c = np.shape(image)
-        if min(h, w) > 720:
-            if h > w:
-                h, w = int(720 * h / w), 720
-            else:
-                h, w = 720, int(720 * w / h)
-        image = cv2.resize(image, (w, h),
-                           interpolation=cv2.INTER_AREA)
-        h, w = (h // 8) * 8, (w // 8) * 8
-        image = image[:h, :w, :]
-        return image
+        save_model_to_onnx(model, path, self.default_input_shape, example_input)
 
     def _create_tensorrt_network_and_config(self):
 
@@ -200,33 +189,37 @@ class StyleTransfer:
         if self.is_new_model:
             self._load_model_internal()
 
-        content_image = self._resize_crop(frame)
-        content_image = content_image.astype(np.float32)  # / 127.5 - 1
-        content_transform = transforms.Compose([
-            transforms.ToTensor(),
-        ])
-        content_image = content_transform(content_image).unsqueeze(0)
+        content_image = frame_to_input(crop_to_stride(frame))
 
         engine = self.trt_engine
         context = self.trt_context
         stream = cuda.Stream()
         context.set_optimization_profile_async(0, stream.handle)
 
-        context.set_binding_shape(0, content_image.shape)
-        input_shape = context.get_binding_shape(0)
+        input_index = engine.get_binding_index("input")
+        output_index = engine.get_binding_index("output")
+        context.set_binding_shape(input_index, content_image.shape)
+        input_shape = context.get_binding_shape(input_index)
         input_size = trt.volume(input_shape) * engine.max_batch_size * np.dtype(np.float32).itemsize
         device_input = cuda.mem_alloc(input_size)
 
-        output_shape = context.get_binding_shape(1)
+        output_shape = context.get_binding_shape(output_index)
         host_output = cuda.pagelocked_empty(trt.volume(output_shape) * engine.max_batch_size, dtype=np.float32)
         device_output = cuda.mem_alloc(host_output.nbytes)
 
-        host_input = np.array(content_image, dtype=np.float32, order='C')
+        host_input = content_image
 
         # Transfer input data to the GPU.
         cuda.memcpy_htod_async(device_input, host_input, stream)
+        bindings = [0] * engine.num_bindings
+        bindings[input_index] = int(device_input)
+        bindings[output_index] = int(device_output)
+        if self.style_vector is not None:
+            device_style = cuda.mem_alloc(self.style_vector.nbytes)
+            cuda.memcpy_htod_async(device_style, self.style_vector, stream)
+            bindings[engine.get_binding_index("style")] = int(device_style)
         # Run inference.
-        context.execute_async_v2(bindings=[int(device_input), int(device_output)], stream_handle=stream.handle)
+        context.execute_async_v2(bindings=bindings, stream_handle=stream.handle)
 
         # Transfer predictions back from the GPU.
         cuda.memcpy_dtoh_async(host_output, device_output, stream)
@@ -237,14 +230,4 @@ class StyleTransfer:
         # https://learnopencv.com/how-to-convert-a-model-from-pytorch-to-tensorrt-and-speed-up-inference/
         output_data = np.array(host_output).reshape(engine.max_batch_size, *output_shape[1:])
 
-        output = np.squeeze(output_data)
-        output = np.moveaxis(output, 0, 2)
-        red = output[:, :, 2].copy()
-        green = output[:, :, 1].copy()
-        blue = output[:, :, 0].copy()
-        output[:, :, 0] = red
-        output[:, :, 1] = green
-        output[:, :, 2] = blue
-
-        output = np.clip(output, 0, 255).astype(np.uint8)
-        return output
+        return output_to_frame(output_data[0])
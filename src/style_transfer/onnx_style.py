@@ -0,0 +1,79 @@
+import os
+
+import onnxruntime
+
+from style_transfer.style_pack import get_multi_style_pack, get_style_vector
+from style_transfer.utils import crop_to_stride, export_cache_path, frame_to_input, model_cache_path, output_to_frame
+
+
+class OnnxStyleTransfer:
+    """Runs the style models with onnxruntime on the CPU.
+
+    Uses the onnx exports cached next to the models, which are created on demand.
+    With precision "int8" the models quantized by quantize_models.py are used where available.
+    All styles of a multi style pack share one session that gets the style as input, switching between them
+    only changes that input.
+    """
+
+    def __init__(self, style_model_path, precision="fp32", num_threads=None):
+        self.precision = precision
+        self.session_options = onnxruntime.SessionOptions()
+        if num_threads:
+            self.session_options.intra_op_num_threads = num_threads
+        self.session = None
+        self.loaded_onnx_path = None
+        self.style_vector = None
+        self.loaded_model_path = None
+        self.load_model(style_model_path)
+        self._load_model_internal()
+
+    def load_model(self, style_model_path, is_cancelled=None):
+        self.is_new_model = True
+        self.style_model_weights_path = style_model_path
+
+    def optimize_model(self, modelpath, is_cancelled=None):
+        """exports the onnx model if not cached"""
+        onnx_path = export_cache_path(modelpath, ".onnx")
+        if not os.path.isfile(onnx_path) and get_multi_style_pack(modelpath) is not None:
+            from style_transfer.multi_style import save_multi_style_to_onnx
+
+            save_multi_style_to_onnx(modelpath, onnx_path)
+        elif not os.path.isfile(onnx_path):
+            from style_transfer.transformer_net import TransformerNet
+            from style_transfer.utils import load_style_state_dict, save_model_to_onnx
+
+            style_model = TransformerNet()
+            style_model.load_state_dict(load_style_state_dict(modelpath))
+            save_model_to_onnx(style_model, onnx_path)
+        return True
+
+    def _get_onnx_path(self, modelpath):
+        if self.precision == "int8":
+            int8_onnx_path = model_cache_path(modelpath, ".int8.onnx")
+            if os.path.isfile(int8_onnx_path):
+                return int8_onnx_path
+            print("no int8 model for", modelpath, "using fp32. Create it with quantize_models.py")
+        self.optimize_model(modelpath)
+        return export_cache_path(modelpath, ".onnx")
+
+    def _load_model_internal(self):
+        self.is_new_model = False
+        onnx_path = self._get_onnx_path(self.style_model_weights_path)
+        if onnx_path != self.loaded_onnx_path:
+            self.session = onnxruntime.InferenceSession(onnx_path, self.session_options,
+                                                        providers=["CPUExecutionProvider"])
+            self.loaded_onnx_path = onnx_path
+        self.style_vector = None
+        if "style" in [session_input.name for session_input in self.session.get_inputs()]:
+            self.style_vector = get_style_vector(self.style_model_weights_path)
+        self.loaded_model_path = self.style_model_weights_path
+
+    def stylize(self, frame):
+        if self.is_new_model:
+            self._load_model_internal()
+
+        inputs = {"input": frame_to_input(crop_to_stride(frame))}
+        if self.style_vector is not None:
+            inputs["style"] = self.style_vector
+        output = self.session.run(None, inputs)[0]
+        return output_to_frame(output[0])
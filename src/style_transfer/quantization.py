@@ -0,0 +1,73 @@
+import torch
+
+from style_transfer.transformer_net import InferenceResidualBlock, InferenceTransformerNet
+
+
+class QuantizableResidualBlock(InferenceResidualBlock):
+    def __init__(self, channels):
+        super(QuantizableResidualBlock, self).__init__(channels)
+        # quantized tensors need an observed module for the addition
+        self.skip_add = torch.nn.quantized.FloatFunctional()
+
+    def forward(self, x):
+        out = self.relu(self.in1(self.conv1(x)))
+        out = self.in2(self.conv2(out))
+        return self.skip_add.add(out, x)
+
+
+class QuantizableTransformerNet(InferenceTransformerNet):
+    """InferenceTransformerNet prepared for eager mode static quantization, loads the same state_dicts"""
+
+    def __init__(self):
+        super(QuantizableTransformerNet, self).__init__()
+        self.res1 = QuantizableResidualBlock(128)
+        self.res2 = QuantizableResidualBlock(128)
+        self.res3 = QuantizableResidualBlock(128)
+        self.res4 = QuantizableResidualBlock(128)
+        self.res5 = QuantizableResidualBlock(128)
+        self.quant = torch.quantization.QuantStub()
+        self.dequant = torch.quantization.DeQuantStub()
+
+    def forward(self, x):
+        return self.dequant(super(QuantizableTransformerNet, self).forward(self.quant(x)))
+
+
+def _prepare(model, engine):
+    torch.backends.quantized.engine = engine
+    model.eval()
+    model.qconfig = torch.quantization.get_default_qconfig(engine)
+    return torch.quantization.prepare(model)
+
+
+def quantize_model(state_dict, calibration_inputs, engine="fbgemm"):
+    """INT8 model of a TransformerNet state_dict, calibrated on 1x3xHxW float inputs in the 0-255 range"""
+    model = QuantizableTransformerNet()
+    model.load_state_dict(state_dict)
+    model = _prepare(model, engine)
+    with torch.no_grad():
+        for model_input in calibration_inputs:
+            model(model_input)
+    return torch.quantization.convert(model)
+
+
+def load_quantized_model(path, engine="fbgemm"):
+    """loads the state_dict of a model created by quantize_model, quantized models only run on the cpu"""
+    model = torch.quantization.convert(_prepare(QuantizableTransformerNet(), engine))
+    model.load_state_dict(torch.load(path, map_location="cpu"))
+    return model
+
+
+def quantize_onnx_model(onnx_path, int8_onnx_path, calibration_inputs):
+    """static INT8 quantization of an exported style model for onnxruntime"""
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, quantize_static
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.inputs = iter(calibration_inputs)
+
+        def get_next(self):
+            model_input = next(self.inputs, None)
+            return None if model_input is None else {"input": model_input}
+
+    # the exported models use opset 10, which only has the QLinear operators
+    quantize_static(onnx_path, int8_onnx_path, FrameReader(), quant_format=QuantFormat.QOperator)
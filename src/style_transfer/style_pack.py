@@ -0,0 +1,146 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+# a style in a pack is addressed as <pack path>::<style name> wherever a model path is expected
+ENTRY_SEPARATOR = "::"
+PACK_ENDING = ".stylepack"
+MAGIC = b"STYLPACK"
+VERSION = 1
+# every style starts on its own page, so loading one only reads its own pages
+PAGE_SIZE = 4096
+TENSOR_ALIGNMENT = 64
+
+_open_packs = {}
+
+
+class StylePack:
+    """Weights of many styles in one file, read through a memory map.
+
+    Layout: MAGIC, the length of the index as little endian uint64, the JSON index and the tensor data starting
+    at the next page. The index lists per style the key, dtype, shape and offset (relative to the data start) of
+    its tensors. The weights are only read when a style is loaded and all processes mapping the same pack
+    share its pages in the page cache.
+    A multi style pack additionally has shared tensors that belong to every style, e.g. the convolutions of a
+    model distilled by distill_multi_style.py whose styles only differ in their instance norm parameters.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a style pack".format(path))
+            index_length = struct.unpack("<Q", f.read(8))[0]
+            index = json.loads(f.read(index_length).decode())
+        if index["version"] != VERSION:
+            raise ValueError("style pack {} has the unsupported version {}".format(path, index["version"]))
+        self.data_offset = _align(len(MAGIC) + 8 + index_length, PAGE_SIZE)
+        self.styles = {style["name"]: style for style in index["styles"]}
+        self.shared_tensors = index.get("shared", [])
+        self.is_multi_style = len(self.shared_tensors) > 0
+        self.buffer = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def get_style_names(self):
+        return list(self.styles)
+
+    def get_arrays(self, name, include_shared=True):
+        """read only views of the tensors of a style, nothing is read before they are accessed"""
+        if name not in self.styles:
+            raise KeyError("style {} is not in {}".format(name, self.path))
+        tensors = self.styles[name]["tensors"]
+        if include_shared:
+            tensors = self.shared_tensors + tensors
+        arrays = {}
+        for tensor in tensors:
+            start = self.data_offset + tensor["offset"]
+            dtype = np.dtype(tensor["dtype"])
+            count = int(np.prod(tensor["shape"], dtype=np.int64))
+            data = self.buffer[start:start + count * dtype.itemsize]
+            arrays[tensor["key"]] = data.view(dtype).reshape(tensor["shape"])
+        return arrays
+
+    def get_state_dict(self, name, include_shared=True):
+        """float32 state_dict of a style, float16 packs are converted"""
+        import torch
+
+        arrays = self.get_arrays(name, include_shared)
+        return {key: torch.from_numpy(np.array(array, dtype=np.float32)) for key, array in arrays.items()}
+
+
+def _align(offset, alignment):
+    return -(-offset // alignment) * alignment
+
+
+def open_style_pack(path):
+    """the pack of a path is only mapped once per process"""
+    path = os.path.abspath(path)
+    if path not in _open_packs:
+        _open_packs[path] = StylePack(path)
+    return _open_packs[path]
+
+
+def is_pack_entry(model_path):
+    return ENTRY_SEPARATOR in model_path
+
+
+def split_pack_entry(model_path):
+    """pack path and style name of an entry"""
+    pack_path, name = model_path.split(ENTRY_SEPARATOR, 1)
+    return pack_path, name
+
+
+def get_multi_style_pack(model_path):
+    """pack path of an entry of a multi style pack, None for any other model"""
+    if not is_pack_entry(model_path):
+        return None
+    pack_path = split_pack_entry(model_path)[0]
+    return pack_path if open_style_pack(pack_path).is_multi_style else None
+
+
+def get_style_vector(model_path):
+    """one hot vector of an entry of a multi style pack, the style input of the model exported for all its styles"""
+    pack_path, name = split_pack_entry(model_path)
+    names = open_style_pack(pack_path).get_style_names()
+    vector = np.zeros((1, len(names)), dtype=np.float32)
+    vector[0, names.index(name)] = 1
+    return vector
+
+
+def get_pack_entries(pack_path):
+    return [pack_path + ENTRY_SEPARATOR + name for name in open_style_pack(pack_path).get_style_names()]
+
+
+def write_style_pack(path, state_dicts, fp16=False, shared_state_dict=None):
+    """state_dicts maps style names to state_dicts, fp16 halves the size of the pack.
+    The tensors of shared_state_dict are part of every style"""
+    dtype = np.float16 if fp16 else np.float32
+    arrays = []
+    offset = 0
+
+    def add_tensors(state_dict):
+        nonlocal offset
+        offset = _align(offset, PAGE_SIZE)
+        tensors = []
+        for key, value in state_dict.items():
+            array = np.ascontiguousarray(value.detach().cpu().numpy(), dtype=dtype)
+            offset = _align(offset, TENSOR_ALIGNMENT)
+            tensors.append({"key": key, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+            arrays.append((offset, array))
+            offset += array.nbytes
+        return tensors
+
+    index = {"version": VERSION}
+    if shared_state_dict:
+        index["shared"] = add_tensors(shared_state_dict)
+    index["styles"] = [{"name": name, "tensors": add_tensors(state_dict)} for name, state_dict in state_dicts.items()]
+    index = json.dumps(index).encode()
+    data_offset = _align(len(MAGIC) + 8 + len(index), PAGE_SIZE)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(index)))
+        f.write(index)
+        for array_offset, array in arrays:
+            f.seek(data_offset + array_offset)
+            f.write(array.tobytes())
@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+import torch
+
+from geometry import FrameGeometry, blend_mask
+from style_transfer.utils import output_to_frame
+
+
+class SharedStatsInstanceNorm(torch.nn.Module):
+    """InstanceNorm2d that can normalize its input with statistics recorded from another input.
+
+    While recording it computes the statistics of its input like InstanceNorm2d and keeps them, otherwise it
+    reuses them. This way all tiles of a frame are normalized alike and do not show seams.
+    """
+
+    def __init__(self, norm):
+        super(SharedStatsInstanceNorm, self).__init__()
+        # the same parameters, so the state_dict keys do not change
+        self.weight = norm.weight
+        self.bias = norm.bias
+        self.eps = norm.eps
+        self.is_recording = True
+        self.scale = None
+        self.shift = None
+
+    def forward(self, x):
+        if self.is_recording:
+            var, mean = torch.var_mean(x, dim=(2, 3), keepdim=True, unbiased=False)
+            self.scale = self.weight.view(1, -1, 1, 1) * torch.rsqrt(var + self.eps)
+            self.shift = self.bias.view(1, -1, 1, 1) - mean * self.scale
+        return torch.addcmul(self.shift, x, self.scale)
+
+
+def share_instance_norm_statistics(model):
+    """replaces the InstanceNorm2d layers of a model in place by SharedStatsInstanceNorm layers"""
+    for name, module in list(model.named_children()):
+        if isinstance(module, torch.nn.InstanceNorm2d):
+            setattr(model, name, SharedStatsInstanceNorm(module))
+        else:
+            share_instance_norm_statistics(module)
+    return model
+
+
+def set_recording(model, is_recording):
+    for module in model.modules():
+        if isinstance(module, SharedStatsInstanceNorm):
+            module.is_recording = is_recording
+
+
+class TiledInference:
+    """Runs a style model over overlapping tiles, so the memory it needs depends on the tile size only.
+
+    The instance norm statistics are recorded on a copy of the frame downscaled to the area of one tile and
+    used for all tiles. Each tile is computed with margin pixels of context around it and cross-faded with its
+    upper and left neighbours over overlap pixels. Frames not larger than a tile are processed in one pass.
+    """
+
+    def __init__(self, model, device, tile_size=512, overlap=32, margin=32):
+        self.model = share_instance_norm_statistics(model)
+        self.device = device
+        self.tile_size = FrameGeometry.align(tile_size)
+        self.overlap = overlap
+        self.margin = margin
+
+    def is_tiled(self, frame):
+        return max(frame.shape[:2]) > self.tile_size
+
+    def stylize(self, frame):
+        """frame has to be aligned to the network stride"""
+        height, width = frame.shape[:2]
+        with torch.no_grad():
+            set_recording(self.model, True)
+            self.model(self._to_tensor(self._downscale(frame)))
+            set_recording(self.model, False)
+            try:
+                output = np.empty_like(frame)
+                for y0 in self._get_tile_starts(height):
+                    for x0 in self._get_tile_starts(width):
+                        self._stylize_tile(frame, output, x0, y0)
+            finally:
+                # untiled frames have to compute their own statistics again
+                set_recording(self.model, True)
+        return output
+
+    def _stylize_tile(self, frame, output, x0, y0):
+        height, width = frame.shape[:2]
+        x1, y1 = min(width, x0 + self.tile_size), min(height, y0 + self.tile_size)
+        context_x0, context_y0 = max(0, x0 - self.margin), max(0, y0 - self.margin)
+        context_x1, context_y1 = min(width, x1 + self.margin), min(height, y1 + self.margin)
+        styled = self.model(self._to_tensor(frame[context_y0:context_y1, context_x0:context_x1]))
+        tile = output_to_frame(styled[0].cpu().numpy())[y0 - context_y0:y1 - context_y0,
+                                                        x0 - context_x0:x1 - context_x0]
+        if x0 == 0 and y0 == 0:
+            output[y0:y1, x0:x1] = tile
+            return
+        # the upper and left neighbours are already written, the tile fades in over their overlap
+        mask = blend_mask(x1 - x0, y1 - y0, self.overlap, (x0 == 0, y0 == 0, True, True))
+        written = output[y0:y1, x0:x1].astype(np.float32)
+        output[y0:y1, x0:x1] = written + (tile.astype(np.float32) - written) * mask
+
+    def _get_tile_starts(self, length):
+        if length <= self.tile_size:
+            return [0]
+        starts = list(range(0, length - self.tile_size + 1, self.tile_size - self.overlap))
+        if starts[-1] + self.tile_size < length:
+            starts.append(length - self.tile_size)
+        return starts
+
+    def _downscale(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.tile_size / np.sqrt(height * width))
+        size = (FrameGeometry.align(width * scale), FrameGeometry.align(height * scale))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def _to_tensor(self, image):
+        # the permuted HxWxC image already has the channels_last layout
+        image = torch.from_numpy(np.ascontiguousarray(image)).to(self.device)
+        return image.permute(2, 0, 1).unsqueeze(0).float().contiguous(memory_format=torch.channels_last)
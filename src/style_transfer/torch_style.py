@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import torch
+
+from style_transfer.interpolation import StyleMixer
+from style_transfer.style_pack import is_pack_entry, open_style_pack, split_pack_entry
+from style_transfer.transformer_net import InferenceTransformerNet
+from style_transfer.utils import crop_to_stride, load_style_state_dict, model_cache_path, output_to_frame
+
+
+def create_fp32_model(state_dict, device, subpixel=True):
+    """the model the torch backend runs without int8: sub-pixel upsampling and channels_last, the fastest on the cpu"""
+    model = InferenceTransformerNet.from_state_dict(state_dict, subpixel=subpixel)
+    return model.to(device, memory_format=torch.channels_last)
+
+
+def to_channels_last(model_input):
+    """1x3xHxW float array as the tensor layout the torch backend feeds its models"""
+    return torch.from_numpy(model_input).contiguous(memory_format=torch.channels_last)
+
+
+class TorchStyleTransfer:
+    """Runs the style models with PyTorch, on the CPU if no GPU is available.
+
+    Offers the same interface as the tensorrt StyleTransfer but needs no model optimization in advance.
+    With precision "int8" the models quantized by quantize_models.py are used where available, on the CPU.
+    With a tile_size larger frames are processed in overlapping tiles of this size to bound the memory.
+    Switching between the styles of a multi style pack only replaces the instance norm parameters.
+    set_style_mix blends the weights of several styles into the loaded model.
+    num_threads sets the size of the intra op thread pool of the process.
+    """
+
+    def __init__(self, style_model_path, device=None, subpixel=True, precision="fp32", tile_size=None,
+                 num_threads=None):
+        if precision == "int8":
+            device = "cpu"
+        elif device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = torch.device(device)
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.precision = precision
+        self.subpixel = subpixel
+        self.tile_size = tile_size
+        self.tiled_inference = None
+        self.is_quantized = False
+        self.mixer = None
+        self.style_model = None
+        self.loaded_model_path = None
+        self.load_model(style_model_path)
+        self._load_model_internal()
+
+    def load_model(self, style_model_path, is_cancelled=None):
+        self.is_new_model = True
+        self.style_model_weights_path = style_model_path
+
+    def optimize_model(self, modelpath, is_cancelled=None):
+        # pytorch runs the checkpoints as they are
+        return True
+
+    def _load_model_internal(self):
+        self.is_new_model = False
+        # the loaded style replaces any mix
+        self.mixer = None
+        if self._switch_multi_style():
+            self.loaded_model_path = self.style_model_weights_path
+            return
+        int8_path = model_cache_path(self.style_model_weights_path, ".int8.pt")
+        is_quantized = self.precision == "int8" and os.path.isfile(int8_path)
+        self.is_quantized = is_quantized
+        if is_quantized:
+            from style_transfer.quantization import load_quantized_model
+            style_model = load_quantized_model(int8_path)
+        else:
+            if self.precision == "int8":
+                print("no int8 model for", self.style_model_weights_path,
+                      "using fp32. Create it with quantize_models.py")
+            style_model = self._create_model(self.style_model_weights_path)
+        self.style_model = style_model.to(self.device, memory_format=torch.channels_last)
+        self.tiled_inference = None
+        # the quantized layers cannot share statistics, quantized models always run untiled
+        if self.tile_size and not is_quantized:
+            from style_transfer.tiling import TiledInference
+            self.tiled_inference = TiledInference(self.style_model, self.device, self.tile_size)
+        self.loaded_model_path = self.style_model_weights_path
+
+    def _create_model(self, style_model_path):
+        return create_fp32_model(load_style_state_dict(style_model_path), self.device, self.subpixel)
+
+    def set_style_mix(self, style_model_paths, weights):
+        """the loaded model becomes the weighted mix of the styles, changing only the weights is cheap"""
+        if self.is_new_model:
+            self._load_model_internal()
+        if self.precision == "int8":
+            raise ValueError("styles cannot be mixed with int8 precision")
+        key = tuple(style_model_paths)
+        if self.mixer is None or self.mixer.key != key:
+            # in the layout of the loaded model, the sub-pixel conversion is linear so it can be mixed as well
+            state_dicts = [self._create_model(path).state_dict() for path in style_model_paths]
+            self.mixer = StyleMixer(self.style_model, state_dicts, key)
+        self.mixer.set_weights(weights)
+
+    def _switch_multi_style(self):
+        """the styles of a multi style pack share their convolutions, so only the few kilobytes of instance norm
+        parameters have to be copied into the loaded model. Returns False if the model has to be loaded"""
+        if self.style_model is None or self.precision == "int8" or self.loaded_model_path is None or \
+                not is_pack_entry(self.style_model_weights_path) or not is_pack_entry(self.loaded_model_path):
+            return False
+        pack_path, name = split_pack_entry(self.style_model_weights_path)
+        style_pack = open_style_pack(pack_path)
+        if pack_path != split_pack_entry(self.loaded_model_path)[0] or not style_pack.is_multi_style:
+            return False
+        self.style_model.load_state_dict(style_pack.get_state_dict(name, include_shared=False), strict=False)
+        return True
+
+    def stylize(self, frame):
+        if self.is_new_model:
+            self._load_model_internal()
+
+        if self.tiled_inference is not None and self.tiled_inference.is_tiled(frame):
+            return self.tiled_inference.stylize(np.ascontiguousarray(crop_to_stride(frame)))
+        with torch.no_grad():
+            # the permuted HxWxC frame already has the channels_last layout
+            content_image = torch.from_numpy(np.ascontiguousarray(crop_to_stride(frame))).to(self.device)
+            content_image = content_image.permute(2, 0, 1).unsqueeze(0).float()
+            output = self.style_model(content_image.contiguous(memory_format=torch.channels_last))
+        return output_to_frame(output[0].cpu().numpy())
+
+    def stylize_with_shared_statistics(self, frame, is_recording):
+        """stylizes crops of a frame: with is_recording the instance norms keep the statistics of the frame,
+        without they normalize with the kept statistics, so a crop matches the frame around it.
+        Quantized and tiled models normalize every input by itself"""
+        if self.is_new_model:
+            self._load_model_internal()
+        if self.is_quantized or self.tiled_inference is not None:
+            return self.stylize(frame)
+        from style_transfer.tiling import set_recording, share_instance_norm_statistics
+        # replaces the instance norms only once, while recording they normalize like the replaced ones
+        share_instance_norm_statistics(self.style_model)
+        set_recording(self.style_model, is_recording)
+        try:
+            return self.stylize(frame)
+        finally:
+            set_recording(self.style_model, True)
@@ -100,3 +100,140 @@ class UpsampleConvLayer(torch.nn.Module):
         out = self.reflection_pad(x_in)
         out = self.conv2d(out)
         return out
+
+
+class InferenceTransformerNet(torch.nn.Module):
+    """Inference only variant of TransformerNet that loads the same state_dicts.
+
+    The convolutions pad by themselves instead of running a separate ZeroPad2d, activations are computed
+    in place and fuse_subpixel() turns the nearest upsampling + convolution layers into equivalent sub-pixel
+    convolutions. The results match TransformerNet up to floating point rounding.
+    On the CPU it is fastest in channels_last memory format.
+    """
+
+    def __init__(self):
+        super(InferenceTransformerNet, self).__init__()
+        # Initial convolution layers
+        self.conv1 = PaddedConvLayer(3, 32, kernel_size=9, stride=1)
+        self.in1 = torch.nn.InstanceNorm2d(32, affine=True)
+        self.conv2 = PaddedConvLayer(32, 64, kernel_size=3, stride=2)
+        self.in2 = torch.nn.InstanceNorm2d(64, affine=True)
+        self.conv3 = PaddedConvLayer(64, 128, kernel_size=3, stride=2)
+        self.in3 = torch.nn.InstanceNorm2d(128, affine=True)
+        # Residual layers
+        self.res1 = InferenceResidualBlock(128)
+        self.res2 = InferenceResidualBlock(128)
+        self.res3 = InferenceResidualBlock(128)
+        self.res4 = InferenceResidualBlock(128)
+        self.res5 = InferenceResidualBlock(128)
+        # Upsampling Layers
+        self.deconv1 = PaddedUpsampleConvLayer(128, 64, kernel_size=3, stride=1, upsample=2)
+        self.in4 = torch.nn.InstanceNorm2d(64, affine=True)
+        self.deconv2 = PaddedUpsampleConvLayer(64, 32, kernel_size=3, stride=1, upsample=2)
+        self.in5 = torch.nn.InstanceNorm2d(32, affine=True)
+        self.deconv3 = PaddedConvLayer(32, 3, kernel_size=9, stride=1)
+        # Non-linearities
+        self.relu = torch.nn.ReLU(inplace=True)
+
+    @classmethod
+    def from_state_dict(cls, state_dict, subpixel=False):
+        """state_dict of a TransformerNet, without the running statistics of the instance norms"""
+        model = cls()
+        model.load_state_dict(state_dict)
+        if subpixel:
+            model.fuse_subpixel()
+        return model.eval()
+
+    def fuse_subpixel(self):
+        """converts the upsampling layers in place, the state_dict is not compatible to TransformerNet anymore"""
+        self.deconv1.fuse_subpixel()
+        self.deconv2.fuse_subpixel()
+        return self
+
+    def forward(self, x):
+        y = self.relu(self.in1(self.conv1(x)))
+        y = self.relu(self.in2(self.conv2(y)))
+        y = self.relu(self.in3(self.conv3(y)))
+        y = self.res1(y)
+        y = self.res2(y)
+        y = self.res3(y)
+        y = self.res4(y)
+        y = self.res5(y)
+        y = self.relu(self.in4(self.deconv1(y)))
+        y = self.relu(self.in5(self.deconv2(y)))
+        y = self.deconv3(y)
+        return y
+
+
+class PaddedConvLayer(torch.nn.Module):
+    """ConvLayer with the zero padding done by the convolution"""
+
+    def __init__(self, in_channels, out_channels, kernel_size, stride):
+        super(PaddedConvLayer, self).__init__()
+        self.conv2d = torch.nn.Conv2d(in_channels, out_channels, kernel_size, stride, padding=kernel_size // 2)
+
+    def forward(self, x):
+        return self.conv2d(x)
+
+
+class InferenceResidualBlock(torch.nn.Module):
+    """ResidualBlock with the zero padding done by the convolutions and in place operations"""
+
+    def __init__(self, channels):
+        super(InferenceResidualBlock, self).__init__()
+        self.conv1 = PaddedConvLayer(channels, channels, kernel_size=3, stride=1)
+        self.in1 = torch.nn.InstanceNorm2d(channels, affine=True)
+        self.conv2 = PaddedConvLayer(channels, channels, kernel_size=3, stride=1)
+        self.in2 = torch.nn.InstanceNorm2d(channels, affine=True)
+        self.relu = torch.nn.ReLU(inplace=True)
+
+    def forward(self, x):
+        out = self.relu(self.in1(self.conv1(x)))
+        out = self.in2(self.conv2(out))
+        out += x
+        return out
+
+
+class PaddedUpsampleConvLayer(torch.nn.Module):
+    """UpsampleConvLayer with the zero padding done by the convolution.
+
+    After fuse_subpixel() the convolution runs on the input before upsampling and computes all
+    upsample x upsample output phases at once, which are then rearranged by pixel_shuffle.
+    This is exact, nearest upsampling only repeats pixels, so every phase sees a fixed combination of
+    the kernel rows and columns.
+    """
+
+    def __init__(self, in_channels, out_channels, kernel_size, stride, upsample=None):
+        super(PaddedUpsampleConvLayer, self).__init__()
+        self.upsample = upsample
+        self.is_subpixel = False
+        self.conv2d = torch.nn.Conv2d(in_channels, out_channels, kernel_size, stride, padding=kernel_size // 2)
+
+    def fuse_subpixel(self):
+        if self.is_subpixel or not self.upsample:
+            return
+        if self.upsample != 2 or self.conv2d.kernel_size != (3, 3) or self.conv2d.stride != (1, 1):
+            raise ValueError("sub-pixel conversion is only implemented for 3x3 kernels and upsample=2")
+        weight = self.conv2d.weight.data
+        # mix[phase, new kernel row, old kernel row]: for even output rows the upper kernel row reads the input row
+        # above and the two lower rows read the same input row, for odd output rows it is the other way round
+        mix = weight.new_tensor([
+            [[1, 0, 0], [0, 1, 1], [0, 0, 0]],
+            [[0, 0, 0], [1, 1, 0], [0, 0, 1]],
+        ])
+        out_channels, in_channels = weight.shape[:2]
+        # channel order expected by pixel_shuffle: out_channel * 4 + row phase * 2 + column phase
+        fused_weight = torch.einsum("ark,oikl,bsl->oabirs", mix, weight, mix)
+        fused_weight = fused_weight.reshape(out_channels * 4, in_channels, 3, 3)
+        fused = torch.nn.Conv2d(in_channels, out_channels * 4, 3, 1, padding=1)
+        fused.weight.data.copy_(fused_weight)
+        fused.bias.data.copy_(self.conv2d.bias.data.repeat_interleave(4))
+        self.conv2d = fused.to(weight.device)
+        self.is_subpixel = True
+
+    def forward(self, x):
+        if self.is_subpixel:
+            return torch.nn.functional.pixel_shuffle(self.conv2d(x), self.upsample)
+        if self.upsample:
+            x = torch.nn.functional.interpolate(x, mode='nearest', scale_factor=self.upsample)
+        return self.conv2d(x)
@@ -1,3 +1,17 @@
+import os
+import re
+
+import numpy as np
+
+
+# the style networks downsample by this factor, their inputs have to be a multiple of it
+STRIDE = 8
+
+
+def crop_to_stride(image):
+    """HxWxC image cropped to a multiple of the stride, frames prepared by FrameGeometry are only viewed"""
+    h, w = image.shape[:2]
+    return image[:h // STRIDE * STRIDE, :w // STRIDE * STRIDE]
 
 
 def gram_matrix(y):
@@ -14,3 +28,105 @@ def normalize_batch(batch):
     std = batch.new_tensor([0.229, 0.224, 0.225]).view(-1, 1, 1)
     batch = batch.div_(255.0)
     return (batch - mean) / std
+
+
+def _get_computed_features(vgg, output, reference):
+    """pairs of the Vgg16 features of both batches, without the layers after the last_layer of vgg"""
+    features = vgg(normalize_batch(output.clone()))
+    reference_features = vgg(normalize_batch(reference.clone()))
+    return [(feature, reference_feature) for feature, reference_feature in zip(features, reference_features)
+            if feature is not None]
+
+
+def perceptual_distance(vgg, output, reference):
+    """distance of the Vgg16 features of two Nx3xHxW batches in the 0-255 range, relative to the reference features"""
+    features = _get_computed_features(vgg, output, reference)
+    distance = 0
+    for feature, reference_feature in features:
+        distance += ((feature - reference_feature) ** 2).mean() / (reference_feature ** 2).mean()
+    return (distance / len(features)).item()
+
+
+def style_distance(vgg, output, reference):
+    """distance of the Gram matrices of the Vgg16 features of two batches, relative to the reference Gram matrices"""
+    features = _get_computed_features(vgg, output, reference)
+    distance = 0
+    for feature, reference_feature in features:
+        gram, reference_gram = gram_matrix(feature), gram_matrix(reference_feature)
+        distance += ((gram - reference_gram) ** 2).mean() / (reference_gram ** 2).mean()
+    return (distance / len(features)).item()
+
+
+def load_style_state_dict(style_model_path):
+    """state_dict of a saved TransformerNet without the unused running statistics of old checkpoints.
+    style_model_path can also be a <pack path>::<style name> entry of a style pack"""
+    from style_transfer.style_pack import is_pack_entry, open_style_pack, split_pack_entry
+
+    if is_pack_entry(style_model_path):
+        pack_path, name = split_pack_entry(style_model_path)
+        return open_style_pack(pack_path).get_state_dict(name)
+
+    import torch
+
+    state_dict = torch.load(style_model_path, map_location="cpu")
+    for k in list(state_dict.keys()):
+        if re.search(r'in\d+\.running_(mean|var)$', k):
+            del state_dict[k]
+    return state_dict
+
+
+def model_cache_path(model_path, suffix):
+    """path of a file derived from a style model, e.g. its onnx export or tensorrt engine"""
+    from style_transfer.style_pack import is_pack_entry, split_pack_entry
+
+    if is_pack_entry(model_path):
+        # next to the pack, with the style name in the file name
+        pack_path, name = split_pack_entry(model_path)
+        return model_cache_path(pack_path, "." + name.replace(os.sep, "_") + suffix)
+    return "." + "".join(model_path.split(".")[:-1]) + suffix
+
+
+def export_cache_path(model_path, suffix):
+    """like model_cache_path, but all styles of a multi style pack share one export that takes the style as input"""
+    from style_transfer.style_pack import get_multi_style_pack
+
+    pack_path = get_multi_style_pack(model_path)
+    if pack_path is not None:
+        return model_cache_path(pack_path, ".multi" + suffix)
+    return model_cache_path(model_path, suffix)
+
+
+def save_model_to_onnx(model, path, input_shape=(1, 3, 720, 1280), example_input=None, input_names=("input",)):
+    import onnx
+    import torch.onnx
+
+    if example_input is None:
+        example_input = torch.ones(*input_shape)
+    torch.onnx.export(
+        model,
+        example_input,
+        path,
+        export_params=True,
+        # do_constant_folding=True,
+        input_names=list(input_names),  # Pass names as per model input name
+        output_names=['output'],  ## Pass names as per model output name
+        opset_version=10,  # export the model to the  opset version of the onnx submodule.
+        dynamic_axes={  # this will makes export more generalize to take batch for prediction
+            'input': [2, 3],
+            # 'output': {0: 'batch'},
+        }
+
+    )
+    onnx_model = onnx.load(path)
+    onnx.checker.check_model(onnx_model)
+    print("saved model onnx to: ", path)
+
+
+def frame_to_input(frame):
+    """HxWx3 uint8 frame to the contiguous 1x3xHxW float32 array in the 0-255 range the models expect"""
+    return np.ascontiguousarray(frame.transpose(2, 0, 1)[np.newaxis], dtype=np.float32)
+
+
+def output_to_frame(output):
+    """3xHxW model output to a HxWx3 uint8 frame, the channel order is reversed like the input was"""
+    return np.clip(output[::-1].transpose(1, 2, 0), 0, 255).astype(np.uint8)
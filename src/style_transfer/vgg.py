@@ -3,36 +3,37 @@ from collections import namedtuple
 import torch
 from torchvision import models
 
+LAYERS = ("relu1_2", "relu2_2", "relu3_3", "relu4_3")
+VggOutputs = namedtuple("VggOutputs", LAYERS)
+# indices into vgg16.features where the slices ending at the layers start and end
+SLICE_BOUNDS = (0, 4, 9, 16, 23)
+
 
 class Vgg16(torch.nn.Module):
-    def __init__(self, requires_grad=False):
+    def __init__(self, requires_grad=False, weights_path=None, last_layer="relu4_3"):
+        """weights_path is a local copy of the torchvision vgg16 weights, otherwise they are downloaded.
+        The slices after last_layer are not built, their outputs are None"""
         super(Vgg16, self).__init__()
-        vgg_pretrained_features = models.vgg16(pretrained=True).features
-        self.slice1 = torch.nn.Sequential()
-        self.slice2 = torch.nn.Sequential()
-        self.slice3 = torch.nn.Sequential()
-        self.slice4 = torch.nn.Sequential()
-        for x in range(4):
-            self.slice1.add_module(str(x), vgg_pretrained_features[x])
-        for x in range(4, 9):
-            self.slice2.add_module(str(x), vgg_pretrained_features[x])
-        for x in range(9, 16):
-            self.slice3.add_module(str(x), vgg_pretrained_features[x])
-        for x in range(16, 23):
-            self.slice4.add_module(str(x), vgg_pretrained_features[x])
+        vgg = models.vgg16(pretrained=weights_path is None)
+        if weights_path is not None:
+            vgg.load_state_dict(torch.load(weights_path, map_location="cpu"))
+        vgg_pretrained_features = vgg.features
+        self.num_slices = LAYERS.index(last_layer) + 1
+        for number in range(self.num_slices):
+            layer_slice = torch.nn.Sequential()
+            for x in range(SLICE_BOUNDS[number], SLICE_BOUNDS[number + 1]):
+                layer_slice.add_module(str(x), vgg_pretrained_features[x])
+            setattr(self, "slice{}".format(number + 1), layer_slice)
         if not requires_grad:
             for param in self.parameters():
                 param.requires_grad = False
 
-    def forward(self, X):
-        h = self.slice1(X)
-        h_relu1_2 = h
-        h = self.slice2(h)
-        h_relu2_2 = h
-        h = self.slice3(h)
-        h_relu3_3 = h
-        h = self.slice4(h)
-        h_relu4_3 = h
-        vgg_outputs = namedtuple("VggOutputs", ['relu1_2', 'relu2_2', 'relu3_3', 'relu4_3'])
-        out = vgg_outputs(h_relu1_2, h_relu2_2, h_relu3_3, h_relu4_3)
-        return out
+    def forward(self, X, last_layer=None):
+        """last_layer stops early when the deeper features are not needed"""
+        num_slices = self.num_slices if last_layer is None else LAYERS.index(last_layer) + 1
+        outputs = [None] * len(LAYERS)
+        h = X
+        for number in range(num_slices):
+            h = getattr(self, "slice{}".format(number + 1))(h)
+            outputs[number] = h
+        return VggOutputs(*outputs)
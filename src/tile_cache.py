@@ -0,0 +1,135 @@
+import numpy as np
+
+from geometry import blend_mask
+from metrics import metrics
+from style_transfer.utils import STRIDE
+
+
+class TileCache:
+    """Reuses the stylized output of tiles whose input did not change.
+
+    The noise suppression of FakeCam replaces pixels that changed by less than the noise epsilon with their
+    previous value, so a static background arrives bit identical frame after frame. A tile is recomputed once more
+    than change_share of its pixels differ from the input its cached output was computed from. All changed tiles
+    are stylized together in one crop with margin pixels of context around them and blended into the cache with
+    a feathered overlap. If the crop would cover most of the frame, and every refresh_interval frames to renew the
+    image statistics of the instance normalization, the whole frame is stylized.
+
+    Crops are grown to min_crop_size, the tensorrt engines do not accept arbitrarily small inputs. Stylers with
+    stylize_with_shared_statistics normalize the crops with the statistics of the last whole frame, so recomputed
+    tiles match the cached ones around them. The other stylers normalize every crop by itself, a crop with other
+    content than the frame can differ in contrast and colour from its neighbours, which the overlap only softens
+    until the next refresh.
+    """
+
+    def __init__(self, tile_size=128, overlap=16, margin=32, change_share=0.01, max_crop_share=0.5,
+                 refresh_interval=60, min_crop_size=128):
+        # all sizes are multiples of the network stride, so crops of aligned frames are not cropped by the styler
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.margin = max(margin, overlap)
+        self.change_share = change_share
+        self.max_crop_share = max_crop_share
+        self.refresh_interval = refresh_interval
+        self.min_crop_size = min_crop_size
+        self.output = None
+        self.reference = None
+        self.context = None
+        self.frames_since_refresh = 0
+        self.tile_areas = None
+        self.hits = 0
+        self.lookups = 0
+
+    def stylize(self, styler, frame, context=None):
+        """the styler is called with the whole frame or a crop of it. A change of context, e.g. another style,
+        invalidates the cache"""
+        self.frames_since_refresh += 1
+        if self.output is None or self.output.shape != frame.shape or context != self.context or \
+                self.frames_since_refresh >= self.refresh_interval:
+            return self._refresh(styler, frame, context)
+        changed = self._get_changed_tiles(frame)
+        changed_count = np.count_nonzero(changed)
+        if changed_count == 0:
+            self._count(changed.size, changed.size)
+            # never modified afterwards, the next update works on a copy
+            return self.output
+
+        height, width = frame.shape[:2]
+        rows, columns = np.nonzero(changed)
+        x0, x1 = self._grow(max(0, columns.min() * self.tile_size - self.margin),
+                            min(width, (columns.max() + 1) * self.tile_size + self.margin), width)
+        y0, y1 = self._grow(max(0, rows.min() * self.tile_size - self.margin),
+                            min(height, (rows.max() + 1) * self.tile_size + self.margin), height)
+        if (x1 - x0) * (y1 - y0) > self.max_crop_share * width * height:
+            return self._refresh(styler, frame, context)
+        self._count(changed.size - changed_count, changed.size)
+        styled = self._stylize(styler, frame[y0:y1, x0:x1], is_whole_frame=False)
+
+        output = self.output.copy()
+        for row, column in zip(rows, columns):
+            tile_x0, tile_y0 = column * self.tile_size, row * self.tile_size
+            tile_x1, tile_y1 = min(width, tile_x0 + self.tile_size), min(height, tile_y0 + self.tile_size)
+            # the tile is written completely, its overlap with the neighbours is blended
+            blend_x0, blend_y0 = max(0, tile_x0 - self.overlap), max(0, tile_y0 - self.overlap)
+            blend_x1, blend_y1 = min(width, tile_x1 + self.overlap), min(height, tile_y1 + self.overlap)
+            mask = blend_mask(int(blend_x1 - blend_x0), int(blend_y1 - blend_y0), self.overlap,
+                              (blend_x0 == 0, blend_y0 == 0, blend_x1 == width, blend_y1 == height))
+            cached = output[blend_y0:blend_y1, blend_x0:blend_x1].astype(np.float32)
+            tile = styled[blend_y0 - y0:blend_y1 - y0, blend_x0 - x0:blend_x1 - x0]
+            output[blend_y0:blend_y1, blend_x0:blend_x1] = cached + (tile.astype(np.float32) - cached) * mask
+            self.reference[tile_y0:tile_y1, tile_x0:tile_x1] = frame[tile_y0:tile_y1, tile_x0:tile_x1]
+        self.output = output
+        return output
+
+    def _refresh(self, styler, frame, context):
+        tile_count = self._get_tile_areas(frame.shape[1], frame.shape[0]).size
+        self._count(0, tile_count)
+        self.output = self._stylize(styler, frame, is_whole_frame=True)
+        self.reference = frame.copy()
+        self.context = context
+        self.frames_since_refresh = 0
+        return self.output
+
+    @staticmethod
+    def _stylize(styler, image, is_whole_frame):
+        if hasattr(styler, "stylize_with_shared_statistics"):
+            return styler.stylize_with_shared_statistics(image, is_recording=is_whole_frame)
+        return styler.stylize(image)
+
+    def _grow(self, start, end, length):
+        """widens start:end around its center to min_crop_size, within 0:length and aligned to the network stride.
+        Frames below min_crop_size are covered completely"""
+        size = min(length, max(end - start, self.min_crop_size))
+        if size == end - start:
+            return start, end
+        start = int(np.clip((start + end - size) // 2, 0, length - size)) // STRIDE * STRIDE
+        return start, start + size
+
+    def _get_tile_areas(self, width, height):
+        if self.tile_areas is None or self.tile_areas.shape != self._get_grid_shape(width, height):
+            self.tile_areas = self._count_per_tile(np.ones((height, width), dtype=bool))
+        return self.tile_areas
+
+    def _get_grid_shape(self, width, height):
+        return -(-height // self.tile_size), -(-width // self.tile_size)
+
+    def _count_per_tile(self, mask):
+        height, width = mask.shape
+        rows, columns = self._get_grid_shape(width, height)
+        padded = np.zeros((rows * self.tile_size, columns * self.tile_size), dtype=np.int32)
+        padded[:height, :width] = mask
+        return padded.reshape(rows, self.tile_size, columns, self.tile_size).sum(axis=(1, 3))
+
+    def _get_changed_tiles(self, frame):
+        changed_pixels = (frame != self.reference).any(axis=2)
+        areas = self._get_tile_areas(frame.shape[1], frame.shape[0])
+        return self._count_per_tile(changed_pixels) > self.change_share * areas
+
+    def _count(self, hits, lookups):
+        # numpy counts are no json numbers, the metrics are sent to the clients as json
+        hits, lookups = int(hits), int(lookups)
+        self.hits += hits
+        self.lookups += lookups
+        metrics.increment("tile_cache_hits", hits)
+        metrics.increment("tile_cache_lookups", lookups)
+        metrics.set("tile_cache_hit_rate", round(self.hits / max(1, self.lookups), 3))
@@ -0,0 +1,308 @@
+import contextlib
+import hashlib
+import os
+import time
+from argparse import ArgumentParser
+
+import cv2
+import numpy as np
+import torch
+
+from style_transfer.feature_store import FeatureStore
+from style_transfer.transformer_net import TransformerNet
+from style_transfer.utils import gram_matrix, load_style_state_dict, normalize_batch
+from style_transfer.vgg import LAYERS, Vgg16
+
+IMAGE_ENDINGS = (".jpg", ".jpeg", ".png")
+# defaults that differ between training a style model and the decoder of the adain backend, the latter as in the paper
+MODE_DEFAULTS = {
+    False: {"output": "./data/style_transfer_models/new_style.pth", "content_weight": 1e5, "style_weight": 1e10,
+            "lr": 1e-3},
+    True: {"output": "./data/adain/decoder.pth", "content_weight": 1.0, "style_weight": 10.0, "lr": 1e-4},
+}
+
+
+def parse_args():
+    parser = ArgumentParser(description="Trains a new style model, or fine-tunes one with -m, with the perceptual \
+                            losses of fast neural style. The Gram matrices of the style image are computed once and \
+                            the Vgg16 features of the content images are cached on disk, so after the first epoch \
+                            every step only runs the style network and one Vgg16 pass. With --adain it trains the \
+                            decoder of the adain backend instead, which applies any style image.")
+    parser.add_argument("style_image", help="Image whose style is learned, with --adain a folder which (subfolders) "
+                                            "contains many style images, e.g. WikiArt")
+    parser.add_argument("--adain", action="store_true",
+                        help="train the decoder of the adain backend for its Vgg16 encoder, -m continues a decoder")
+    parser.add_argument("-d", "--dataset", default="./data/train2014",
+                        help="Folder which (subfolders) contains the content images, e.g. COCO 2014")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Path of the trained model, defaults to ./data/style_transfer_models/new_style.pth and "
+                             "with --adain to ./data/adain/decoder.pth")
+    parser.add_argument("-m", "--model", default=None, help="Style model to fine-tune instead of starting anew")
+    parser.add_argument("--vgg-weights", default=None,
+                        help="Local copy of the torchvision vgg16 weights, otherwise they are downloaded")
+    parser.add_argument("--cache-dir", default="./data/feature_cache",
+                        help="Folder of the content image and feature caches, they are reused by later runs with "
+                             "the same images. Each image takes about 4 MB at the default image size")
+    parser.add_argument("--epochs", default=2, type=int, help="passes over the content images")
+    parser.add_argument("--max-images", default=None, type=int, help="only use this many content images")
+    parser.add_argument("--batch-size", default=4, type=int, help="content images per step")
+    parser.add_argument("--image-size", default=256, type=int, help="size of the square content crops")
+    parser.add_argument("--style-size", default=None, type=int, help="short side of the style image, default as is")
+    parser.add_argument("--content-weight", default=None, type=float,
+                        help="weight of the content loss, defaults to 1e5 and with --adain to 1")
+    parser.add_argument("--style-weight", default=None, type=float,
+                        help="weight of the style loss, defaults to 1e10 and with --adain to 10")
+    parser.add_argument("--content-layer", default="relu2_2", choices=LAYERS, help="Vgg16 layer of the content loss")
+    parser.add_argument("--style-layers", default=list(LAYERS), nargs="+", choices=LAYERS,
+                        help="Vgg16 layers of the style loss, deeper layers than needed are not computed")
+    parser.add_argument("--lr", default=None, type=float,
+                        help="learning rate, defaults to 1e-3 and with --adain to 1e-4")
+    parser.add_argument("--amp", default="auto", choices=["auto", "on", "off"],
+                        help="mixed precision, auto uses float16 on cuda only, on uses bfloat16 on the cpu, which "
+                             "needs torch 1.10")
+    parser.add_argument("--device", default=None, help="torch device, defaults to cuda if available")
+    parser.add_argument("--log-interval", default=100, type=int, help="steps between two progress reports")
+    parser.add_argument("--checkpoint-interval", default=2000, type=int,
+                        help="steps between two saves of the model to the output path")
+    args = parser.parse_args()
+    for name, value in MODE_DEFAULTS[args.adain].items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    return args
+
+
+def list_images(image_dir, max_images):
+    paths = []
+    for dir_path, dir_names, file_names in os.walk(image_dir):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(IMAGE_ENDINGS):
+                paths.append(os.path.join(dir_path, file_name))
+    if len(paths) == 0:
+        raise Exception("no images found in " + image_dir)
+    return paths[:max_images]
+
+
+def load_content_image(path, image_size):
+    """RGB crop of the center with the short side scaled to image_size, like the original training"""
+    image = cv2.imread(path)
+    height, width = image.shape[:2]
+    scale = image_size / min(height, width)
+    image = cv2.resize(image, (max(image_size, round(width * scale)), max(image_size, round(height * scale))),
+                       interpolation=cv2.INTER_AREA)
+    top = (image.shape[0] - image_size) // 2
+    left = (image.shape[1] - image_size) // 2
+    return cv2.cvtColor(image[top:top + image_size, left:left + image_size], cv2.COLOR_BGR2RGB)
+
+
+def to_batch(images, device):
+    return torch.from_numpy(np.stack(images)).permute(0, 3, 1, 2).float().to(device)
+
+
+def get_style_grams(vgg, args, device):
+    style = cv2.cvtColor(cv2.imread(args.style_image), cv2.COLOR_BGR2RGB)
+    if args.style_size:
+        scale = args.style_size / min(style.shape[:2])
+        style = cv2.resize(style, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    with torch.no_grad():
+        features = vgg(normalize_batch(to_batch([style], device)))
+    return {layer: gram_matrix(getattr(features, layer).float()) for layer in args.style_layers}
+
+
+def get_list_key(image_paths):
+    return hashlib.sha1("\n".join(image_paths).encode()).hexdigest()
+
+
+def create_image_cache(args, image_paths, name="images"):
+    """store for the decoded crops of the images, keyed by the image list"""
+    os.makedirs(args.cache_dir, exist_ok=True)
+    return FeatureStore(os.path.join(args.cache_dir, "{}_{}.cache".format(name, args.image_size)), len(image_paths),
+                        (args.image_size, args.image_size, 3), np.uint8, get_list_key(image_paths))
+
+
+def load_images(indices, image_paths, images, device):
+    """batch of the crops of the images, decoded on a cache miss"""
+    for index in indices:
+        if not images.is_filled[index]:
+            images.put(index, load_content_image(image_paths[index], images.data.shape[1]))
+    return to_batch([images.data[index] for index in indices], device)
+
+
+def create_caches(vgg, args, image_paths, device):
+    """stores for the decoded content crops and their content features, both keyed by the image list"""
+    images = create_image_cache(args, image_paths)
+    with torch.no_grad():
+        probe = vgg(torch.zeros((1, 3, args.image_size, args.image_size), device=device),
+                    last_layer=args.content_layer)
+    feature_shape = tuple(getattr(probe, args.content_layer).shape[1:])
+    # the features are only a loss target, half precision is plenty
+    feature_key = "{} {} {}".format(get_list_key(image_paths), args.content_layer, args.vgg_weights)
+    feature_path = os.path.join(args.cache_dir, "features_{}_{}.cache".format(args.image_size, args.content_layer))
+    features = FeatureStore(feature_path, len(image_paths), feature_shape, np.float16, feature_key)
+    return images, features
+
+
+def load_batch(indices, image_paths, images, features, vgg, args, device):
+    """content images and their features, taken from the caches and computed on a miss"""
+    x = load_images(indices, image_paths, images, device)
+    missing = [position for position, index in enumerate(indices) if not features.is_filled[index]]
+    if missing:
+        with torch.no_grad():
+            missing_features = getattr(vgg(normalize_batch(x[missing].clone()), last_layer=args.content_layer),
+                                       args.content_layer)
+        for position, feature in zip(missing, missing_features.float().cpu().numpy()):
+            features.put(indices[position], feature)
+    content_features = torch.from_numpy(np.stack([features.data[index] for index in indices]))
+    return x, content_features.to(device).float()
+
+
+def autocast(device, is_amp):
+    """float16 on cuda, bfloat16 on the cpu. torch.cuda.amp.autocast also works with torch 1.8"""
+    if device.type == "cuda":
+        return torch.cuda.amp.autocast(enabled=is_amp)
+    if not is_amp:
+        return contextlib.nullcontext()
+    return torch.autocast("cpu", dtype=torch.bfloat16)
+
+
+def train(args, module, item_count, compute_losses, save, scaler):
+    """the optimization loop of both modes. compute_losses returns the weighted content and style loss of the
+    items at the indices, save writes the module and is called every checkpoint_interval steps"""
+    optimizer = torch.optim.Adam(module.parameters(), args.lr)
+    step = 0
+    for epoch in range(args.epochs):
+        order = np.random.permutation(item_count)
+        content_sum = style_sum = 0
+        # batches in the sums, an epoch rarely ends right after a report
+        batch_count = 0
+        image_count = 0
+        t0 = time.monotonic()
+        for start in range(0, len(order) - args.batch_size + 1, args.batch_size):
+            # sorted, the caches are read in file order
+            indices = np.sort(order[start:start + args.batch_size])
+            content_loss, style_loss = compute_losses(indices)
+            loss = content_loss + style_loss
+            optimizer.zero_grad()
+            scaler.scale(loss).backward()
+            scaler.step(optimizer)
+            scaler.update()
+
+            step += 1
+            content_sum += content_loss.item()
+            style_sum += style_loss.item()
+            batch_count += 1
+            image_count += len(indices)
+            if step % args.log_interval == 0:
+                print("epoch {} {}/{} content {:.1f} style {:.1f} ({:.1f} images/s)".format(
+                    epoch + 1, start + len(indices), len(order), content_sum / batch_count,
+                    style_sum / batch_count, image_count / (time.monotonic() - t0)))
+                content_sum = style_sum = 0
+                batch_count = 0
+            if step % args.checkpoint_interval == 0:
+                save()
+        print("epoch {} done, {:.1f} images/s".format(epoch + 1, image_count / (time.monotonic() - t0)))
+
+
+def train_style_model(args, device, is_amp, scaler):
+    # only the slices up to the deepest layer of the losses are built and run
+    last_layer = max(args.style_layers + [args.content_layer], key=LAYERS.index)
+    vgg = Vgg16(requires_grad=False, weights_path=args.vgg_weights, last_layer=last_layer).to(device).eval()
+    style_grams = get_style_grams(vgg, args, device)
+    image_paths = list_images(args.dataset, args.max_images)
+    images, features = create_caches(vgg, args, image_paths, device)
+    print("{} content images, {} of them with cached features".format(len(image_paths), features.get_filled_count()))
+
+    model = TransformerNet()
+    if args.model:
+        model.load_state_dict(load_style_state_dict(args.model))
+    model = model.to(device).train()
+    mse_loss = torch.nn.MSELoss()
+
+    def compute_losses(indices):
+        x, content_features = load_batch(indices, image_paths, images, features, vgg, args, device)
+        with autocast(device, is_amp):
+            y = model(x)
+            features_y = vgg(normalize_batch(y), last_layer=last_layer)
+        content_loss = args.content_weight * mse_loss(getattr(features_y, args.content_layer).float(),
+                                                      content_features)
+        style_loss = 0
+        for layer, gram_style in style_grams.items():
+            gram_y = gram_matrix(getattr(features_y, layer).float())
+            style_loss += mse_loss(gram_y, gram_style.expand_as(gram_y))
+        return content_loss, style_loss * args.style_weight
+
+    def save():
+        torch.save(model.state_dict(), args.output)
+        features.flush()
+
+    train(args, model, len(image_paths), compute_losses, save, scaler)
+    features.flush()
+    images.flush()
+    torch.save(model.eval().state_dict(), args.output)
+
+
+def train_adain_decoder(args, device, is_amp, scaler):
+    """the decoder learns to invert the encoder on the adain output of random pairs of content and style images.
+    The style loss compares the channel means and standard deviations of the style layers"""
+    from style_transfer.adain import AdaINNet, adaptive_instance_normalization, feature_statistics
+
+    model = AdaINNet(vgg_weights_path=args.vgg_weights).to(device)
+    if args.model:
+        model.decoder.load_state_dict(torch.load(args.model, map_location="cpu"))
+    model.decoder.train()
+    content_paths = list_images(args.dataset, args.max_images)
+    style_paths = list_images(args.style_image, None)
+    contents = create_image_cache(args, content_paths)
+    styles = create_image_cache(args, style_paths, "styles")
+    print("{} content images, {} style images".format(len(content_paths), len(style_paths)))
+    mse_loss = torch.nn.MSELoss()
+
+    def compute_losses(indices):
+        style_indices = np.sort(np.random.randint(0, len(style_paths), len(indices)))
+        x = load_images(indices, content_paths, contents, device)
+        style_images = load_images(style_indices, style_paths, styles, device)
+        with torch.no_grad():
+            style_features = model.encoder(normalize_batch(style_images))
+            style_mean, style_std = feature_statistics(style_features.relu4_3)
+            target = adaptive_instance_normalization(model.encode(x), style_mean, style_std)
+        with autocast(device, is_amp):
+            # the decoder outputs the 0-1 range, the encoder expects 0-255
+            y = model.decoder(target) * 255
+            features_y = model.encoder(normalize_batch(y))
+        content_loss = args.content_weight * mse_loss(features_y.relu4_3.float(), target)
+        style_loss = 0
+        for layer in args.style_layers:
+            mean_y, std_y = feature_statistics(getattr(features_y, layer).float())
+            mean_s, std_s = feature_statistics(getattr(style_features, layer))
+            style_loss += mse_loss(mean_y, mean_s) + mse_loss(std_y, std_s)
+        return content_loss, style_loss * args.style_weight
+
+    def save():
+        torch.save(model.decoder.state_dict(), args.output)
+
+    train(args, model.decoder, len(content_paths), compute_losses, save, scaler)
+    contents.flush()
+    styles.flush()
+    torch.save(model.decoder.eval().state_dict(), args.output)
+
+
+def main():
+    args = parse_args()
+    device = torch.device(args.device or ("cuda" if torch.cuda.is_available() else "cpu"))
+    is_amp = args.amp == "on" or (args.amp == "auto" and device.type == "cuda")
+    if is_amp and device.type != "cuda" and not hasattr(torch, "autocast"):
+        print("mixed precision on the cpu needs torch 1.10, training in float32")
+        is_amp = False
+    # float16 gradients need loss scaling, bfloat16 has the range of float32
+    scaler = torch.cuda.amp.GradScaler(enabled=is_amp and device.type == "cuda")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    if args.adain:
+        train_adain_decoder(args, device, is_amp, scaler)
+    else:
+        train_style_model(args, device, is_amp, scaler)
+    print("wrote", args.output)
+
+
+if __name__ == "__main__":
+    main()
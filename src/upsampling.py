@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+
+
+class GuidedUpsampler:
+    """Upsamples a stylized image with the full resolution camera frame as guide (fast guided filter).
+
+    Every output channel is modelled as a local linear function of the guide's brightness. The linear
+    coefficients are fitted at the low resolution of the stylized image with box filters of the given radius,
+    interpolated to the full resolution and applied to the full resolution guide, which brings back its edges.
+    eps is the regularization relative to the 0-1 range, larger values follow the guide less.
+    """
+
+    def __init__(self, radius=4, eps=1e-3):
+        self.kernel_size = (2 * radius + 1, 2 * radius + 1)
+        self.eps = eps * 255 ** 2
+
+    def _box(self, image):
+        return cv2.boxFilter(image, -1, self.kernel_size, borderType=cv2.BORDER_REFLECT)
+
+    def upsample(self, image, guide):
+        """image is the low resolution HxWx3 uint8 output, guide the BGR frame in the output size"""
+        height, width = image.shape[:2]
+        guide = cv2.cvtColor(guide, cv2.COLOR_BGR2GRAY)
+        small_guide = cv2.resize(guide, (width, height), interpolation=cv2.INTER_AREA).astype(np.float32)
+        image = image.astype(np.float32)
+
+        mean_guide = self._box(small_guide)
+        mean_image = self._box(image)
+        var_guide = self._box(small_guide * small_guide) - mean_guide * mean_guide
+        cov = self._box(image * small_guide[..., np.newaxis]) - mean_image * mean_guide[..., np.newaxis]
+        a = cov / (var_guide[..., np.newaxis] + self.eps)
+        b = mean_image - a * mean_guide[..., np.newaxis]
+
+        output_size = guide.shape[::-1]
+        a = cv2.resize(self._box(a), output_size, interpolation=cv2.INTER_LINEAR)
+        b = cv2.resize(self._box(b), output_size, interpolation=cv2.INTER_LINEAR)
+        a *= guide[..., np.newaxis]
+        a += b
+        np.clip(a, 0, 255, out=a)
+        return a.astype(np.uint8)